@@ -0,0 +1,265 @@
+'''基于`asyncio`的NAL测试运行接口
+- 🎯便于嵌入异步编排服务：在单个事件循环线程中同时运行大量测试，而无需「每个子进程一个线程」
+- 🚩启动BabelNAR CLI，在事件循环中异步读取输出
+    - 📌POSIX：以`subprocess.Popen`启动，管道接入事件循环；子进程退出后先杀死进程树，再回收子进程
+        - 🎯与同步接口一致（见`toolchain.wait_exit_without_reaping`）：杀死进程树时，子进程ID不会已被复用
+        - ⚠️`asyncio`自带的子进程会在退出时立即被事件循环回收，故不用
+    - 📌Windows：使用`asyncio.create_subprocess_exec`（进程句柄被持有，回收后进程ID也不会被复用）
+- 📌与同步接口一一对应，返回相同的`TestResult`
+    - 📌只依赖`toolchain`：导入本模块不会像`run_tests`那样重设标准输入输出的编码
+    - `run_test_nal_async` ⇔ `toolchain.run_test_nal`
+    - `test_nal_async` ⇔ `NARSType.test_nal`
+    - `perform_cross_tests_async` ⇔ `run_tests.perform_cross_tests`
+- 📌与同步接口相同，读写结果缓存（见`result_cache.py`）
+- ⚠️暂不支持「会话模式」：总是为每次测试启动新进程
+'''
+
+import asyncio
+import os
+from os import path
+import subprocess
+from subprocess import CompletedProcess, Popen
+from time import time
+from typing import List, Optional, Tuple, Union
+
+from toolchain import *
+from util import *
+
+STREAM_LINE_LIMIT = 1 << 20
+'''异步读取子进程输出时，单行的最大字节数
+- 📝`asyncio`默认仅64KiB，推理器的长输出行可能超出
+'''
+
+AsyncChild = Union[Popen, asyncio.subprocess.Process]
+'''异步运行的子进程：POSIX下为`Popen`，Windows下为`asyncio`子进程'''
+
+
+async def start_child(cmd: List[str]) -> Tuple[AsyncChild, asyncio.StreamReader, asyncio.StreamReader]:
+    '''启动子进程（自成一个进程组），返回子进程及其标准输出、标准错误的异步读取器'''
+    if os.name == 'nt':
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LINE_LIMIT,
+            **new_process_group_kwargs())
+        assert process.stdout is not None
+        assert process.stderr is not None
+        return process, process.stdout, process.stderr
+    process = subprocess.Popen(cmd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               **new_process_group_kwargs())
+    loop = asyncio.get_running_loop()
+    readers = []
+    for pipe in (process.stdout, process.stderr):
+        reader = asyncio.StreamReader(limit=STREAM_LINE_LIMIT)
+        await loop.connect_read_pipe(
+            lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe)
+        readers.append(reader)
+    return process, readers[0], readers[1]
+
+
+async def wait_child_exit(process: AsyncChild) -> None:
+    '''等待子进程退出
+    - 🚩`Popen`：不回收（保留僵尸进程），以便随后安全地杀死进程树
+        - 📌有`pidfd_open`（Linux）⇒在事件循环中等待；否则在线程池中`waitid`
+    - 🚩`asyncio`子进程：直接等待（由事件循环回收）
+    '''
+    if not isinstance(process, Popen):
+        await process.wait()
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        pidfd = os.pidfd_open(process.pid)  # type: ignore
+    except (AttributeError, OSError):
+        await loop.run_in_executor(None, wait_exit_without_reaping, process)
+        return
+    exited = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+
+
+async def reap_child(process: AsyncChild) -> int:
+    '''回收子进程，返回退出码
+    - ⚠️应在杀死进程树之后调用
+    '''
+    if isinstance(process, Popen):
+        return await asyncio.get_running_loop().run_in_executor(None, process.wait)
+    return await process.wait()
+
+
+async def run_test_nal_async(
+        launch_hjson_path: str,
+        nal_index: str,
+        kill_java_timeouts: float = -1,
+        *,
+        watch_output: bool = True,
+        encodings: Optional[OutputEncodings] = None) -> TestResult:
+    '''运行指定的NAL测试文件，并返回结果（异步版本）
+    - 🚩子进程退出、监视器得出判定、超时 三者先到先结束
+        - 📌与同步接口一致：不限时⇒不监视输出，总是等待子进程退出
+    - 🚩结束后总是杀死进程树，之后才回收子进程
+
+    Args:
+        launch_hjson_path(str): 启动的配置文件路径（用于启动CIN）
+        nal_index(str): NAL测试索引，如`single_step/1.0`
+        kill_java_timeouts(float): 超时时间（秒）；默认为-1，表示不限时
+        watch_output(bool): 是否边运行边监视输出，在预期全部达成或出现失败标记时立即结束；默认为是（仅在限时时生效）
+        encodings(OutputEncodings, optional): 输出的候选编码表（如`NARSType.output_encodings`）；默认先UTF-8后GBK
+    Returns:
+        TestResult: 测试结果
+    '''
+    # 构建完整的「NAL预加载」配置文件路径 | ⚠️需要动态导入 以避免循环导入
+    from constants import CONFIG_NAL, CONFIG_NAL_PRELUDE
+    NAL_HJSON_PATH = CONFIG_NAL + f'{nal_index}.hjson'
+
+    # 验证路径
+    if not path.exists(NAL_HJSON_PATH):
+        raise FileNotFoundError(f'找不到NAL测试配置文件：{NAL_HJSON_PATH}')
+
+    # 输出监视器（仅限时时）
+    watcher = (
+        OutputWatcher.for_nal_config(NAL_HJSON_PATH)
+        if watch_output and kill_java_timeouts >= 0
+        else None)
+    decided = asyncio.Event()
+    '''「已判定」事件（异步版）'''
+
+    cmd = build_cli_launch_cmd(
+        launch_hjson_path, CONFIG_NAL_PRELUDE, NAL_HJSON_PATH)
+
+    # 计时器准备
+    now = time()
+
+    process, stdout_reader, stderr_reader = await start_child(cmd)
+
+    async def pump(stream: asyncio.StreamReader, capture: OutputCapture) -> None:
+        '''逐行读取输出，写入输出捕获，并送入监视器'''
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            capture.write(line)
+            if watcher is not None:
+                watcher.feed(line)
+                if watcher.verdict is not None:
+                    decided.set()
+
+    stdout, stderr = new_output_capture(), new_output_capture()
+    readers = [
+        asyncio.ensure_future(pump(stdout_reader, stdout)),
+        asyncio.ensure_future(pump(stderr_reader, stderr)),
+    ]
+    waiters = [
+        asyncio.ensure_future(wait_child_exit(process)),
+        asyncio.ensure_future(decided.wait()),
+    ]
+
+    # 等待：判定、退出或超时
+    await asyncio.wait(
+        waiters,
+        timeout=kill_java_timeouts if kill_java_timeouts >= 0 else None,
+        return_when=asyncio.FIRST_COMPLETED)
+
+    # 结束：杀死进程树（可能调用外部命令，放到线程池中），读完剩余输出，最后回收子进程
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, kill_process_tree, process)
+    await asyncio.gather(*readers)
+    returncode = await reap_child(process)
+    for waiter in waiters:
+        waiter.cancel()
+
+    # 计算时间差（秒）
+    dt = time() - now
+
+    completed = CompletedProcess(
+        cmd, returncode,
+        stdout.finish(), stderr.finish())
+    return TestResult.from_process_result(
+        ProcessResult(completed), dt,
+        encodings=encodings or OutputEncodings(),
+        success=watcher.verdict if watcher is not None else None)
+
+
+async def test_nal_async(
+        nars_type: NARSType,
+        test_file: TestFile,
+        *,
+        silent: bool = True,
+        show_verbose: bool = False,
+        use_cache: bool = True) -> TestResult:
+    '''使用NARS类型运行NAL测试（异步版本）
+    - 🚩与`NARSType.test_nal`逻辑一致：遍历「超时杀Java」时长，只要一个成功即退出
+    - 🚩进程无效⇒异步等待后重试（指数退避），不阻塞事件循环
+    - 🚩结果缓存：与`NARSType.test_nal`相同地读取与写入（文件读写放到线程池中）
+    '''
+    loop = asyncio.get_running_loop()
+
+    # 结果缓存 #
+    result = (
+        await loop.run_in_executor(None, nars_type.cached_result, test_file)
+        if use_cache else None)
+
+    # 测试 #
+    if result is None:
+        attempts = nars_type.test_attempts(test_file)
+        while True:
+            result = await run_test_nal_async(
+                nars_type.launch_config_path,
+                test_file.nal_index,
+                kill_java_timeouts=(
+                    attempts.timeout if attempts.timeout is not None else -1),
+                encodings=nars_type.output_encodings)
+            if not attempts.advance(result):
+                break
+            await asyncio.sleep(max(0, attempts.not_before - time()))
+        if use_cache:
+            await loop.run_in_executor(None, nars_type.cache_result, test_file, result)
+
+    # 非静默 ⇒ 展示结果
+    if not silent:
+        show_result(result, verbose=show_verbose)
+
+    return result
+
+
+async def perform_cross_tests_async(
+    nars_types: List[NARSType],
+    test_files: List[TestFile],
+    *,
+    max_concurrency: Optional[int] = None,
+    verbose_on_success: bool = True,
+    verbose_on_fail: bool = True,
+) -> CrossTestResult:
+    '''开展交叉测试（异步版本）
+    - 🚩所有测试同时提交，由信号量限制同时运行的数目
+    - 📌返回结果的顺序与`run_tests.perform_cross_tests`一致
+
+    Args:
+        max_concurrency: 同时运行的测试数目，默认为`constants.ASYNC_CROSS_TEST_LIMIT`
+    '''
+    if max_concurrency is None:
+        from constants import ASYNC_CROSS_TEST_LIMIT
+        max_concurrency = ASYNC_CROSS_TEST_LIMIT
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def test_one(nars_type: NARSType, test_file: TestFile) -> TestResult:
+        async with semaphore:
+            result = await test_nal_async(nars_type, test_file)
+        show_cross_result(nars_type, test_file, result,
+                          verbose_on_success=verbose_on_success,
+                          verbose_on_fail=verbose_on_fail)
+        return result
+
+    jobs: List[CrossTestJob] = [
+        (nars_type, test_file)
+        for test_file in test_files  # 优先遍历测试文件
+        for nars_type in nars_types  # 然后才是NARS类型
+    ]
+    results = await asyncio.gather(*(test_one(*job) for job in jobs))
+    return dict(zip(jobs, results))
@@ -0,0 +1,224 @@
+'''BabelNAR CLI 模拟器
+- 🎯在没有`babelnar_cli.exe`与Java的环境（如Linux构建机）中，测量并回归测试「测试工具链」自身的开销
+- 🚩接受与BabelNAR CLI相同的启动参数：`-c 启动配置.hjson -c prelude_test.hjson -c 测试.hjson`
+    - 📌按从先往后的顺序读取配置：`preludeNAL.file`、`userInput`、`strictMode`
+- 🚩读取配置所引用的`.nal`文件，逐行「运行」
+    - Narsese输入 ⇒ 回显`[IN]`
+    - `''sleep: 【时长】` ⇒ 等待（按比例缩放）
+    - `''expect-cycle(【最大步数】, …)` ⇒ 输出`expect-cycle(【步数】)`，或按失败率判定失败
+    - `''terminate(if-no-user)` ⇒ 不允许用户输入时退出（退出码0）
+    - 以三个单引号开头的NAVM指令 ⇒ `RES`输出`[INFO] reset`（重置完成），其余指令忽略
+- 🚩允许用户输入时（会话模式），继续从标准输入读取并「运行」各行
+- 🔧通过环境变量配置延迟、抖动与失败率（见[`EmulatorSettings`]）
+- 📌在`constants.py`中通过`BABELNAR_CLI`选用（环境变量`BABELNAR_USE_EMULATOR=1`）
+- 📌只依赖标准库：每次启动都不导入测试工具链，以免启动开销混入所测量的结果
+'''
+
+import re
+import sys
+from os import environ, path
+from random import Random
+from time import sleep
+from typing import List, Optional, TextIO
+
+NAL_FILE_PATTERN = re.compile(r'^\s*file\s*:\s*(.+?)\s*$', re.MULTILINE)
+'''配置文件中引用`.nal`文件的模式（与`toolchain.nal_file_of_config`一致）'''
+
+
+class EmulatorSettings:
+    '''模拟器设置
+    - 🚩均从环境变量中读取，未设置则取默认值
+    '''
+
+    startup_latency: float
+    '''启动延迟（秒）：模拟JVM启动 | `BABELNAR_EMULATOR_STARTUP`'''
+
+    expect_latency: float
+    '''每个「预期」的推理延迟（秒） | `BABELNAR_EMULATOR_LATENCY`'''
+
+    jitter: float
+    '''延迟的随机抖动上限（秒），均匀分布 | `BABELNAR_EMULATOR_JITTER`'''
+
+    sleep_scale: float
+    '''`''sleep`指令的时长缩放比例 | `BABELNAR_EMULATOR_SLEEP_SCALE`'''
+
+    failure_rate: float
+    '''每个「预期」失败的概率 | `BABELNAR_EMULATOR_FAILURE_RATE`'''
+
+    invalid_rate: float
+    '''「子进程意外关闭」的概率（每次启动） | `BABELNAR_EMULATOR_INVALID_RATE`'''
+
+    hang_rate: float
+    '''运行完毕后不退出（模拟残留进程）的概率 | `BABELNAR_EMULATOR_HANG_RATE`'''
+
+    output_lines: int
+    '''每行输入额外产生的输出行数：模拟推理器的冗长输出 | `BABELNAR_EMULATOR_OUTPUT_LINES`'''
+
+    seed: Optional[int]
+    '''随机种子，未设置则不固定 | `BABELNAR_EMULATOR_SEED`'''
+
+    def __init__(self) -> None:
+        self.startup_latency = float(environ.get('BABELNAR_EMULATOR_STARTUP', 0.0))
+        self.expect_latency = float(environ.get('BABELNAR_EMULATOR_LATENCY', 0.0))
+        self.jitter = float(environ.get('BABELNAR_EMULATOR_JITTER', 0.0))
+        self.sleep_scale = float(environ.get('BABELNAR_EMULATOR_SLEEP_SCALE', 1.0))
+        self.failure_rate = float(environ.get('BABELNAR_EMULATOR_FAILURE_RATE', 0.0))
+        self.invalid_rate = float(environ.get('BABELNAR_EMULATOR_INVALID_RATE', 0.0))
+        self.hang_rate = float(environ.get('BABELNAR_EMULATOR_HANG_RATE', 0.0))
+        self.output_lines = int(environ.get('BABELNAR_EMULATOR_OUTPUT_LINES', 0))
+        seed = environ.get('BABELNAR_EMULATOR_SEED')
+        self.seed = int(seed) if seed else None
+
+
+class EmulatorConfig:
+    '''从BabelNAR CLI配置文件中读取的、模拟器所需的配置项'''
+
+    prelude_nal: Optional[str] = None
+    '''预置的`.nal`文件路径'''
+
+    user_input: bool = True
+    '''是否允许用户输入'''
+
+    strict_mode: bool = False
+    '''是否启用严格模式：预期失败时panic'''
+
+    @staticmethod
+    def from_paths(config_paths: List[str]) -> 'EmulatorConfig':
+        '''按从先往后的顺序读取配置文件，后者覆盖前者'''
+        config = EmulatorConfig()
+        for config_path in config_paths:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            # `.nal`文件：相对「配置文件自身」所在目录解析
+            nal_file = NAL_FILE_PATTERN.search(content)
+            if nal_file is not None:
+                config.prelude_nal = path.normpath(path.join(
+                    path.dirname(config_path), nal_file.group(1).strip('"\'')))
+            user_input = re.search(r'^\s*userInput\s*:\s*(true|false)', content, re.MULTILINE)
+            if user_input:
+                config.user_input = user_input.group(1) == 'true'
+            strict_mode = re.search(r'^\s*strictMode\s*:\s*(true|false)', content, re.MULTILINE)
+            if strict_mode:
+                config.strict_mode = strict_mode.group(1) == 'true'
+        return config
+
+
+class Emulator:
+    '''模拟的BabelNAR CLI运行时'''
+
+    def __init__(self, settings: EmulatorSettings, config: EmulatorConfig, out: TextIO, err: TextIO) -> None:
+        self.settings = settings
+        self.config = config
+        self.out = out
+        self.err = err
+        self.random = Random(settings.seed)
+
+    def delay(self, base: float) -> None:
+        '''等待一段带抖动的时长'''
+        duration = base + self.random.uniform(0, self.settings.jitter)
+        if duration > 0:
+            sleep(duration)
+
+    def print(self, line: str) -> None:
+        print(line, file=self.out, flush=True)
+
+    def run_line(self, line: str) -> Optional[int]:
+        '''「运行」一行NAL输入
+        - 🚩返回`None`⇒继续；返回整数⇒以此为退出码退出
+        '''
+        line = line.strip()
+        # 空行、普通注释
+        if not line or (line.startswith("'") and not line.startswith("''")):
+            return None
+        # NAVM指令 | 重置⇒输出「重置完成」标记（见`constants.SESSION_RESET_ACK`）
+        if line.startswith("'''"):
+            if line[3:].split()[:1] == ['RES']:
+                self.print('[INFO] reset')
+            return None
+        # 等待
+        if line.startswith("''sleep:"):
+            match = re.match(r"''sleep:\s*([0-9.]+)\s*(ms|s)", line)
+            if match:
+                seconds = float(match.group(1)) / (1000 if match.group(2) == 'ms' else 1)
+                sleep(seconds * self.settings.sleep_scale)
+            return None
+        # 预期
+        if line.startswith("''expect-cycle"):
+            match = re.match(r"''expect-cycle\(\s*([0-9]+)", line)
+            max_cycles = int(match.group(1)) if match else 1
+            self.delay(self.settings.expect_latency)
+            if self.random.random() < self.settings.failure_rate:
+                self.print(f'[ERROR] expectation failed: {line}')
+                if self.config.strict_mode:
+                    print(f"thread 'main' panicked at 'expectation failed: {line}'",
+                          file=self.err, flush=True)
+                    return 1
+                return None
+            cycles = self.random.randint(1, max(1, max_cycles))
+            self.print(f'[EXPECTED] expect-cycle({cycles}): {line.split(":", 1)[-1].strip()}')
+            return None
+        # 终止
+        if line.startswith("''terminate"):
+            if 'if-no-user' not in line or not self.config.user_input:
+                return 0
+            return None
+        # 其它：视作Narsese输入
+        self.print(f'[IN] {line}')
+        for i in range(self.settings.output_lines):
+            self.print(f'[OUT] {line} #{i}')
+        return None
+
+    def run(self, stdin: TextIO) -> int:
+        '''运行：启动⇒预置NAL⇒（用户输入）⇒退出'''
+        self.delay(self.settings.startup_latency)
+        # 子进程意外关闭
+        if self.random.random() < self.settings.invalid_rate:
+            self.print('[ERROR] 子进程已关闭')
+            return 1
+        # 预置NAL
+        if self.config.prelude_nal is not None:
+            if not path.isfile(self.config.prelude_nal):
+                print(f'找不到NAL文件：{self.config.prelude_nal}', file=self.err, flush=True)
+                return 1
+            with open(self.config.prelude_nal, 'r', encoding='utf-8') as f:
+                for line in f:
+                    code = self.run_line(line)
+                    if code is not None:
+                        return self.exit(code)
+        # 用户输入
+        if self.config.user_input:
+            for line in stdin:
+                code = self.run_line(line)
+                if code is not None:
+                    return self.exit(code)
+        return self.exit(0)
+
+    def exit(self, code: int) -> int:
+        '''退出前按概率「残留」'''
+        if self.random.random() < self.settings.hang_rate:
+            while True:
+                sleep(3600)
+        return code
+
+
+def parse_config_paths(argv: List[str]) -> List[str]:
+    '''解析`-c 【配置文件路径】`形式的参数'''
+    return [
+        argv[i + 1]
+        for i, arg in enumerate(argv[:-1])
+        if arg in ('-c', '--config')
+    ]
+
+
+def main(argv: List[str]) -> int:
+    '''主函数'''
+    # 与BabelNAR CLI一致：强制使用UTF-8输出
+    sys.stdout.reconfigure(encoding='utf-8')  # type: ignore
+    sys.stderr.reconfigure(encoding='utf-8')  # type: ignore
+    config = EmulatorConfig.from_paths(parse_config_paths(argv))
+    emulator = Emulator(EmulatorSettings(), config, sys.stdout, sys.stderr)
+    return emulator.run(sys.stdin)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
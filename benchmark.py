@@ -0,0 +1,280 @@
+'''测试工具链自身的性能基准
+- 🎯量化一次完整测试中「工具链开销」的构成：进程启动、管道读取、解码、正则提取、打印、序列化
+- 🚩以BabelNAR CLI模拟器代替真实CLI，运行真实的流水线
+    - `perform_cross_tests`（经由`group_test`，边测试边写结果日志）→ `show_test_result` → `store_group_test`（从结果日志生成）
+- 🚩另外对流水线中的各环节单独重放计时：解码、提取步数、打印单个结果、JSON化、CSV化
+- 📌输出机器可读的JSON：各阶段耗时（每次重复）、中位数、单项耗时、吞吐量（项/秒）
+    - 🎯便于跨版本比较
+
+用法：`python benchmark.py [--repeats 3] [--limit 10] [--latency 0.01] [--output bench.json]`
+'''
+
+# * 🚩默认使用模拟器：需在导入`constants`之前设置
+from os import environ
+environ.setdefault('BABELNAR_USE_EMULATOR', '1')
+
+import argparse
+import io
+import platform
+import subprocess
+import sys
+from contextlib import contextmanager, redirect_stdout
+from json import dumps
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, List
+
+from result_cache import reset_result_cache
+
+from run_tests import *
+from util import *
+
+EMULATOR_ENV_OPTIONS = {
+    'startup': 'BABELNAR_EMULATOR_STARTUP',
+    'latency': 'BABELNAR_EMULATOR_LATENCY',
+    'jitter': 'BABELNAR_EMULATOR_JITTER',
+    'sleep_scale': 'BABELNAR_EMULATOR_SLEEP_SCALE',
+    'failure_rate': 'BABELNAR_EMULATOR_FAILURE_RATE',
+    'invalid_rate': 'BABELNAR_EMULATOR_INVALID_RATE',
+    'output_lines': 'BABELNAR_EMULATOR_OUTPUT_LINES',
+    'seed': 'BABELNAR_EMULATOR_SEED',
+}
+'''命令行参数 ⇒ 模拟器环境变量'''
+
+
+class StageTimings:
+    '''各阶段的计时记录
+    - 🚩阶段名 ⇒ 每次重复的耗时（秒）与处理的项数
+    '''
+
+    seconds: Dict[str, List[float]]
+    '''阶段名 ⇒ 每次重复的耗时（秒）'''
+
+    counts: Dict[str, int]
+    '''阶段名 ⇒ 每次重复处理的项数'''
+
+    def __init__(self) -> None:
+        self.seconds = {}
+        self.counts = {}
+
+    def record(self, name: str, seconds: float, count: int) -> None:
+        '''记录一次耗时'''
+        self.seconds.setdefault(name, []).append(seconds)
+        self.counts[name] = count
+
+    @contextmanager
+    def timed(self, name: str, count: int) -> Iterator[None]:
+        '''计时上下文：`with timings.timed('阶段', 项数): ...`'''
+        start = time()
+        yield
+        self.record(name, time() - start, count)
+
+    def to_json(self) -> dict:
+        '''汇总为JSON对象'''
+        stages = {}
+        for name, seconds in self.seconds.items():
+            count = self.counts[name]
+            median = percentile(seconds, 0.5)
+            stages[name] = {
+                'count': count,
+                'seconds': seconds,
+                'median': median,
+                'min': min(seconds),
+                'per_item_ms': median / count * 1000 if count else None,
+                'throughput': count / median if median > 0 else None,
+            }
+        return stages
+
+
+@contextmanager
+def silenced() -> Iterator[io.StringIO]:
+    '''将标准输出重定向到内存
+    - 🎯计入打印的格式化与写入开销，而不受终端速度影响
+    '''
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        yield sink
+
+
+def bench_spawn(timings: StageTimings, n_spawn: int) -> None:
+    '''单独测量「启动CLI进程」的开销：不加载任何配置，立即退出'''
+    cmd = build_cli_launch_cmd()
+    with timings.timed('spawn', n_spawn):
+        for _ in range(n_spawn):
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, capture_output=True)
+
+
+@contextmanager
+def isolated_results(file_root: str) -> Iterator[None]:
+    '''将流水线的所有输出限制在临时目录中，结束后恢复配置
+    - 🚩程序输出压缩块、输出临时文件⇒临时目录下的`blobs/`、`spill/`（而非真实结果目录）
+    - 🚩不写入SQLite结果库，不读写结果缓存
+    '''
+    overrides = {
+        'OUTPUT_BLOB_ROOT': file_root + 'blobs/',
+        'OUTPUT_SPILL_DIR': file_root + 'spill/',
+        'RESULT_STORE_DATABASE': None,
+        'RESULT_CACHE_ENABLED': False,
+    }
+    saved = {name: getattr(constants, name) for name in overrides}
+    for (name, value) in overrides.items():
+        setattr(constants, name, value)
+    reset_result_cache()
+    try:
+        yield
+    finally:
+        for (name, value) in saved.items():
+            setattr(constants, name, value)
+        reset_result_cache()
+
+
+def bench_pipeline(
+        timings: StageTimings,
+        nars_types: List[NARSType],
+        test_files: List[TestFile],
+        workers: int) -> GroupTestResult:
+    '''测量真实流水线：交叉测试 → 展示结果 → 存储结果
+    - 🚩结果日志、JSON、CSV与压缩块均写入临时目录，结束后删除
+    '''
+    with TemporaryDirectory() as file_root, isolated_results(file_root + '/'):
+        return _bench_pipeline(timings, nars_types, test_files, workers, file_root + '/')
+
+
+def _bench_pipeline(
+        timings: StageTimings,
+        nars_types: List[NARSType],
+        test_files: List[TestFile],
+        workers: int,
+        file_root: str) -> GroupTestResult:
+    n_jobs = len(nars_types) * len(test_files)
+    log_path = file_root + 'benchmark.jsonl'
+
+    # 交叉测试
+    start = time()
+    with silenced(), ResultLog(log_path) as result_log:
+        results = group_test(nars_types, test_files,
+                             workers=workers, result_log=result_log)
+    wall = time() - start
+    timings.record('cross_tests', wall, n_jobs)
+    # 子进程耗时 & 工具链开销（子进程之外的耗时）
+    process_time = sum(
+        result.time_diff
+        for cross_results in results.values()
+        for result in cross_results.values())
+    timings.record('cross_tests.process', process_time, n_jobs)
+    timings.record('cross_tests.overhead',
+                   max(0.0, wall - process_time / max(1, workers)), n_jobs)
+
+    # 展示结果（含差异分析）
+    with silenced(), timings.timed('show_test_result', n_jobs):
+        show_test_result(results, wall)
+
+    # 存储结果（从结果日志生成）
+    with silenced(), timings.timed('store_group_test', n_jobs):
+        logged = order_group_result(
+            load_result_log(log_path), nars_types, test_files)
+        store_group_test(logged, file_root, 'benchmark')
+
+    return results
+
+
+def bench_components(timings: StageTimings, results: GroupTestResult) -> None:
+    '''在已有结果上重放流水线中的各环节，单独计时'''
+    flat = [
+        (nars_type, test_file, result)
+        for cross_results in results.values()
+        for ((nars_type, test_file), result) in cross_results.items()
+    ]
+    n = len(flat)
+    raw_outputs = [
+        (result.output_std or '').encode('utf-8')
+        for (_, _, result) in flat
+    ]
+
+    # 解码（首次读取输出时）
+    encodings = OutputEncodings()
+    with timings.timed('decode', n):
+        for raw in raw_outputs:
+            encodings.decode('output_std', raw)
+
+    # 提取「成功步数」（直接匹配原始字节）
+    with timings.timed('extract_cycles', n):
+        for raw in raw_outputs:
+            EXPECT_CYCLE_PATTERN.findall(raw)
+
+    # 打印单个结果
+    with silenced(), timings.timed('show_cross_result', n):
+        for (nars_type, test_file, result) in flat:
+            show_cross_result(nars_type, test_file, result,
+                              verbose_on_success=True, verbose_on_fail=True)
+
+    # 序列化
+    with timings.timed('jsonify', n):
+        json = jsonify_group_test(results)
+    with timings.timed('json_dumps', n):
+        dumps(json, indent=4)
+    with timings.timed('to_csv', n):
+        test_results_to_csv(results)
+
+
+def main(argv: List[str]) -> dict:
+    '''主函数：运行基准测试，输出JSON'''
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3, help='重复次数')
+    parser.add_argument('--limit', type=int, default=None, help='只取前若干个测试文件')
+    parser.add_argument('--workers', type=int, default=1, help='同时运行的测试数目')
+    parser.add_argument('--spawn', type=int, default=10, help='单独测量进程启动的次数')
+    parser.add_argument('--output', default=None, help='JSON结果的保存路径，默认仅输出到标准输出')
+    parser.add_argument('--startup', type=float, default=0.0, help='模拟器：启动延迟（秒）')
+    parser.add_argument('--latency', type=float, default=0.0, help='模拟器：每个预期的延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='模拟器：延迟抖动上限（秒）')
+    parser.add_argument('--sleep-scale', type=float, default=0.0, help="模拟器：`''sleep`指令的缩放比例")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='模拟器：预期失败率')
+    parser.add_argument('--invalid-rate', type=float, default=0.0, help='模拟器：子进程意外关闭率')
+    parser.add_argument('--output-lines', type=int, default=0, help='模拟器：每行输入额外的输出行数')
+    parser.add_argument('--seed', type=int, default=None, help='模拟器：随机种子')
+    args = parser.parse_args(argv)
+
+    # 配置模拟器（子进程继承环境变量）
+    emulator_settings = {}
+    for option, env_name in EMULATOR_ENV_OPTIONS.items():
+        value = getattr(args, option)
+        if value is not None:
+            environ[env_name] = str(value)
+            emulator_settings[option] = value
+
+    nars_types = ALL_NARS_TYPES
+    test_files = ALL_TEST_FILES[:args.limit] if args.limit else ALL_TEST_FILES
+
+    timings = StageTimings()
+    for _ in range(max(1, args.repeats)):
+        bench_spawn(timings, args.spawn)
+        results = bench_pipeline(timings, nars_types, test_files, args.workers)
+        bench_components(timings, results)
+
+    cross = timings.to_json()['cross_tests']
+    report = {
+        'meta': {
+            'time_stamp': time_stamp(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cli': constants.BABELNAR_CLI,
+            'emulator': emulator_settings,
+            'nars_types': [nars_type.name for nars_type in nars_types],
+            'n_test_files': len(test_files),
+            'workers': args.workers,
+            'repeats': args.repeats,
+        },
+        'tests_per_second': cross['throughput'],
+        'stages': timings.to_json(),
+    }
+
+    text = dumps(report, indent=4, ensure_ascii=False)
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
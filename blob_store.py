@@ -0,0 +1,104 @@
+'''内容寻址的压缩输出存储
+- 🎯推理器输出（标准输出/标准错误）体积大、重复多，不再原样嵌入结果JSON
+- 🚩以内容的SHA-256为键，zlib压缩后存为单独的文件：`【根目录】/ab/abcdef….zz`
+    - 📌相同内容只存一份（如不同运行中完全相同的输出）
+- 🚩结果JSON中只保留引用：`{"$blob": "【SHA-256】"}`
+    - 📌读取时由`TestResult.from_json`透明地解析
+- 📌过短的文本仍原样内嵌：引用本身也占空间
+'''
+
+import hashlib
+import zlib
+from glob import glob
+from os import getpid, makedirs, path, remove, replace
+from threading import get_ident
+from typing import Any, List, Optional
+
+BLOB_KEY = '$blob'
+'''引用对象中存放内容哈希的键'''
+
+BLOB_MIN_SIZE = 256
+'''存为压缩块的最短文本长度（字符），更短的文本原样内嵌'''
+
+COMPRESS_LEVEL = 9
+'''zlib压缩等级'''
+
+
+class BlobStore:
+    '''压缩块存储（一个目录）'''
+
+    root: str
+    '''根目录'''
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def path_of(self, digest: str) -> str:
+        '''压缩块的文件路径：按哈希前两位分目录，避免单个目录中文件过多'''
+        return path.join(self.root, digest[:2], digest + '.zz')
+
+    def put(self, text: str) -> dict:
+        '''存入文本，返回引用对象
+        - 🚩已存在相同内容⇒不重复写入
+        - 🚩先写临时文件再替换，避免并行写入或中断时留下损坏的块
+        '''
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        file_path = self.path_of(digest)
+        if not path.exists(file_path):
+            makedirs(path.dirname(file_path), exist_ok=True)
+            temp_path = f'{file_path}.{getpid()}.{get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(zlib.compress(data, COMPRESS_LEVEL))
+            replace(temp_path, file_path)
+        return {BLOB_KEY: digest}
+
+    def get(self, digest: str) -> str:
+        '''按哈希读出文本'''
+        with open(self.path_of(digest), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+    def digests(self) -> List[str]:
+        '''列出存储中所有压缩块的哈希'''
+        return [
+            path.basename(file_path)[:-len('.zz')]
+            for file_path in glob(path.join(self.root, '??', '*.zz'))]
+
+    def remove(self, digest: str) -> bool:
+        '''删除压缩块：返回是否删除（不存在⇒`False`）'''
+        try:
+            remove(self.path_of(digest))
+            return True
+        except OSError:
+            return False
+
+    def pack(self, text: Optional[str]) -> Any:
+        '''按长度决定：存为压缩块（返回引用）或原样返回'''
+        if text is not None and len(text) >= BLOB_MIN_SIZE:
+            return self.put(text)
+        return text
+
+    def resolve(self, value: Any) -> Any:
+        '''解析可能为引用的值
+        - 🚩是引用⇒读出文本；找不到压缩块⇒提示并返回`None`
+        - 🚩不是引用⇒原样返回
+        '''
+        if not is_blob_ref(value):
+            return value
+        try:
+            return self.get(value[BLOB_KEY])
+        except (OSError, zlib.error, UnicodeDecodeError) as e:
+            print(f'读取输出块 {value[BLOB_KEY]} 失败：{e}')
+            return None
+
+    @staticmethod
+    def default() -> 'BlobStore':
+        '''默认的压缩块存储：`constants.OUTPUT_BLOB_ROOT`'''
+        # ⚠️需要动态导入 以避免循环导入
+        from constants import OUTPUT_BLOB_ROOT
+        return BlobStore(OUTPUT_BLOB_ROOT)
+
+
+def is_blob_ref(value: Any) -> bool:
+    '''是否为压缩块引用'''
+    return isinstance(value, dict) and isinstance(value.get(BLOB_KEY), str)
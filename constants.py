@@ -4,8 +4,9 @@
 - 📝有关NAL-1各规则的中文译名，可参考<https://oss.poerlang.com/blog/nal1pic.html>
 '''
 
-from typing import Callable
-from os import getcwd
+import sys
+from typing import Callable, List, Optional, Union
+from os import environ, getcwd
 
 from toolchain import *
 from util import *
@@ -42,6 +43,195 @@ TEST_RESULT_FILE_NAME: Callable = lambda: f'group_result-{time_stamp()}.test'
 - 📜目前名称依赖系统时间
 '''
 
+OUTPUT_BLOB_ROOT = TEST_RESULT_FILE_ROOT + 'blobs/'
+'''程序输出压缩块的存储目录
+- 🚩结果JSON中的输出引用，均从此目录读出，详见`blob_store.py`
+'''
+
+OUTPUT_BLOB_STORAGE = True
+'''保存测试结果（JSON、结果日志）时，是否将程序输出存为压缩块
+- 📌不启用时，程序输出仍原样内嵌在JSON中
+'''
+
+RESULT_STORE_DATABASE: Optional[str] = None
+'''SQLite测试结果库的路径（可选）
+- 🚩非空⇒保存测试结果时，同时写入此数据库（以结果文件名作为运行名），详见`result_store.py`
+- 📄如`TEST_RESULT_FILE_ROOT + 'results.sqlite3'`
+- 📜默认为`None`：不启用
+'''
+
+# * === 结果缓存 === * #
+
+RESULT_CACHE_ENABLED = False
+'''是否启用测试结果缓存
+- 🚩启用后：`.nal`文件、配置文件、推理器`.jar`均未改变的测试，直接返回上次成功的结果，详见`result_cache.py`
+- 📜默认为`False`：总是实际运行
+'''
+
+RESULT_CACHE_ROOT = TEST_RESULT_FILE_ROOT + 'cache/'
+'''测试结果缓存的目录'''
+
+RESULT_CACHE_MAX_ENTRIES: Optional[int] = 10000
+'''测试结果缓存最多保留的条目数
+- 🚩超出⇒删去最旧的条目
+- 📌`None`表示不限
+'''
+
+RESULT_CACHE_MAX_AGE: Optional[float] = 7 * 24 * 3600
+'''测试结果缓存条目的最长保存时间（秒）
+- 🚩超过⇒不再命中，并被删去
+- 📌`None`表示不限
+- 📜默认为7天
+'''
+
+RESULT_CACHE_BYPASS = False
+'''是否跳过读取结果缓存
+- 🚩仍然运行所有测试，并以新结果刷新缓存
+'''
+
+# * === 并行测试 === * #
+
+CROSS_TEST_WORKERS = 1
+'''交叉测试时，同时运行的测试数目（工作线程数）
+- 🚩控制`run_tests.perform_cross_tests`的默认并行度
+- 📌`1`表示逐个运行（与原先的串行行为一致）
+- 📌「超时杀Java」只杀死各测试自身的进程树，并行测试之间互不干扰
+- 📜默认为1，即「不并行」
+'''
+
+CROSS_TEST_WORKERS_PER_NARS = None
+'''交叉测试时，同一「NARS类型」最多同时运行的测试数目
+- 📌类型为`int | None`，其中
+    - `None`：不单独限制，只受[`CROSS_TEST_WORKERS`]限制
+    - `int`：每个「NARS类型」最多同时运行的测试数目
+- 🎯避免同一推理器的多个JVM同时抢占内存
+'''
+
+CROSS_TEST_LONGEST_FIRST = False
+'''交叉测试时，是否按预计耗时「最长任务优先」派发
+- 🚩预计耗时取自结果目录中最近的测试结果（成功运行耗时的中位数），详见`scheduling.py`
+- 🚩启用后，所有测试组在同一线程池中调度
+- 📌只影响派发顺序：结果仍按原有顺序汇总与保存
+- 📜默认为`False`：按测试顺序派发
+'''
+
+ASYNC_CROSS_TEST_LIMIT = 16
+'''异步交叉测试时，同时运行的测试数目
+- 🚩控制`async_runner.perform_cross_tests_async`的默认并发上限
+'''
+
+# * === 重复测量 === * #
+
+REPEAT_COUNT = 1
+'''交叉测试时，每个「NARS类型×测试文件」运行的次数
+- 🚩大于1时：各次运行单独派发（可并行），保存全部样本，并报告耗时、步数的中位数、p95与置信区间，详见`sample_stats.py`
+- 📌差异分析据置信区间判断「步数」「耗时」是否有显著差异
+- 📜默认为1，即「只运行一次」
+'''
+
+BOOTSTRAP_RESAMPLES = 1000
+'''重复测量中，计算置信区间的自助法重抽样次数'''
+
+BOOTSTRAP_CONFIDENCE = 0.95
+'''重复测量中，置信区间的置信水平'''
+
+# * === 不稳定测试 === * #
+
+FLAKINESS_FILE = TEST_RESULT_FILE_ROOT + 'flakiness.json'
+'''不稳定度文件的路径
+- 🚩由`--flaky-check N`写入：每个「推理器×测试」的运行次数、通过次数与不稳定程度，详见`flakiness.py`
+'''
+
+QUARANTINE_MODE: Optional[str] = None
+'''如何对待不稳定度文件中「不稳定」的「推理器×测试」（隔离）
+- 📌类型为`str | None`，其中
+    - `None`：不隔离，与其它测试一样对待
+    - `'retry'`：失败后自动重新运行（至多[`QUARANTINE_RETRIES`]次），任一次成功即成功
+    - `'report'`：照常运行一次
+- 📌隔离的结果不参与差异分析与差异警告，另行列出
+- 📜默认为`None`：不隔离
+'''
+
+QUARANTINE_RETRIES = 2
+'''隔离方式为`'retry'`时，不稳定测试失败后最多重新运行的次数'''
+
+SINGLE_ATTEMPT = False
+'''每次运行是否只尝试一次：只用「超时杀Java」时长序列中的首个时长，失败后不再以更长的时长重试
+- 🎯检测不稳定测试（`--flaky-check N`）时启用：否则「首个时长下失败、更长时长下成功」会被计为通过，掩盖超时边界上的不稳定
+- 📌「进程无效」仍会重新运行：那是环境问题，不算一次结果
+'''
+
+# * === 输出监视 === * #
+
+OUTPUT_FAILURE_MARKERS = [
+    # BabelNAR CLI panic（严格模式下预期失败）
+    'panicked at',
+    # 子进程意外关闭（⚠️仅中文）
+    '子进程已关闭',
+    # 消息发送失败
+    'SendError',
+]
+'''「失败标记」：测试运行期间，输出中出现任一标记即判定测试失败并立即结束
+- 🎯配合`toolchain.OutputWatcher`，无需等到超时即可得出结论
+- 📌成功标记固定为`expect-cycle(【步数】)`，且需达到`.nal`文件中「预期」的数目
+'''
+
+# * === 输出捕获 === * #
+
+OUTPUT_CAPTURE_LIMIT: Optional[int] = None
+'''每个测试的每个输出流（标准输出/标准错误）在内存中保存的最大字节数
+- 🚩超出⇒完整输出改写到临时文件，内存中只保留开头、结尾与所有`expect-cycle`行，详见`output_capture.py`
+- 🎯避免长时间运行、输出极多的测试（如`VOL 100`）在并行时耗尽内存
+- 📄如`1 << 20`（1MiB）
+- 📜默认为`None`：不限制，完整保存在内存中
+'''
+
+OUTPUT_CAPTURE_HEAD = 1 << 16
+'''输出超出上限后，保留的开头字节数（上限）'''
+
+OUTPUT_CAPTURE_TAIL = 1 << 16
+'''输出超出上限后，保留的结尾字节数（上限）
+- 📌「子进程已关闭」等结束时的信息一般位于结尾
+'''
+
+OUTPUT_SPILL_DIR: Optional[str] = TEST_RESULT_FILE_ROOT + 'spill/'
+'''输出超出上限后，完整输出所在临时文件的目录
+- 📌临时文件在测试后保留，路径写在输出摘要的省略提示中
+- 📌被取代的尝试（超时阶梯、重试）的临时文件随即删除
+- 🚩`None`⇒系统临时目录（不自动清理）
+'''
+
+OUTPUT_SPILL_MAX_AGE: Optional[float] = 7 * 24 * 3600
+'''输出临时文件的最长保存时间（秒）
+- 🚩每次运行测试前，删除`OUTPUT_SPILL_DIR`中更旧的临时文件
+- 📌`None`表示不限
+- 📜默认为7天
+'''
+
+# * === 会话模式 === * #
+
+SESSION_RESET_INPUTS = ["'''RES"]
+'''「会话模式」下，每个测试开始前输入的「重置」指令
+- 🚩对应NAVM指令`RES`：清空推理器的记忆与缓冲区
+    - 📌与`.nal`文件中的其它NAVM指令（如`VOL 100`）相同，以三个单引号开头
+- 📌可按需替换为对应推理器支持的重置方式
+'''
+
+SESSION_RESET_ACK: Optional[str] = '[INFO] reset'
+'''「会话模式」下，表示「重置完成」的输出标记
+- 🚩输入重置指令后，等到输出中出现此标记才开始下一个测试
+    - 📌输入按顺序处理：出现此标记⇒此前输入的内容均已处理完毕
+- ⚠️须与所用推理器（经BabelNAR CLI）在重置时的实际输出一致
+    - 📌默认值对应`babelnar_cli_emulator.py`
+    - 📌等不到标记⇒视作「重置失败」，回退到新进程运行测试：结果不受影响，只是失去会话模式的加速
+- 🚩`None`⇒无法确认重置，总是回退到新进程
+'''
+
+SESSION_RESET_TIMEOUT = 5.0
+'''「会话模式」下，等待「重置完成」标记的最长时间（秒）
+- 🚩超时、或等待期间会话进程退出 ⇒ 视作「重置失败」，回退到新进程运行测试
+'''
+
 # * === 文件路径 === * #
 
 
@@ -65,9 +255,24 @@ ROOT = __ROOT()
 EXECUTABLES_ROOT = ROOT + 'executables/'
 '''存放可执行文件的根路径'''
 
-BABELNAR_CLI = EXECUTABLES_ROOT + 'babelnar_cli.exe'
+BABELNAR_CLI_EXE = EXECUTABLES_ROOT + 'babelnar_cli.exe'
 '''BabelNAR CLI 本体路径'''
 
+BABELNAR_CLI_EMULATOR = [sys.executable, ROOT + 'babelnar_cli_emulator.py']
+'''BabelNAR CLI 模拟器的启动命令
+- 🎯在无BabelNAR CLI与Java的环境中，测量工具链自身的开销
+- 🔧延迟、抖动、失败率等通过环境变量配置，详见`babelnar_cli_emulator.py`
+'''
+
+BABELNAR_CLI: Union[str, List[str]] = (
+    BABELNAR_CLI_EMULATOR
+    if environ.get('BABELNAR_USE_EMULATOR', '') not in ('', '0')
+    else BABELNAR_CLI_EXE)
+'''实际使用的BabelNAR CLI启动命令
+- 🚩默认为本体路径
+- 🚩环境变量`BABELNAR_USE_EMULATOR`非空且不为`0`⇒使用模拟器
+'''
+
 CONFIG_ROOT = ROOT + 'config/'
 '''配置文件的根路径'''
 
@@ -77,6 +282,9 @@ CONFIG_NAL = CONFIG_ROOT + 'test_nal/'
 CONFIG_NAL_PRELUDE = CONFIG_ROOT + 'prelude_test.hjson'
 '''用于在BabelNAR CLI启动后预置NAL测试文件的配置（NAL测试环境）'''
 
+CONFIG_SESSION = CONFIG_ROOT + 'session_test.hjson'
+'''用于在BabelNAR CLI启动后常驻、并从标准输入逐个接收NAL测试的配置（会话模式）'''
+
 CONFIG_LAUNCH_OPENNARS_158 = CONFIG_ROOT + 'launch_opennars_158.hjson'
 '''用于在BabelNAR CLI启动OpenNARS 1.5.8的配置文件'''
 
@@ -96,8 +304,7 @@ NARS_158 = NARSType(
 )
 '''配置/OpenNARS 1.5.8
 * ✅【2024-05-09 16:16:25】稳定性测试成功：Java残余进程问题⇒暂时通过「强行杀死Java进程」实现自动化
-* ⚠️目前会杀死所有的Java进程，包括与测试无关的Java程序
-  * 📄OpenNARS 3.x/1.5.x GUI程序
+* ✅【2024-06-15】现在只杀死测试自身的进程树，不再影响与测试无关的Java程序
 '''
 
 NARS_304 = NARSType(
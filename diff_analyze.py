@@ -4,16 +4,25 @@
     2. 成功所用步数不同⇒展示步数之差
     3. 运行时间不同⇒展示时间之差
 - 🚩不运行测试，仅分析保存的测试结果
+- 📌安装NumPy时，使用矩阵化的差异引擎[`DiffMatrix`]：可交互地处理上万个测试×数十个推理器
+- 📌重复测量的结果（见`sample_stats.py`）：「步数」「耗时」只在置信区间不重叠时才算差异
+- 📌隔离中的不稳定测试（见`flakiness.py`）不参与差异分析与差异警告，另行列出
 '''
 
 
-from typing import Dict, Tuple, Union
+from typing import Dict, Iterable, Tuple, Union
 
 from result_loader import load_group_results
 from run_tests import CrossTestResultToShow, GroupTestResult, GroupTestResultToShow, result_to_show
+from sample_stats import all_overlap
 from toolchain import TestResult
 from util import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
 
 GroupedResultByNARS = List[Tuple[str, List[Tuple[str, TestResult]]]]
 '''分组后结果
@@ -50,6 +59,66 @@ def groupby_nars_test(results: CrossTestResultToShow) -> GroupedResultByNARS:
     return l
 
 
+DIFF_TITLES = {
+    1: '- ⚠️ 部分成功：',
+    2: '- ℹ️ 所用步数：',
+    3: '- 🕒 运行耗时：',
+}
+'''差异级别 ⇒ 差异标题'''
+
+
+def time_interval(result: TestResult) -> Tuple[float, float]:
+    '''运行耗时的区间：重复测量⇒中位数的置信区间；否则退化为一点'''
+    stats = result.time_stats()
+    if stats is None:
+        return result.time_diff, result.time_diff
+    return stats.ci_low, stats.ci_high
+
+
+def cycles_differ(results: Iterable[TestResult]) -> bool:
+    '''各结果的成功步数是否有差异
+    - 🚩均有步数统计（重复测量）⇒置信区间是否不重叠
+    - 🚩否则⇒步数列表是否不同
+    '''
+    results = list(results)
+    stats = [r.cycles_stats() for r in results]
+    if all(s is not None for s in stats):
+        return not all_overlap(stats)
+    return not_same(
+        r.success_cycles  # 📝Python对数组的`==`判等是按值判等
+        for r in results)
+
+
+def times_differ(results: Iterable[TestResult]) -> bool:
+    '''各结果的运行耗时是否有差异：区间是否不全重叠
+    - 📌均只运行一次⇒即「耗时是否不全相等」
+    '''
+    intervals = [time_interval(r) for r in results]
+    return max(low for (low, _) in intervals) > min(high for (_, high) in intervals)
+
+
+def render_diff(
+        nars_results: List[Tuple[str, TestResult]],
+        diff_level: int,
+        indent=' '*4) -> str:
+    '''呈现单个测试在指定级别上的差异
+    - 🚩标题之下逐个列举各推理器的「成功与否/步数/耗时」
+    '''
+    max_display_len = max(len_display(nars_name)
+                          for nars_name, _ in nars_results)
+    lines = [indent + DIFF_TITLES[diff_level]]
+    for nars_name, r in nars_results:
+        name = pad_display_spaces(nars_name, max_display_len)
+        value = (
+            ('✅' if r.success else '❌') if diff_level == 1
+            else r.success_cycles if diff_level == 2 and r.cycles_stats() is None
+            else f'{r.success_cycles} ~ {r.cycles_stats()}' if diff_level == 2
+            else r.time_diff if r.time_stats() is None
+            else r.time_stats())
+        lines.append(f'{indent * 2}{name} => {value}')
+    return '\n'.join(lines) + '\n'
+
+
 def nars_diff_one(
         nars_results: List[Tuple[str, TestResult]],
         show_level: int,
@@ -58,59 +127,147 @@ def nars_diff_one(
     * 🚩返回(差异字符串, 差异最小级别)
         - 没有明确的「差异最小级别」⇒-1
     '''
-    result = ''
-
     if is_empty(nars_results):  # 空值⇒无差异
-        return result, -1
-
-    def print(obj='', n_indent=0, end='\n'):
-        nonlocal result, indent
-        result += (indent * n_indent) + obj + end
+        return '', -1
 
-    # 分析 & 追加 #
-    max_display_len = max(len_display(nars_name)
-                          for nars_name, _ in nars_results)
+    # 分析 #
     diff_level = -1
     # 1. 部分成功⇒展示「成功/失败」的差异
     if show_level > 0 and not_same(
             r.success
             for _, r in nars_results):
         diff_level = 1
-        print('- ⚠️ 部分成功：', 1)
-        for nars_name, r in nars_results:
-            name = pad_display_spaces(nars_name, max_display_len)
-            mark = '✅' if r.success else '❌'
-            print(f'{name} => {mark}', 2)
     # 2. 成功所用步数不同⇒展示步数之差
-    elif show_level > 1 and not_same(
-            r.success_cycles  # 📝Python对数组的`==`判等是按值判等
-            for _, r in nars_results):
+    elif show_level > 1 and cycles_differ(r for _, r in nars_results):
         diff_level = 2
-        print(f'- ℹ️ 所用步数：', 1)
-        # 此处直接列举
-        for nars_name, r in nars_results:
-            name = pad_display_spaces(nars_name, max_display_len)
-            print(f'{name} => {r.success_cycles}', 2)
     # 3. 运行时间不同⇒展示时间之差
-    elif show_level > 2 and not_same(
-            r.time_diff
-            for _, r in nars_results):
+    elif show_level > 2 and times_differ(r for _, r in nars_results):
         diff_level = 3
-        print(f'- 🕒 运行耗时：', 1)
-        # 此处直接列举
-        for nars_name, r in nars_results:
-            name = pad_display_spaces(nars_name, max_display_len)
-            print(f'{name} => {r.time_diff}', 2)
 
     # 返回 #
-    return result, diff_level
+    if diff_level < 0:
+        return '', diff_level
+    return render_diff(nars_results, diff_level, indent), diff_level
+
+
+class DiffMatrix:
+    '''矩阵化的差异引擎
+    - 🎯结果极多（如上万个测试×数十个推理器）时，仍能交互地分析差异
+    - 🚩一次性将交叉测试结果转为稠密的（测试 × 推理器）矩阵：是否有结果、是否成功、步数（编号）、运行耗时
+        - 📌步数为列表：按值编号后比较编号
+        - 📌重复测量的结果另存步数、耗时的置信区间；只运行一次的耗时区间退化为一点
+    - 🚩各测试的差异级别按行向量化计算（只比较有结果的推理器），只为存在差异的测试生成文本
+    - 📌输出与逐个测试比较（[`nars_diff_one`]）完全一致
+    - ⚠️需要NumPy
+    '''
+
+    tests: List[str]
+    '''各行对应的测试名（排序后）'''
+
+    nars_names: List[str]
+    '''各列对应的推理器名（排序后）'''
+
+    def __init__(self, results: CrossTestResultToShow) -> None:
+        self.tests = sorted({test for (_, test) in results})
+        self.nars_names = sorted({nars for (nars, _) in results})
+        test_index = {test: i for (i, test) in enumerate(self.tests)}
+        nars_index = {nars: j for (j, nars) in enumerate(self.nars_names)}
+        shape = (len(self.tests), len(self.nars_names))
+
+        # 逐个结果取出坐标与数值，再一次性写入矩阵
+        self.results: List[List[Optional[TestResult]]] = [
+            [None] * shape[1] for _ in range(shape[0])]
+        cycle_ids: Dict[Tuple[int, ...], int] = {}
+        rows, cols, success, cycles, times_low, times_high = [], [], [], [], [], []
+        stats_rows, stats_cols, cycles_low, cycles_high = [], [], [], []
+        for (nars, test), result in results.items():
+            i, j = test_index[test], nars_index[nars]
+            self.results[i][j] = result
+            rows.append(i)
+            cols.append(j)
+            success.append(bool(result.success))
+            cycles.append(cycle_ids.setdefault(
+                tuple(result.success_cycles), len(cycle_ids)))
+            low, high = time_interval(result)
+            times_low.append(low)
+            times_high.append(high)
+            cycles_stats = result.cycles_stats()
+            if cycles_stats is not None:
+                stats_rows.append(i)
+                stats_cols.append(j)
+                cycles_low.append(cycles_stats.ci_low)
+                cycles_high.append(cycles_stats.ci_high)
+
+        self.present = np.zeros(shape, dtype=bool)
+        self.success = np.zeros(shape, dtype=bool)
+        self.cycles = np.full(shape, -1, dtype=np.int64)
+        self.times_low = np.zeros(shape, dtype=float)
+        self.times_high = np.zeros(shape, dtype=float)
+        self.has_cycles_stats = np.zeros(shape, dtype=bool)
+        self.cycles_low = np.zeros(shape, dtype=float)
+        self.cycles_high = np.zeros(shape, dtype=float)
+        self.present[rows, cols] = True
+        self.success[rows, cols] = success
+        self.cycles[rows, cols] = cycles
+        self.times_low[rows, cols] = times_low
+        self.times_high[rows, cols] = times_high
+        self.has_cycles_stats[stats_rows, stats_cols] = True
+        self.cycles_low[stats_rows, stats_cols] = cycles_low
+        self.cycles_high[stats_rows, stats_cols] = cycles_high
+
+    def diff_levels(self, show_level: int) -> 'np.ndarray':
+        '''各测试的差异级别（无差异⇒-1）
+        - 🚩与[`nars_diff_one`]一致：取`show_level`以内最小的差异级别
+        - 📌空矩阵⇒空数组（不对零长度的轴做归约）
+        '''
+        present = self.present
+        levels = np.full(len(self.tests), -1, dtype=np.int64)
+        if present.size == 0:
+            return levels
+        if show_level > 2:
+            levels[np.where(present, self.times_low, -np.inf).max(axis=1)
+                   > np.where(present, self.times_high, np.inf).min(axis=1)] = 3
+        if show_level > 1:
+            # 整行均有步数统计⇒比较置信区间；否则比较步数编号
+            levels[np.where(
+                (self.has_cycles_stats | ~present).all(axis=1),
+                np.where(present, self.cycles_low, -np.inf).max(axis=1)
+                > np.where(present, self.cycles_high, np.inf).min(axis=1),
+                np.where(present, self.cycles, np.iinfo(np.int64).max).min(axis=1)
+                != np.where(present, self.cycles, -1).max(axis=1))] = 2
+        if show_level > 0:
+            levels[(present & self.success).any(axis=1)
+                   & (present & ~self.success).any(axis=1)] = 1
+        return levels
+
+    def render(self, show_level: int, indent=' '*4) -> Tuple[str, int]:
+        '''呈现所有存在差异的测试
+        * 🚩返回(差异文本, 差异最小级别)，与[`nars_diff`]一致
+        '''
+        levels = self.diff_levels(show_level)
+        differing = np.flatnonzero(levels >= 0)
+        parts: List[str] = []
+        for i in differing:
+            nars_results = [
+                (self.nars_names[j], result)
+                for (j, result) in enumerate(self.results[i])
+                if result is not None]
+            parts.append(f'- 测试 {self.tests[i]}\n'
+                         + render_diff(nars_results, int(levels[i]), indent))
+        return ''.join(parts), int(levels[differing].min()) if len(differing) else -1
 
 
 def nars_diff(results: CrossTestResultToShow, show_level: int) -> Tuple[str, int]:
     '''呈现交叉测试结果
     * 🚩返回(交叉测试总表, 差异最小级别)，不产生副作用
         - 没有明确的「差异最小级别」⇒-1
+    * 🚩安装NumPy时使用[`DiffMatrix`]，否则逐个测试比较
+    * 📌没有结果（如整组均为隔离中的测试）⇒无差异
     '''
+    if not results:
+        return '', -1
+    if np is not None:
+        return DiffMatrix(results).render(show_level)
 
     result = ''
 
@@ -148,7 +305,9 @@ def show_group_diffs(
         results: Union[GroupTestResult, GroupTestResultToShow],
         show_level: Optional[int] = None,
         alert_max_level: Optional[int] = None) -> None:
-    '''展示单个解析好了的「分组测试结果」'''
+    '''展示单个解析好了的「分组测试结果」
+    - 🚩隔离中的不稳定测试不参与差异分析与差异警告，在最后另行列出
+    '''
 
     # 未指定「对比等级」⇒靠用户输入请求
     level = show_level if show_level else request_show_level()
@@ -156,9 +315,15 @@ def show_group_diffs(
     # 逐组分析并打印测试结果
     print()
     min_diff_level = 0xffffff
+    quarantined: List[Tuple[str, str, TestResult]] = []
     for group_name, cross_result in results.items():
-        # 计算结果
-        group_result = result_to_show(cross_result)
+        # 计算结果 | 排除隔离中的测试
+        group_result = {}
+        for ((nars_name, test_name), result) in result_to_show(cross_result).items():
+            if result.quarantined:
+                quarantined.append((nars_name, test_name, result))
+            else:
+                group_result[(nars_name, test_name)] = result
         table, diff_level = nars_diff(group_result, level)
         if diff_level >= 0:
             min_diff_level = min(min_diff_level, diff_level)
@@ -169,6 +334,10 @@ def show_group_diffs(
             print(f'# 组名 {group_name} 在等级 {level} 下 无差异')
     print()
 
+    # 另行列出隔离中的测试
+    if quarantined:
+        print(show_quarantined(quarantined))
+
     # 若有最小级别且不大于「最大警告级」⇒差异警告
     if alert_max_level is not None and min_diff_level >= 0 and min_diff_level <= alert_max_level:
         diff_alert(min_diff_level, alert_max_level)
@@ -176,6 +345,18 @@ def show_group_diffs(
     print('分组测试差异分析完毕！')
 
 
+def show_quarantined(quarantined: List[Tuple[str, str, TestResult]]) -> str:
+    '''呈现隔离中的不稳定测试：是否成功、重新运行次数'''
+    lines = [f'# 隔离中的不稳定测试（{len(quarantined)}个，不参与差异分析）', '']
+    for (nars_name, test_name, result) in quarantined:
+        retry_term = (
+            f'（重新运行{result.flaky_retry_count}次）'
+            if result.flaky_retry_count > 0 else '')
+        lines.append(
+            f'- {"✅" if result.success else "❌"} {nars_name} @ {test_name}{retry_term}')
+    return '\n'.join(lines) + '\n'
+
+
 def diff_alert(
         min_diff_level: int,
         alert_max_level: int):
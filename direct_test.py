@@ -7,7 +7,7 @@ import os
 from os.path import basename, abspath
 
 from constants import CONFIG_NAL
-from run_tests import ALL_NARS_TYPES, ALL_TEST_FILES, show_test_result, main_store, main_test
+from run_tests import ALL_NARS_TYPES, ALL_TEST_FILES, load_previous_results, show_test_result, main_store, main_test
 from toolchain import *
 from util import *
 
@@ -215,8 +215,10 @@ def query_tests(queries: Iterable[str], print_feedback: bool = True, fill_when_e
     return tests
 
 
-def main_one(nars_types: Optional[List[NARSType]], tests: Optional[List[TestFile]], *, print_feedback: bool = True):
-    '''根据指定的一个/多个测试用例，运行测试并返回部分化的结果'''
+def main_one(nars_types: Optional[List[NARSType]], tests: Optional[List[TestFile]], *, print_feedback: bool = True, resume_from: Optional[str] = None):
+    '''根据指定的一个/多个测试用例，运行测试并返回部分化的结果
+    - ✨`resume_from`：从已有的结果文件（`.json`/`.jsonl`）续跑，跳过其中已有结果的测试
+    '''
     '''主函数（仅直接执行时）'''
 
     # 提前检验
@@ -237,8 +239,19 @@ def main_one(nars_types: Optional[List[NARSType]], tests: Optional[List[TestFile
             for nars_type in nars_types:
                 print(f'- 测试 @ {file.name} × {nars_type.name}')
 
+    # 加载已有结果
+    previous = None
+    if resume_from is not None:
+        try:
+            previous = load_previous_results(resume_from)
+        except (OSError, ValueError) as e:
+            print(f'读取已有测试结果 {resume_from} 失败：{e}')
+            return
+        print_feedback and print(f'已从 {resume_from} 加载 {len(previous)} 个已有测试结果')
+
     # 开始运行
-    results, total_time = main_test(nars_types=nars_types, test_files=tests)
+    results, total_time = main_test(
+        nars_types=nars_types, test_files=tests, previous=previous)
 
     # 展示结果 #
     show_test_result(
@@ -255,8 +268,14 @@ def main():
 
     # 先尝试从命令行参数中提取内容，以便自动化测试
     from sys import argv
+    # 从已有结果续跑：`--resume 【结果文件路径】`
+    resume_from = None
+    if '--resume' in argv and argv.index('--resume') + 1 < len(argv):
+        i = argv.index('--resume')
+        resume_from = argv[i + 1]
+        argv = argv[:i] + argv[i + 2:]
     tests = query_tests(argv, print_feedback=False, fill_when_empty=False)
-    main_one(ALL_NARS_TYPES, tests, print_feedback=False)
+    main_one(ALL_NARS_TYPES, tests, print_feedback=False, resume_from=resume_from)
 
     # 正常交互
     try:  # 不断执行单个测试
@@ -0,0 +1,199 @@
+'''不稳定测试（flaky）的检测与隔离
+- 🎯有些测试（如耗时接近「超时杀Java」时长的）时而成功时而失败，超时阶梯会掩盖这一点，导致每晚的测试结果来回跳变
+- 🚩检测：每个「推理器×测试」重复运行N次（见`constants.REPEAT_COUNT`与`--flaky-check N`），统计通过率
+    - 📌检测时每次运行只尝试一次（见`constants.SINGLE_ATTEMPT`）：超时阶梯上「先失败后成功」计为失败
+    - 📌既有成功、又有失败⇒不稳定
+    - 📌不稳定程度：`2 × min(通过率, 1 - 通过率)`，总是通过/总是失败为0，一半通过为1
+- 🚩持久化：写入不稳定度文件（`constants.FLAKINESS_FILE`）；每次检测覆盖所测的「推理器×测试」
+    - 📌重新检测时全部通过（或全部失败）⇒解除隔离
+- 🚩隔离：之后的运行中，不稳定的「推理器×测试」被标记为「已隔离」
+    - `retry`：失败后自动重新运行（至多`constants.QUARANTINE_RETRIES`次），任一次成功即成功
+    - `report`：照常运行一次
+    - 📌两种方式下，已隔离的结果均不参与差异分析与差异警告，另行列出
+- 📜默认不隔离：由`constants.QUARANTINE_MODE`开启
+
+文件格式：`{"version": 1, "tests": {测试名: {推理器名: {"runs": 运行次数, "passes": 通过次数, "pass_rate": 通过率, "flakiness": 不稳定程度, "updated": 检测时间}}}}`
+'''
+
+from json import dumps, loads
+from os import makedirs, path, replace
+from threading import Lock
+from time import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from toolchain import TestResult
+
+FLAKINESS_FILE_VERSION = 1
+'''不稳定度文件的格式版本'''
+
+QUARANTINE_MODES = ('retry', 'report')
+'''隔离方式'''
+
+
+class FlakinessEntry:
+    '''一个「推理器×测试」的检测结果'''
+
+    __slots__ = ('runs', 'passes', 'updated')
+
+    runs: int
+    '''运行次数'''
+
+    passes: int
+    '''通过次数'''
+
+    updated: float
+    '''检测时间（时间戳）'''
+
+    def __init__(self, runs: int, passes: int, updated: float) -> None:
+        self.runs = runs
+        self.passes = passes
+        self.updated = updated
+
+    @property
+    def pass_rate(self) -> float:
+        '''通过率'''
+        return self.passes / self.runs if self.runs else 0.0
+
+    @property
+    def flakiness(self) -> float:
+        '''不稳定程度：0（稳定）~1（一半通过）'''
+        return 2 * min(self.pass_rate, 1 - self.pass_rate)
+
+    @property
+    def flaky(self) -> bool:
+        '''是否不稳定：既有成功、又有失败'''
+        return 0 < self.passes < self.runs
+
+    def to_json(self) -> dict:
+        return {
+            'runs': self.runs,
+            'passes': self.passes,
+            'pass_rate': self.pass_rate,
+            'flakiness': self.flakiness,
+            'updated': self.updated,
+        }
+
+    @staticmethod
+    def from_json(json: dict) -> 'FlakinessEntry':
+        return FlakinessEntry(
+            int(json['runs']), int(json['passes']), float(json.get('updated', 0)))
+
+
+class FlakinessScores:
+    '''所有「推理器×测试」的不稳定度（一个文件）'''
+
+    file_path: str
+    '''不稳定度文件的路径'''
+
+    entries: Dict[Tuple[str, str], FlakinessEntry]
+    '''(推理器名, 测试名) ⇒ 检测结果'''
+
+    def __init__(self, file_path: str, entries: Optional[Dict[Tuple[str, str], FlakinessEntry]] = None) -> None:
+        self.file_path = file_path
+        self.entries = {} if entries is None else entries
+
+    @staticmethod
+    def load(file_path: str) -> 'FlakinessScores':
+        '''读取不稳定度文件
+        - 🚩文件不存在⇒空表
+        - ⚠️格式版本过高、格式错误⇒`ValueError`
+        '''
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                json = loads(f.read())
+        except FileNotFoundError:
+            return FlakinessScores(file_path)
+        version = json.get('version')
+        if not isinstance(version, int) or version > FLAKINESS_FILE_VERSION:
+            raise ValueError(f'不支持的不稳定度文件格式版本：{version!r}')
+        try:
+            entries = {
+                (nars_name, test_name): FlakinessEntry.from_json(entry)
+                for (test_name, nars_entries) in json['tests'].items()
+                for (nars_name, entry) in nars_entries.items()}
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f'不稳定度文件格式错误：{e}') from e
+        return FlakinessScores(file_path, entries)
+
+    def save(self) -> None:
+        '''写入不稳定度文件
+        - 🚩先写临时文件再替换，避免中断时留下损坏的文件
+        '''
+        tests: Dict[str, Dict[str, dict]] = {}
+        for ((nars_name, test_name), entry) in sorted(self.entries.items(), key=lambda item: (item[0][1], item[0][0])):
+            tests.setdefault(test_name, {})[nars_name] = entry.to_json()
+        directory = path.dirname(self.file_path)
+        if directory:
+            makedirs(directory, exist_ok=True)
+        temp_path = self.file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(dumps({'version': FLAKINESS_FILE_VERSION, 'tests': tests},
+                          ensure_ascii=False, indent=4))
+        replace(temp_path, self.file_path)
+
+    def update(self, results: Iterable[Tuple[str, str, TestResult]]) -> List[Tuple[str, str]]:
+        '''以重复测量的结果更新（覆盖）检测结果
+        - 🚩只取有样本（重复测量）的结果：单次运行无法判断是否稳定
+        - 📌返回更新后不稳定的「推理器×测试」
+        '''
+        now = time()
+        flaky: List[Tuple[str, str]] = []
+        for (nars_name, test_name, result) in results:
+            if result.samples is None:
+                continue
+            entry = FlakinessEntry(
+                len(result.samples),
+                sum(success for (success, _, _) in result.samples),
+                now)
+            self.entries[(nars_name, test_name)] = entry
+            if entry.flaky:
+                flaky.append((nars_name, test_name))
+        return flaky
+
+    def get(self, nars_name: str, test_name: str) -> Optional[FlakinessEntry]:
+        '''某「推理器×测试」的检测结果：未检测过⇒`None`'''
+        return self.entries.get((nars_name, test_name))
+
+    def is_flaky(self, nars_name: str, test_name: str) -> bool:
+        '''某「推理器×测试」是否不稳定（即需要隔离）'''
+        entry = self.entries.get((nars_name, test_name))
+        return entry is not None and entry.flaky
+
+    def flaky_pairs(self) -> List[Tuple[str, str]]:
+        '''所有不稳定的「推理器×测试」（按不稳定程度从高到低）'''
+        return [
+            pair for (pair, entry) in sorted(
+                self.entries.items(), key=lambda item: -item[1].flakiness)
+            if entry.flaky]
+
+
+_active_scores: Optional[FlakinessScores] = None
+_active_scores_lock = Lock()
+
+
+def active_flakiness_scores() -> Optional[FlakinessScores]:
+    '''当前用于隔离的不稳定度（首次调用时按配置读取）
+    - 🎯供`NARSType.test_attempts`使用
+    - 🚩未启用隔离⇒`None`；文件无法读取⇒提示并视作空表
+    - 📌配置改变后，可调用[`reset_flakiness_scores`]重新读取
+    '''
+    global _active_scores
+    # ⚠️需要动态导入 以避免循环导入
+    import constants
+    if constants.QUARANTINE_MODE is None:
+        return None
+    with _active_scores_lock:
+        if _active_scores is None:
+            try:
+                _active_scores = FlakinessScores.load(constants.FLAKINESS_FILE)
+            except (OSError, ValueError) as e:
+                print(f'读取不稳定度文件 {constants.FLAKINESS_FILE} 失败：{e}')
+                _active_scores = FlakinessScores(constants.FLAKINESS_FILE)
+        return _active_scores
+
+
+def reset_flakiness_scores() -> None:
+    '''丢弃当前读取的不稳定度：下次使用时重新读取'''
+    global _active_scores
+    with _active_scores_lock:
+        _active_scores = None
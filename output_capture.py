@@ -0,0 +1,259 @@
+'''有界的程序输出捕获
+- 🎯长时间运行的测试（如`VOL 100`下的稳定性测试）可能产生极长的输出，多个测试并行时可能耗尽内存
+- 🚩内存中的输出达到上限后，改为写入磁盘上的临时文件（完整保留，便于事后查看）
+    - 📌内存中只保留：开头、结尾，以及被省略部分中所有匹配「保留模式」的行（如`expect-cycle(【步数】)`）
+- 🚩读出时拼接为摘要：开头 + 省略提示（含临时文件路径） + 保留的行 + 结尾
+    - 📌开头、结尾均按行边界截取：每一行要么完整保留，要么完整省略
+    - 📌摘要上的正则提取、展示，与完整输出上的结果一致
+- 🚩临时文件的保留
+    - 📌被取代的结果（如超时阶梯中失败的尝试）⇒随即删除其临时文件，见[`remove_spill_files`]
+    - 📌其余的临时文件在测试后保留，超过一定时间后删除，见[`prune_spill_files`]
+- 📜未设置上限时，行为与直接拼接全部输出一致
+'''
+
+import os
+import re
+import tempfile
+from threading import Lock
+from time import time
+from typing import BinaryIO, Iterable, List, Optional, Pattern, Tuple, Union
+
+SPILL_FILE_PREFIX = 'babelnar-output-'
+'''临时文件名的前缀'''
+
+SPILL_FILE_SUFFIX = '.log'
+'''临时文件名的后缀'''
+
+SPILL_NOTICE_PATTERN = re.compile(rb'full output: (.+?) \.\.\.\]')
+'''省略提示中的临时文件路径
+- 📌提示仅含ASCII字符：可直接在未解码的原始字节中查找
+'''
+
+
+class OutputCapture:
+    '''一个输出流（标准输出/标准错误）的捕获
+    - 📌可在多个线程中同时写入
+    '''
+
+    limit: Optional[int]
+    '''内存中保存的最大字节数，`None`表示不限'''
+
+    head_size: int
+    '''溢出后保留的开头字节数（上限）
+    - 📌不超过`limit`的一半
+    '''
+
+    tail_size: int
+    '''溢出后保留的结尾字节数（上限）
+    - 📌不超过`limit`的一半
+    '''
+
+    keep: Optional[Pattern[bytes]]
+    '''保留模式：溢出后，被省略部分中匹配此模式的行仍然保留'''
+
+    spill_dir: Optional[str]
+    '''临时文件所在目录，`None`表示系统临时目录'''
+
+    size: int
+    '''已写入的总字节数'''
+
+    spill_path: Optional[str]
+    '''溢出后完整输出所在的临时文件路径，未溢出为`None`'''
+
+    def __init__(self,
+                 limit: Optional[int] = None,
+                 *,
+                 head_size: int = 1 << 16,
+                 tail_size: int = 1 << 16,
+                 keep: Optional[Pattern[bytes]] = None,
+                 spill_dir: Optional[str] = None) -> None:
+        self.limit = limit
+        self.head_size = head_size if limit is None else min(head_size, limit // 2)
+        self.tail_size = tail_size if limit is None else min(tail_size, limit // 2)
+        self.keep = keep
+        self.spill_dir = spill_dir
+        self.size = 0
+        self.spill_path = None
+        self._chunks: List[bytes] = []
+        self._file: Optional[BinaryIO] = None
+        self._head = b''
+        self._tail = bytearray()
+        self._kept: List[Tuple[int, bytes]] = []
+        self._line = bytearray()
+        self._line_start = 0
+        self._lock = Lock()
+
+    @property
+    def spilled(self) -> bool:
+        '''是否已溢出到临时文件'''
+        return self.spill_path is not None
+
+    def write(self, data: bytes) -> None:
+        '''写入一段输出'''
+        if not data:
+            return
+        with self._lock:
+            if self.spill_path is None:
+                self._chunks.append(data)
+                self.size += len(data)
+                if self.limit is not None and self.size > self.limit:
+                    self._spill()
+                return
+            if self._file is not None:
+                self._file.write(data)
+            self._track(data)
+
+    def read_from(self, stream: BinaryIO, chunk_size: int = 1 << 16) -> None:
+        '''读完整个流（直到EOF），然后关闭它'''
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            self.write(chunk)
+        stream.close()
+
+    def _spill(self) -> None:
+        '''溢出：将已有内容写入临时文件，此后只在内存中保留开头、结尾与保留的行'''
+        data = b''.join(self._chunks)
+        self._chunks = []
+        if self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        fd, self.spill_path = tempfile.mkstemp(
+            prefix=SPILL_FILE_PREFIX, suffix=SPILL_FILE_SUFFIX, dir=self.spill_dir)
+        self._file = os.fdopen(fd, 'wb')
+        self._file.write(data)
+        self._head = data[:self.head_size]
+        self.size = 0
+        self._track(data)
+
+    def _track(self, data: bytes) -> None:
+        '''溢出后：更新结尾，并逐行查找需保留的行'''
+        # 结尾
+        self._tail += data
+        if len(self._tail) > self.tail_size:
+            del self._tail[:len(self._tail) - self.tail_size]
+        # 逐行匹配保留模式 | 单行过长时只匹配其前`limit`字节
+        start = 0
+        while True:
+            i = data.find(b'\n', start)
+            if i < 0:
+                break
+            line = bytes(self._line) + data[start:i + 1]
+            if self.keep is not None and self.keep.search(line):
+                self._kept.append((self._line_start, line))
+            self._line = bytearray()
+            self._line_start = self.size + i + 1
+            start = i + 1
+        if self.limit is None or len(self._line) < self.limit:
+            self._line += data[start:]
+        self.size += len(data)
+
+    def getvalue(self) -> bytes:
+        '''读出捕获的输出
+        - 🚩未溢出⇒完整输出
+        - 🚩已溢出⇒摘要：开头 + 省略提示 + 被省略部分中保留的行 + 结尾
+        '''
+        with self._lock:
+            if self.spill_path is None:
+                return b''.join(self._chunks)
+            if self._file is not None:
+                self._file.flush()
+
+            # 开头：截到最后一个完整行
+            head = self._head
+            if b'\n' in head:
+                head = head[:head.rindex(b'\n') + 1]
+            head_end = len(head)
+
+            # 结尾：从第一个完整行开始，且不与开头重叠
+            tail = bytes(self._tail)
+            tail_start = self.size - len(tail)
+            if tail_start > 0 and b'\n' in tail:
+                cut = tail.index(b'\n') + 1
+                tail, tail_start = tail[cut:], tail_start + cut
+            if tail_start < head_end:
+                tail, tail_start = tail[head_end - tail_start:], head_end
+
+            # 被省略部分中保留的行
+            kept = [
+                line for (start, line) in self._kept
+                if start >= head_end and start + len(line) <= tail_start]
+            omitted = tail_start - head_end - sum(map(len, kept))
+
+        # * 📌提示仅用ASCII字符：无论输出是何种编码，都不影响解码
+        notice = (
+            ('' if head.endswith(b'\n') or not head else '\n') +
+            f'[... {omitted} bytes omitted, {len(kept)} matching lines kept;'
+            f' full output: {self.spill_path} ...]\n').encode('ascii', 'replace')
+        return head + notice + b''.join(kept) + tail
+
+    def finish(self) -> bytes:
+        '''结束捕获：关闭临时文件（保留在磁盘上），并读出输出'''
+        value = self.getvalue()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        return value
+
+    def discard(self) -> None:
+        '''丢弃捕获的输出：关闭并删除临时文件'''
+        with self._lock:
+            self._chunks = []
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.spill_path is not None:
+                try:
+                    os.remove(self.spill_path)
+                except OSError:
+                    pass
+
+
+def spill_paths_in(output: Union[bytes, str, None]) -> List[str]:
+    '''从输出摘要中找出临时文件的路径
+    - 🚩原始字节⇒直接查找，无需解码
+    - 📌已解码的文本⇒按ASCII编码后查找（提示本身只含ASCII字符）
+    '''
+    if not output:
+        return []
+    if isinstance(output, str):
+        output = output.encode('ascii', 'replace')
+    return [
+        spill_path.decode('ascii')
+        for spill_path in SPILL_NOTICE_PATTERN.findall(output)]
+
+
+def remove_spill_files(paths: Iterable[str]) -> None:
+    '''删除临时文件（不存在⇒忽略）'''
+    for spill_path in paths:
+        try:
+            os.remove(spill_path)
+        except OSError:
+            pass
+
+
+def prune_spill_files(spill_dir: str, max_age: Optional[float]) -> int:
+    '''删除目录中超过最长保存时间的临时文件
+    - 🚩只删除以[`SPILL_FILE_PREFIX`]开头、[`SPILL_FILE_SUFFIX`]结尾的文件
+    - 📌`max_age`为`None`⇒不删除；目录不存在⇒不删除
+
+    Returns:
+        int: 删除的文件数
+    '''
+    if max_age is None:
+        return 0
+    try:
+        entries = os.listdir(spill_dir)
+    except OSError:
+        return 0
+    deadline = time() - max_age
+    n_removed = 0
+    for entry in entries:
+        if not (entry.startswith(SPILL_FILE_PREFIX) and entry.endswith(SPILL_FILE_SUFFIX)):
+            continue
+        file_path = os.path.join(spill_dir, entry)
+        try:
+            if os.path.getmtime(file_path) < deadline:
+                os.remove(file_path)
+                n_removed += 1
+        except OSError:
+            pass
+    return n_removed
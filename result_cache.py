@@ -0,0 +1,284 @@
+'''测试结果缓存
+- 🎯每晚的测试中，多数测试的`.nal`文件、配置文件与推理器`.jar`自上次运行以来均未改变，无需重新运行
+- 🚩以「测试的全部输入」的哈希为键，缓存成功的测试结果
+    - 📌键的组成：BabelNAR CLI命令、启动配置、预加载配置、测试配置、`.nal`文件，以及启动配置引用的`.jar`文件内容
+    - 📌任一输入改变⇒键随之改变，旧条目不再命中，最终被淘汰
+- 🚩只缓存「成功」的结果：失败多为超时或环境不稳定，应当重新运行
+- 🚩每个条目一个JSON文件：`【缓存目录】/【键】.json`，程序输出按`constants.OUTPUT_BLOB_STORAGE`存为压缩块
+    - 📌压缩块存于缓存自己的存储`【缓存目录】/blobs/`，与测试结果的压缩块分开
+- 🚩淘汰：超过最长保存时间的条目不再命中；条目过多时删去最旧的
+    - 📌淘汰后，删去不再被任何条目引用的压缩块
+- 📜默认不启用：由`constants.RESULT_CACHE_ENABLED`开启
+'''
+
+import hashlib
+import re
+from glob import glob
+from json import dumps, loads
+from os import getpid, makedirs, path, remove, replace
+from threading import Lock, get_ident
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+from blob_store import BLOB_KEY, BlobStore, is_blob_ref
+from toolchain import NARSType, TestFile, TestResult, build_cli_launch_cmd, nal_file_of_config
+
+FileDigestCache = Dict[str, Tuple[float, int, str]]
+'''文件路径 ⇒ (修改时间, 大小, 内容哈希)'''
+
+
+class ResultCache:
+    '''测试结果缓存（一个目录）
+    - 📌可在多个线程中同时使用
+    '''
+
+    root: str
+    '''缓存目录'''
+
+    max_entries: Optional[int]
+    '''最多保留的条目数，`None`表示不限'''
+
+    max_age: Optional[float]
+    '''条目的最长保存时间（秒），`None`表示不限'''
+
+    bypass: bool
+    '''是否跳过读取：仍然运行测试，并以新结果刷新缓存'''
+
+    blobs: Optional[BlobStore]
+    '''存放程序输出的压缩块存储，`None`表示原样内嵌
+    - ⚠️淘汰时会删去其中未被条目引用的压缩块：须为缓存专用的存储
+    '''
+
+    def __init__(self, root: str, *,
+                 max_entries: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 bypass: bool = False,
+                 blobs: Optional[BlobStore] = None) -> None:
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.bypass = bypass
+        self.blobs = blobs
+        self._digests: FileDigestCache = {}
+        self._lock = Lock()
+
+    def _file_digest(self, file_path: str) -> str:
+        '''文件内容的哈希
+        - 🚩按（修改时间, 大小）记忆：`.jar`文件较大，不必每个测试都重新读取
+        - 📌文件不存在⇒固定的占位值
+        '''
+        try:
+            stat = path.getmtime(file_path), path.getsize(file_path)
+        except OSError:
+            return 'missing'
+        with self._lock:
+            known = self._digests.get(file_path)
+        if known is not None and known[:2] == stat:
+            return known[2]
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._digests[file_path] = (stat[0], stat[1], digest.hexdigest())
+        return digest.hexdigest()
+
+    def key_of(self, nars_type: NARSType, test_file: TestFile) -> str:
+        '''计算测试的缓存键：全部输入的哈希'''
+        # ⚠️需要动态导入 以避免循环导入
+        from constants import CONFIG_NAL, CONFIG_NAL_PRELUDE
+        test_config_path = CONFIG_NAL + f'{test_file.nal_index}.hjson'
+        nal_file_path = nal_file_of_config(test_config_path)
+        parts = [
+            'cli', ' '.join(build_cli_launch_cmd()),
+            'launch', self._file_digest(nars_type.launch_config_path),
+            'prelude', self._file_digest(CONFIG_NAL_PRELUDE),
+            'test', self._file_digest(test_config_path),
+            'nal', self._file_digest(nal_file_path) if nal_file_path is not None else 'missing',
+        ]
+        for jar_path in jar_files_of_config(nars_type.launch_config_path):
+            parts += ['jar', self._file_digest(jar_path)]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def path_of(self, key: str) -> str:
+        '''条目的文件路径'''
+        return path.join(self.root, key + '.json')
+
+    def get(self, key: str) -> Optional[TestResult]:
+        '''读取缓存的结果
+        - 🚩跳过读取、未命中、已过期、无法读取⇒`None`
+        - 🚩命中⇒结果标记为「取自缓存」
+        '''
+        if self.bypass:
+            return None
+        file_path = self.path_of(key)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                entry = loads(f.read())
+            if self.max_age is not None and time() - entry['time'] > self.max_age:
+                remove(file_path)
+                return None
+            result = TestResult.from_json(entry['result'], self.blobs)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f'读取缓存的测试结果 {file_path} 失败：{e}')
+            return None
+        result.cached = True
+        return result
+
+    def put(self, key: str, nars_type: NARSType, test_file: TestFile, result: TestResult) -> bool:
+        '''写入测试结果
+        - 🚩只写入实际运行且成功的结果
+        - 🚩先写临时文件再替换，避免并行写入或中断时留下损坏的条目
+        - 📌返回是否写入
+        '''
+        if not result.success or result.cached:
+            return False
+        entry = {
+            'time': time(),
+            'nars': nars_type.name,
+            'test': test_file.name,
+            'result': result.to_json(self.blobs),
+        }
+        file_path = self.path_of(key)
+        makedirs(self.root, exist_ok=True)
+        temp_path = f'{file_path}.{getpid()}.{get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(dumps(entry, ensure_ascii=False))
+        replace(temp_path, file_path)
+        return True
+
+    def evict(self) -> int:
+        '''淘汰条目：先删去过期的，再在条目过多时删去最旧的
+        - 📌以文件修改时间（即写入时间）判断新旧
+        - 🚩随后删去不再被引用的压缩块，见[`collect_blobs`]
+        - 📌返回删去的条目数
+        '''
+        started = time()
+        entries: List[Tuple[float, str]] = []
+        for file_path in glob(path.join(self.root, '*.json')):
+            try:
+                entries.append((path.getmtime(file_path), file_path))
+            except OSError:
+                pass
+        entries.sort()
+        now = time()
+        doomed = [
+            file_path for (mtime, file_path) in entries
+            if self.max_age is not None and now - mtime > self.max_age]
+        alive = len(entries) - len(doomed)
+        if self.max_entries is not None and alive > self.max_entries:
+            fresh = entries[len(doomed):]  # 已按时间排序：过期的均在最前
+            doomed += [file_path for (_, file_path) in fresh[:alive - self.max_entries]]
+        n_removed = 0
+        for file_path in doomed:
+            try:
+                remove(file_path)
+                n_removed += 1
+            except OSError:
+                pass
+        self.collect_blobs(started)
+        return n_removed
+
+    def collect_blobs(self, started: Optional[float] = None) -> int:
+        '''删去不再被任何条目引用的压缩块
+        - 🚩引用：所有条目中程序输出字段的压缩块引用
+        - 📌`started`：只删去此时刻之前写入的压缩块，避免误删同时写入中的条目所用的块
+        - 📌无压缩块存储⇒不做任何事；返回删去的压缩块数
+        '''
+        if self.blobs is None:
+            return 0
+        if started is None:
+            started = time()
+        referenced = set()
+        for file_path in glob(path.join(self.root, '*.json')):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    result = loads(f.read())['result']
+            except (OSError, ValueError, KeyError, TypeError):
+                continue  # 损坏的条目不会命中，其压缩块亦无需保留
+            for key in TestResult.OUTPUT_FIELDS:
+                if is_blob_ref(result.get(key)):
+                    referenced.add(result[key][BLOB_KEY])
+        n_removed = 0
+        for digest in self.blobs.digests():
+            if digest in referenced:
+                continue
+            try:
+                if path.getmtime(self.blobs.path_of(digest)) >= started:
+                    continue
+            except OSError:
+                continue
+            n_removed += self.blobs.remove(digest)
+        return n_removed
+
+    @staticmethod
+    def default() -> Optional['ResultCache']:
+        '''按`constants`中的配置构造结果缓存：未启用⇒`None`'''
+        # ⚠️需要动态导入 以避免循环导入
+        import constants
+        if not constants.RESULT_CACHE_ENABLED:
+            return None
+        return ResultCache(
+            constants.RESULT_CACHE_ROOT,
+            max_entries=constants.RESULT_CACHE_MAX_ENTRIES,
+            max_age=constants.RESULT_CACHE_MAX_AGE,
+            bypass=constants.RESULT_CACHE_BYPASS,
+            blobs=(BlobStore(path.join(constants.RESULT_CACHE_ROOT, 'blobs'))
+                   if constants.OUTPUT_BLOB_STORAGE else None))
+
+
+JAR_PATTERN = re.compile(r'''["']?([^\s"',\[\]]+\.jar)["']?''')
+'''启动配置中引用`.jar`文件的模式'''
+
+CURRENT_DIR_PATTERN = re.compile(r'^\s*currentDir\s*:\s*(.+?)\s*$', re.MULTILINE)
+'''启动配置中「工作目录」的模式'''
+
+
+def jar_files_of_config(launch_config_path: str) -> List[str]:
+    '''从启动配置中找出其引用的`.jar`文件路径
+    - 🚩按`currentDir`（相对配置文件自身）解析相对路径
+    - ⚠️读取失败⇒空列表
+    '''
+    try:
+        with open(launch_config_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return []
+    config_dir = path.dirname(launch_config_path)
+    match = CURRENT_DIR_PATTERN.search(content)
+    if match is not None:
+        config_dir = path.join(config_dir, match.group(1).strip('"\''))
+    # 去掉注释行，避免匹配到注释中提及的`.jar`
+    lines = [
+        line for line in content.splitlines()
+        if not line.lstrip().startswith(('//', '#'))]
+    return [
+        path.normpath(path.join(config_dir, jar_path))
+        for jar_path in JAR_PATTERN.findall('\n'.join(lines))]
+
+
+_active_cache: Optional[ResultCache] = None
+_active_cache_lock = Lock()
+
+
+def active_result_cache() -> Optional[ResultCache]:
+    '''当前启用的结果缓存（首次调用时按配置构造，并淘汰一次）
+    - 🎯供`NARSType.test_nal`与`async_runner.test_nal_async`使用
+    - 📌配置改变后，可调用[`reset_result_cache`]重新构造
+    '''
+    global _active_cache
+    with _active_cache_lock:
+        if _active_cache is None:
+            _active_cache = ResultCache.default()
+            if _active_cache is not None:
+                _active_cache.evict()
+        return _active_cache
+
+
+def reset_result_cache() -> None:
+    '''丢弃当前的结果缓存：下次使用时按配置重新构造'''
+    global _active_cache
+    with _active_cache_lock:
+        _active_cache = None
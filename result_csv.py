@@ -0,0 +1,108 @@
+'''测试结果的流式CSV导出
+- 🎯逐行写入文件，而非拼接出完整字符串后再一次性保存
+    - 📌内存占用与测试数目无关；可在测试运行期间边测边写
+- 🚩使用`csv`标准库：名称中含逗号、引号、换行时正确转义
+- 🚩编码与BOM：遵循`constants.RESULT_SAVING_ENCODING`与`constants.CSV_BOM`
+'''
+
+import csv
+from threading import Lock
+from typing import IO, Optional, Union
+
+from toolchain import NARSType, TestFile, TestResult
+
+CSV_HEADER = [
+    '序号',
+    '测试组',
+    '推理器类型',
+    '推理测试名称',
+    '是否成功',
+    '步数',
+    '运行耗时(秒)',
+]
+'''CSV表头'''
+
+
+class CsvResultWriter:
+    '''流式CSV写入器
+    - 🚩创建时写入表头，之后每个测试写入一行，序号自增
+    - 📌可在多个线程中同时写入
+    '''
+
+    line_num: int
+    '''已写入的测试行数（即最后一行的序号）'''
+
+    def __init__(self, file: IO[str], *, flush_each_row: bool = False) -> None:
+        '''在已打开的文本流上写入
+        - ⚠️文本流需以`newline=''`打开（`csv`标准库的要求）
+        '''
+        self._file = file
+        self._writer = csv.writer(file, lineterminator='\n')
+        self._lock = Lock()
+        self._flush_each_row = flush_each_row
+        self.line_num = 0
+        self._writer.writerow(CSV_HEADER)
+
+    @staticmethod
+    def open(file_path: str, *, encoding: Optional[str] = None, bom: Optional[bytes] = None, flush_each_row: bool = True) -> 'CsvResultWriter':
+        '''新建CSV文件并写入
+        - 🚩编码、BOM未指定⇒使用`constants`中的配置
+        - 📌默认每行写入后立即刷新：中途中断时，已完成的测试行不会丢失
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        import constants
+        if encoding is None:
+            encoding = constants.RESULT_SAVING_ENCODING
+        if bom is None:
+            bom = constants.CSV_BOM
+        # 启用BOM⇒先写入BOM字节，再以文本方式续写
+        if bom is not None:
+            with open(file_path, 'wb') as f:
+                f.write(bom)
+        file = open(file_path, 'a' if bom is not None else 'w',
+                    encoding=encoding, newline='')
+        return CsvResultWriter(file, flush_each_row=flush_each_row)
+
+    def append(self, group_name: str, nars: Union[NARSType, str], test: Union[TestFile, str], result: TestResult) -> None:
+        '''写入一个测试的结果
+        - 📌与`ResultLog.append`签名一致，可用作「测试完成」回调
+        '''
+        # 成功与否
+        success = '是' if result.success else '否'
+        # 成功步数/失败（不显示）
+        steps = (
+            '，'.join(map(str, result.success_cycles))
+            if result.success_cycles
+            else '')
+        with self._lock:
+            self.line_num += 1
+            self._writer.writerow([
+                self.line_num,
+                group_name,
+                nars if isinstance(nars, str) else nars.name,
+                test if isinstance(test, str) else test.name,
+                success,
+                steps,
+                result.time_diff,
+            ])
+            if self._flush_each_row:
+                self._file.flush()
+
+    def write_group_results(self, group_results: dict) -> None:
+        '''写入全部分组测试结果
+        - 📌接受「分组测试结果」与其「展示格式」
+        '''
+        for (group_name, cross_result) in group_results.items():
+            for ((nars, test), result) in cross_result.items():
+                self.append(group_name, nars, test, result)
+
+    def close(self) -> None:
+        '''关闭文件'''
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'CsvResultWriter':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -0,0 +1,555 @@
+'''跨运行的测试结果历史分析
+- 🎯`diff_analyze`只比较同一次运行中的不同推理器；此处纵向比较同一「推理器×测试」在历次运行中的表现
+    - 📄如「OpenNARS 3.1.2 @ NAL-5.12 的步数在最近一个月中从40涨到400」
+- 🚩将所有已保存的分组测试结果汇入（运行 × 推理器×测试）的矩阵：是否有结果、是否成功、步数、运行耗时
+- 🚩在矩阵上逐列（每个「推理器×测试」为一列）计算
+    - 回归：最近一次运行相对此前若干次运行的基线（转为失败、步数或耗时成倍增长）
+    - 突变点：使前后两段均值差异最显著的分割位置（步数、耗时取对数）
+    - 趋势：对数步数、对数耗时关于运行序号的最小二乘斜率
+- 📌NumPy为可选依赖：安装时整列向量化计算，可扩展到数千次运行；未安装时退回纯Python实现，结果相同
+- 📌数据来源：结果目录中的`.test.json`文件，或SQLite测试结果库（`result_store.py`）
+
+用法：`python result_history.py [--root test_results/ | --store 【数据库】] [--last 100] [--nars 前缀] [--test 前缀] [--json]`
+'''
+
+import math
+import warnings
+from json import dumps
+from os import path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from result_loader import load_group_results
+from result_store import ResultStore, ResultSummary, run_time_of_name
+from timeout_policy import latest_result_files
+from util import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+SIGMA_FLOOR = 0.05
+'''突变点检测中，段内标准差（对数尺度）的下限
+- 🎯避免「完全相同的样本」导致标准差为0、差异显著性无穷大
+- 📌约等于5%的相对波动
+'''
+
+METRIC_NAMES = {
+    'success': '是否成功',
+    'cycles': '步数',
+    'time': '运行耗时(秒)',
+}
+'''指标 ⇒ 展示名称'''
+
+FINDING_KINDS = ('regression', 'change_point', 'trend')
+'''发现的种类（按展示顺序）'''
+
+
+class HistoryFinding:
+    '''历史分析中的一条发现'''
+
+    kind: str
+    '''种类：`regression`（回归）、`change_point`（突变点）、`trend`（趋势）'''
+
+    metric: str
+    '''指标：`success`、`cycles`、`time`'''
+
+    nars_name: str
+    '''推理器名'''
+
+    test_name: str
+    '''测试名'''
+
+    run_name: str
+    '''相关的运行
+    - 回归：最近一次运行
+    - 突变点：变化后的第一次运行
+    - 趋势：最近一次运行
+    '''
+
+    before: float
+    '''变化前的值（回归：基线；突变点：前段均值；趋势：拟合的起点）
+    - 📌指标为`success`时为基线的通过率
+    '''
+
+    after: float
+    '''变化后的值（回归：最近一次运行；突变点：后段均值；趋势：拟合的终点）'''
+
+    score: float
+    '''显著程度：同种发现中按此从大到小排列'''
+
+    def __init__(self, kind: str, metric: str, nars_name: str, test_name: str,
+                 run_name: str, before: float, after: float, score: float) -> None:
+        self.kind = kind
+        self.metric = metric
+        self.nars_name = nars_name
+        self.test_name = test_name
+        self.run_name = run_name
+        self.before = before
+        self.after = after
+        self.score = score
+
+    def __str__(self) -> str:
+        '''使用简体中文描述此发现'''
+        cell = f'{self.nars_name} @ {self.test_name}'
+        if self.kind == 'regression' and self.metric == 'success':
+            return f'❌ 回归 {cell}：{self.run_name} 中失败（此前的通过率为{self.before:.0%}）'
+        metric = METRIC_NAMES[self.metric]
+        change = f'{self.before:.4g} → {self.after:.4g}（×{self.after / self.before:.2f}）' \
+            if self.before > 0 else f'{self.before:.4g} → {self.after:.4g}'
+        if self.kind == 'regression':
+            return f'⚠️ 回归 {cell}：{metric} {change}，于 {self.run_name}'
+        arrow = '📈' if self.after > self.before else '📉'
+        if self.kind == 'change_point':
+            return f'{arrow} 突变 {cell}：{metric}自 {self.run_name} 起 {change}'
+        return f'{arrow} 趋势 {cell}：{metric} {change}，截至 {self.run_name}'
+
+    def to_json(self) -> dict:
+        '''转换为JSON对象'''
+        return {
+            'kind': self.kind,
+            'metric': self.metric,
+            'nars': self.nars_name,
+            'test': self.test_name,
+            'run': self.run_name,
+            'before': self.before,
+            'after': self.after,
+            'score': self.score,
+        }
+
+
+class ResultHistory:
+    '''测试结果历史：（运行 × 推理器×测试）的结果矩阵
+    - 🚩按运行时间排列各次运行；每个「推理器×测试」为一列
+    - 🚩步数取「成功步数」中的最大值（即达成全部预期所需的步数），失败或无步数⇒缺失
+    '''
+
+    run_names: List[str]
+    '''各次运行的名称（按时间从早到晚）'''
+
+    run_times: List[float]
+    '''各次运行的时间'''
+
+    cells: List[Tuple[str, str]]
+    '''各列对应的(推理器名, 测试名)'''
+
+    def __init__(self, summaries: Iterable[ResultSummary]) -> None:
+        '''从结果概要中构造
+        - 📌同一次运行中重复的「推理器×测试」以后出现者为准
+        '''
+        summaries = list(summaries)
+        runs: Dict[str, float] = {}
+        cells: Dict[Tuple[str, str], int] = {}
+        for (run_name, run_time, nars_name, test_name, *_) in summaries:
+            runs.setdefault(run_name, run_time)
+            cells.setdefault((nars_name, test_name), len(cells))
+        ordered_runs = sorted(runs.items(), key=lambda item: (item[1], item[0]))
+        run_index = {run_name: i for (i, (run_name, _)) in enumerate(ordered_runs)}
+        self.run_names = [run_name for (run_name, _) in ordered_runs]
+        self.run_times = [run_time for (_, run_time) in ordered_runs]
+        self.cells = list(cells)
+
+        # 按列存储各条结果（矩阵在分析时再构造）
+        self._run_idx = [run_index[summary[0]] for summary in summaries]
+        self._cell_idx = [cells[(summary[2], summary[3])] for summary in summaries]
+        self._success = [summary[4] for summary in summaries]
+        self._cycles = [
+            float(max(summary[5])) if summary[4] and summary[5] else math.nan
+            for summary in summaries]
+        self._time = [float(summary[6]) for summary in summaries]
+
+    @property
+    def n_runs(self) -> int:
+        '''运行数'''
+        return len(self.run_names)
+
+    @staticmethod
+    def from_result_files(file_paths: List[str]) -> 'ResultHistory':
+        '''从保存的分组测试结果（JSON）中构造
+        - 🚩运行名取文件名（去掉`.json`），运行时间从文件名中解析，失败则取文件修改时间
+        - 📌程序输出不会被读取（惰性加载）；无法读取的文件会被跳过
+        '''
+        summaries: List[ResultSummary] = []
+        for file_path in file_paths:
+            run_name = path.basename(file_path)
+            if run_name.endswith('.json'):
+                run_name = run_name[:-len('.json')]
+            try:
+                group_results = load_group_results(file_path)
+                run_time = run_time_of_name(run_name) or path.getmtime(file_path)
+            except (OSError, ValueError) as e:
+                print(f'读取历史测试结果 {file_path} 失败：{e}')
+                continue
+            for cross_result in group_results.values():
+                for ((nars_name, test_name), result) in cross_result.items():
+                    summaries.append((
+                        run_name, run_time, nars_name, test_name,
+                        bool(result.success), list(result.success_cycles),
+                        float(result.time_diff)))
+        return ResultHistory(summaries)
+
+    @staticmethod
+    def from_result_root(file_root: str, max_runs: Optional[int] = None) -> 'ResultHistory':
+        '''从结果目录中最近的若干次运行构造'''
+        return ResultHistory.from_result_files(latest_result_files(file_root, max_runs))
+
+    @staticmethod
+    def from_store(db_path: str, max_runs: Optional[int] = None) -> 'ResultHistory':
+        '''从SQLite测试结果库中构造'''
+        with ResultStore(db_path) as store:
+            return ResultHistory(store.summaries(last_runs=max_runs))
+
+    def filtered(self, *, nars: Optional[str] = None, test: Optional[str] = None) -> 'ResultHistory':
+        '''只保留推理器名、测试名以指定前缀开头的列'''
+        keep = [
+            (nars is None or nars_name.startswith(nars))
+            and (test is None or test_name.startswith(test))
+            for (nars_name, test_name) in self.cells]
+        return ResultHistory(
+            (self.run_names[r], self.run_times[r], *self.cells[c],
+             self._success[i], [] if math.isnan(self._cycles[i]) else [int(self._cycles[i])],
+             self._time[i])
+            for (i, (r, c)) in enumerate(zip(self._run_idx, self._cell_idx))
+            if keep[c])
+
+    def analyze(
+        self,
+        *,
+        window: int = 10,
+        min_baseline: int = 3,
+        min_pass_rate: float = 0.8,
+        regression_ratio: float = 2.0,
+        min_time_delta: float = 0.5,
+        change_ratio: float = 1.5,
+        change_score: float = 3.0,
+        min_segment: int = 3,
+        trend_ratio: float = 2.0,
+        trend_min_samples: int = 5,
+    ) -> List[HistoryFinding]:
+        '''分析所有列，返回发现（按种类、显著程度排列）
+
+        Args:
+            window: 回归分析中，基线所取的最近一次运行之前的运行数
+            min_baseline: 判定回归所需的最少基线样本数
+            min_pass_rate: 「转为失败」的回归要求基线通过率至少为此
+            regression_ratio: 步数、耗时的回归要求最近一次运行至少为基线（中位数）的此倍数
+            min_time_delta: 耗时的回归另要求至少增长此秒数（短测试的耗时噪声较大）
+            change_ratio: 突变点要求前后两段（几何）均值之比至少为此
+            change_score: 突变点要求前后两段差异的显著性（以段内标准差计）至少为此
+            min_segment: 突变点前后两段各自的最少样本数
+            trend_ratio: 趋势要求拟合的起点、终点之比至少为此
+            trend_min_samples: 计算趋势所需的最少样本数
+        '''
+        if np is not None:
+            findings = self._analyze_numpy(
+                window, min_baseline, min_pass_rate, regression_ratio, min_time_delta,
+                change_ratio, change_score, min_segment, trend_ratio, trend_min_samples)
+        else:
+            findings = self._analyze_python(
+                window, min_baseline, min_pass_rate, regression_ratio, min_time_delta,
+                change_ratio, change_score, min_segment, trend_ratio, trend_min_samples)
+        findings.sort(key=lambda finding: (
+            FINDING_KINDS.index(finding.kind), -finding.score))
+        return findings
+
+    # * === NumPy实现 === * #
+
+    def matrices(self) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+        '''构造（运行 × 列）矩阵：是否有结果、是否成功、步数（缺失为NaN）、运行耗时（缺失为NaN）
+        - ⚠️需要NumPy
+        '''
+        shape = (self.n_runs, len(self.cells))
+        rows = np.asarray(self._run_idx, dtype=np.intp)
+        cols = np.asarray(self._cell_idx, dtype=np.intp)
+        present = np.zeros(shape, dtype=bool)
+        success = np.zeros(shape, dtype=bool)
+        cycles = np.full(shape, np.nan)
+        times = np.full(shape, np.nan)
+        present[rows, cols] = True
+        success[rows, cols] = np.asarray(self._success, dtype=bool)
+        cycles[rows, cols] = np.asarray(self._cycles, dtype=float)
+        times[rows, cols] = np.asarray(self._time, dtype=float)
+        return present, success, cycles, times
+
+    def _analyze_numpy(self, window, min_baseline, min_pass_rate, regression_ratio, min_time_delta,
+                       change_ratio, change_score, min_segment, trend_ratio, trend_min_samples) -> List[HistoryFinding]:
+        '''NumPy实现：各分析均对所有列同时计算'''
+        findings: List[HistoryFinding] = []
+        if self.n_runs == 0 or not self.cells:
+            return findings
+        present, success, cycles, times = self.matrices()
+        n_runs, n_cells = present.shape
+        cols = np.arange(n_cells)
+        runs = np.arange(n_runs)[:, None]
+        # 成功运行的耗时：失败多为超时被杀，其耗时不反映实际所需时间
+        success_times = np.where(success, times, np.nan)
+
+        # 回归：最近一次有结果的运行 vs 其之前`window`次运行
+        last = n_runs - 1 - np.argmax(present[::-1], axis=0)
+        base = present & (runs < last) & (runs >= last - window)
+        n_base = base.sum(axis=0)
+        pass_rate = (success & base).sum(axis=0) / np.maximum(n_base, 1)
+        last_success = success[last, cols]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # 全为NaN的列
+            base_cycles = np.nanmedian(np.where(base, cycles, np.nan), axis=0)
+            base_times = np.nanmedian(np.where(base, success_times, np.nan), axis=0)
+        n_base_success = (base & success).sum(axis=0)
+        last_cycles = cycles[last, cols]
+        last_times = success_times[last, cols]
+        with np.errstate(invalid='ignore'):
+            failed = ~last_success & (n_base >= min_baseline) & (pass_rate >= min_pass_rate)
+            more_cycles = last_success & (n_base_success >= min_baseline) & (
+                last_cycles >= base_cycles * regression_ratio)
+            more_time = last_success & (n_base_success >= min_baseline) & (
+                last_times >= base_times * regression_ratio) & (
+                last_times - base_times >= min_time_delta)
+        for c in np.flatnonzero(failed):
+            findings.append(self._finding(
+                'regression', 'success', c, last[c], pass_rate[c], 0.0, pass_rate[c]))
+        for c in np.flatnonzero(more_cycles):
+            findings.append(self._finding(
+                'regression', 'cycles', c, last[c], base_cycles[c], last_cycles[c],
+                last_cycles[c] / base_cycles[c]))
+        for c in np.flatnonzero(more_time):
+            findings.append(self._finding(
+                'regression', 'time', c, last[c], base_times[c], last_times[c],
+                last_times[c] / base_times[c]))
+
+        # 突变点、趋势：对数步数、对数耗时
+        for (metric, values) in (('cycles', cycles), ('time', success_times)):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                logs = np.log(np.maximum(values, 1e-3))
+            findings += self._numpy_change_points(
+                metric, logs, change_ratio, change_score, min_segment)
+            findings += self._numpy_trends(
+                metric, logs, trend_ratio, trend_min_samples)
+        return findings
+
+    def _numpy_change_points(self, metric: str, logs: 'np.ndarray', change_ratio: float,
+                             change_score: float, min_segment: int) -> List[HistoryFinding]:
+        '''单突变点检测：对每一列、每个分割位置，用累积和计算前后两段的均值与段内方差'''
+        n_runs, n_cells = logs.shape
+        if n_runs < 2:
+            return []
+        mask = ~np.isnan(logs)
+        values = np.where(mask, logs, 0.0)
+        count = np.cumsum(mask, axis=0)
+        total = np.cumsum(values, axis=0)
+        total_sq = np.cumsum(values * values, axis=0)
+        # 分割于第k次运行之后（k = 0..n_runs-2）
+        n1, s1, q1 = count[:-1], total[:-1], total_sq[:-1]
+        n, s, q = count[-1], total[-1], total_sq[-1]
+        n2 = n - n1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean1 = s1 / n1
+            mean2 = (s - s1) / n2
+            within = (q1 - n1 * mean1 ** 2) + ((q - q1) - n2 * mean2 ** 2)
+            sigma = np.maximum(
+                np.sqrt(np.maximum(within, 0) / np.maximum(n - 2, 1)), SIGMA_FLOOR)
+            scores = np.abs(mean2 - mean1) * np.sqrt(n1 * n2 / n) / sigma
+        valid = (n1 >= min_segment) & (n2 >= min_segment) & ~np.isnan(scores)
+        scores = np.where(valid, scores, -np.inf)
+        best = np.argmax(scores, axis=0)
+        cols = np.arange(n_cells)
+        best_scores = scores[best, cols]
+        before, after = mean1[best, cols], mean2[best, cols]
+        with np.errstate(invalid='ignore'):
+            significant = (best_scores >= change_score) & (
+                np.abs(after - before) >= math.log(change_ratio))
+        # 变化后的第一次运行：分割位置之后第一个有样本的运行
+        first_after = np.argmax(
+            mask & (np.arange(n_runs)[:, None] > best[None, :]), axis=0)
+        return [
+            self._finding('change_point', metric, c, first_after[c],
+                          math.exp(before[c]), math.exp(after[c]), best_scores[c])
+            for c in np.flatnonzero(significant)]
+
+    def _numpy_trends(self, metric: str, logs: 'np.ndarray', trend_ratio: float,
+                      min_samples: int) -> List[HistoryFinding]:
+        '''趋势：对每一列的（运行序号, 对数值）做最小二乘直线拟合'''
+        n_runs, _ = logs.shape
+        mask = ~np.isnan(logs)
+        values = np.where(mask, logs, 0.0)
+        x = np.arange(n_runs, dtype=float)[:, None]
+        n = mask.sum(axis=0)
+        sx = (x * mask).sum(axis=0)
+        sy = values.sum(axis=0)
+        sxx = (x * x * mask).sum(axis=0)
+        sxy = (x * values).sum(axis=0)
+        den = n * sxx - sx * sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(den > 0, (n * sxy - sx * sy) / den, np.nan)
+            intercept = (sy - slope * sx) / n
+        first = np.argmax(mask, axis=0)
+        last = n_runs - 1 - np.argmax(mask[::-1], axis=0)
+        start = intercept + slope * first
+        end = intercept + slope * last
+        with np.errstate(invalid='ignore'):
+            significant = (n >= min_samples) & (
+                np.abs(end - start) >= math.log(trend_ratio))
+        return [
+            self._finding('trend', metric, c, last[c],
+                          math.exp(start[c]), math.exp(end[c]), abs(end[c] - start[c]))
+            for c in np.flatnonzero(significant)]
+
+    # * === 纯Python实现 === * #
+
+    def _series(self) -> Tuple[List[List[bool]], List[List[bool]], List[List[float]], List[List[float]]]:
+        '''构造各列的序列：是否有结果、是否成功、步数、运行耗时（缺失为NaN）'''
+        n_cells = len(self.cells)
+        present = [[False] * self.n_runs for _ in range(n_cells)]
+        success = [[False] * self.n_runs for _ in range(n_cells)]
+        cycles = [[math.nan] * self.n_runs for _ in range(n_cells)]
+        times = [[math.nan] * self.n_runs for _ in range(n_cells)]
+        for (i, (r, c)) in enumerate(zip(self._run_idx, self._cell_idx)):
+            present[c][r] = True
+            success[c][r] = self._success[i]
+            cycles[c][r] = self._cycles[i]
+            times[c][r] = self._time[i]
+        return present, success, cycles, times
+
+    def _analyze_python(self, window, min_baseline, min_pass_rate, regression_ratio, min_time_delta,
+                        change_ratio, change_score, min_segment, trend_ratio, trend_min_samples) -> List[HistoryFinding]:
+        '''纯Python实现：逐列计算，判定规则与NumPy实现一致'''
+        findings: List[HistoryFinding] = []
+        present, success, cycles, times = self._series()
+        for c in range(len(self.cells)):
+            runs = [r for r in range(self.n_runs) if present[c][r]]
+            if not runs:
+                continue
+            success_times = [
+                t if s else math.nan for (t, s) in zip(times[c], success[c])]
+
+            # 回归
+            last = runs[-1]
+            base = [r for r in runs if last - window <= r < last]
+            base_success = [r for r in base if success[c][r]]
+            pass_rate = len(base_success) / max(len(base), 1)
+            if not success[c][last]:
+                if len(base) >= min_baseline and pass_rate >= min_pass_rate:
+                    findings.append(self._finding(
+                        'regression', 'success', c, last, pass_rate, 0.0, pass_rate))
+            elif len(base_success) >= min_baseline:
+                base_cycles = [cycles[c][r] for r in base_success if not math.isnan(cycles[c][r])]
+                if base_cycles:
+                    median = percentile(base_cycles, 0.5)
+                    if cycles[c][last] >= median * regression_ratio:
+                        findings.append(self._finding(
+                            'regression', 'cycles', c, last, median, cycles[c][last],
+                            cycles[c][last] / median))
+                median = percentile([times[c][r] for r in base_success], 0.5)
+                if (times[c][last] >= median * regression_ratio
+                        and times[c][last] - median >= min_time_delta):
+                    findings.append(self._finding(
+                        'regression', 'time', c, last, median, times[c][last],
+                        times[c][last] / median))
+
+            # 突变点、趋势
+            for (metric, values) in (('cycles', cycles[c]), ('time', success_times)):
+                logs = [
+                    math.nan if math.isnan(value) else math.log(max(value, 1e-3))
+                    for value in values]
+                change = _change_point(logs, min_segment)
+                if change is not None:
+                    (score, before, after, first_after) = change
+                    if score >= change_score and abs(after - before) >= math.log(change_ratio):
+                        findings.append(self._finding(
+                            'change_point', metric, c, first_after,
+                            math.exp(before), math.exp(after), score))
+                trend = _trend(logs, trend_min_samples)
+                if trend is not None:
+                    (start, end, trend_last) = trend
+                    if abs(end - start) >= math.log(trend_ratio):
+                        findings.append(self._finding(
+                            'trend', metric, c, trend_last,
+                            math.exp(start), math.exp(end), abs(end - start)))
+        return findings
+
+    def _finding(self, kind: str, metric: str, cell: int, run: int,
+                 before: float, after: float, score: float) -> HistoryFinding:
+        '''构造一条发现（列、运行以序号给出）'''
+        (nars_name, test_name) = self.cells[int(cell)]
+        return HistoryFinding(kind, metric, nars_name, test_name,
+                              self.run_names[int(run)],
+                              float(before), float(after), float(score))
+
+
+def _change_point(logs: List[float], min_segment: int) -> Optional[Tuple[float, float, float, int]]:
+    '''单突变点检测（纯Python）：返回(显著性, 前段均值, 后段均值, 变化后第一次运行的序号)
+    - 🚩与[`ResultHistory._numpy_change_points`]的判定一致
+    '''
+    samples = [(r, y) for (r, y) in enumerate(logs) if not math.isnan(y)]
+    n = len(samples)
+    best: Optional[Tuple[float, float, float, int]] = None
+    for k in range(min_segment, n - min_segment + 1):
+        head = [y for (_, y) in samples[:k]]
+        tail = [y for (_, y) in samples[k:]]
+        mean1 = sum(head) / len(head)
+        mean2 = sum(tail) / len(tail)
+        within = sum((y - mean1) ** 2 for y in head) + sum((y - mean2) ** 2 for y in tail)
+        sigma = max(math.sqrt(within / max(n - 2, 1)), SIGMA_FLOOR)
+        score = abs(mean2 - mean1) * math.sqrt(len(head) * len(tail) / n) / sigma
+        if best is None or score > best[0]:
+            best = (score, mean1, mean2, samples[k][0])
+    return best
+
+
+def _trend(logs: List[float], min_samples: int) -> Optional[Tuple[float, float, int]]:
+    '''趋势（纯Python）：返回(拟合的起点, 拟合的终点, 最后一次运行的序号)'''
+    samples = [(float(r), y) for (r, y) in enumerate(logs) if not math.isnan(y)]
+    n = len(samples)
+    if n < min_samples:
+        return None
+    sx = sum(x for (x, _) in samples)
+    sy = sum(y for (_, y) in samples)
+    sxx = sum(x * x for (x, _) in samples)
+    sxy = sum(x * y for (x, y) in samples)
+    den = n * sxx - sx * sx
+    if den <= 0:
+        return None
+    slope = (n * sxy - sx * sy) / den
+    intercept = (sy - slope * sx) / n
+    first, last = samples[0][0], samples[-1][0]
+    return intercept + slope * first, intercept + slope * last, int(last)
+
+
+def main(argv: List[str]) -> None:
+    '''命令行入口：分析历史并输出发现'''
+    import argparse
+    parser = argparse.ArgumentParser(description='跨运行的测试结果历史分析')
+    parser.add_argument('--root', default=None, help='结果目录（默认见`constants.TEST_RESULT_FILE_ROOT`）')
+    parser.add_argument('--store', default=None, help='改从SQLite测试结果库中读取')
+    parser.add_argument('--last', type=int, default=None, help='只取最近的若干次运行')
+    parser.add_argument('--nars', default=None, help='推理器名前缀')
+    parser.add_argument('--test', default=None, help='测试名前缀')
+    parser.add_argument('--window', type=int, default=10, help='回归分析的基线运行数')
+    parser.add_argument('--ratio', type=float, default=2.0, help='判定回归、趋势的倍率')
+    parser.add_argument('--json', action='store_true', help='以JSON输出')
+    args = parser.parse_args(argv)
+
+    if args.store is not None:
+        history = ResultHistory.from_store(args.store, args.last)
+    else:
+        from constants import TEST_RESULT_FILE_ROOT
+        history = ResultHistory.from_result_root(args.root or TEST_RESULT_FILE_ROOT, args.last)
+    if args.nars is not None or args.test is not None:
+        history = history.filtered(nars=args.nars, test=args.test)
+
+    findings = history.analyze(
+        window=args.window, regression_ratio=args.ratio, trend_ratio=args.ratio)
+    if args.json:
+        print(dumps([finding.to_json() for finding in findings], ensure_ascii=False, indent=4))
+        return
+    print(f'共 {history.n_runs} 次运行、{len(history.cells)} 个「推理器×测试」'
+          f'（{"NumPy" if np is not None else "纯Python"}实现）')
+    for kind, title in zip(FINDING_KINDS, ('回归', '突变点', '趋势')):
+        of_kind = [finding for finding in findings if finding.kind == kind]
+        print(f'\n{title}：{len(of_kind)} 项')
+        for finding in of_kind:
+            print(finding)
+
+
+if __name__ == '__main__':
+    from sys import argv
+    main(argv[1:])
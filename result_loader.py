@@ -22,7 +22,7 @@
 from typing import Dict, List, Optional, Set, Tuple
 from json import loads
 
-from toolchain import NARSType, TestFile, TestResult, show_result
+from toolchain import LazyTestResult, NARSType, TestFile, TestResult, show_result
 from run_tests import GroupTestResultToShow, cross_test_str_table, ALL_NARS_TYPES, ALL_TEST_FILES
 
 CrossTestResult = Dict[Tuple[str, str], TestResult]
@@ -70,15 +70,40 @@ def load_json_object(path: str) -> dict:
         return dict(loads(f.read()))
 
 
+RESULT_STORE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+'''被视作「SQLite测试结果库」的文件扩展名'''
+
+
 def load_group_results(path: str) -> GroupTestResultToShow:
-    '''从JSON文件路径路径加载测试结果'''
+    '''从JSON文件路径路径加载测试结果
+    - ✨路径为SQLite测试结果库⇒加载其中最近一次运行（可用`库路径#运行名`指定运行）
+    '''
+    path = path.strip()
+    db_path, _, run_name = path.partition('#')
+    if db_path.endswith(RESULT_STORE_SUFFIXES):
+        return load_group_results_store(db_path, run_name or None)
     # 加载JSON对象
-    json = load_json_object(path.strip())
+    json = load_json_object(path)
     return load_group_results_json(json)
 
 
+def load_group_results_store(db_path: str, run_name: Optional[str] = None) -> GroupTestResultToShow:
+    '''从SQLite测试结果库中加载一次运行的测试结果
+    - 🚩未指定运行名⇒最近一次运行
+    '''
+    from os.path import isfile
+    from result_store import ResultStore
+    # 避免因路径错误新建空库
+    if not isfile(db_path):
+        raise FileNotFoundError(db_path)
+    with ResultStore(db_path) as store:
+        return store.load_run(run_name)
+
+
 def load_group_results_json(json: dict) -> GroupTestResultToShow:
-    '''从JSON对象中加载测试结果'''
+    '''从JSON对象中加载测试结果
+    - 🚩惰性加载：只立即读取概要，程序输出在首次访问（如详细展示）时才读出
+    '''
 
     # 重建测试结果
     results = {}
@@ -96,7 +121,7 @@ def load_group_results_json(json: dict) -> GroupTestResultToShow:
                 #     continue
                 # key = (nars_type, test_file)
                 key = (nars_name, test_name)
-                cross_result[key] = TestResult.from_json(test_result)
+                cross_result[key] = LazyTestResult(test_result)
         # 装填
         results[group_name] = cross_result
 
@@ -195,7 +220,7 @@ def main():
     while True:
         try:
             # 获取测试结果路径
-            PATH = input('请输入保存的测试记录JSON文件路径：')
+            PATH = input('请输入保存的测试记录JSON文件（或SQLite结果库）路径：')
             # 处理单个路径
             main_path(PATH)
         except FileNotFoundError:
@@ -0,0 +1,94 @@
+'''测试结果日志（JSON Lines）
+- 🎯防崩溃：每个测试一完成，就将其结果追加到日志文件中
+    - 📌中途Ctrl+C、程序崩溃时，已完成的测试结果不会丢失
+    - 📌每次写入只追加一行，耗时与已完成的测试数无关
+- 🚩每行一个JSON对象：`{"group": 测试组名, "nars": 推理器名, "test": 测试名, "result": 测试结果}`
+- 🚩读取时按行重建「分组测试结果」，以生成`.json`/`.csv`
+    - 📌同一「推理器×测试」重复出现时，以后出现者为准
+    - 📌跳过无法解析的行（如崩溃时写了一半的最后一行）
+'''
+
+from json import dumps, loads
+from os import makedirs, path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from blob_store import BlobStore
+from toolchain import LazyTestResult, NARSType, TestFile, TestResult
+
+LoggedGroupResult = Dict[str, Dict[Tuple[str, str], TestResult]]
+'''从日志中重建的分组测试结果
+- 🚩测试组名 ⇒ (推理器名, 测试名) ⇒ 测试结果
+- 📌即`run_tests.GroupTestResultToShow`
+'''
+
+
+class ResultLog:
+    '''追加式的测试结果日志'''
+
+    file_path: str
+    '''日志文件路径'''
+
+    blobs: Optional[BlobStore]
+    '''程序输出的压缩块存储，`None`表示原样内嵌'''
+
+    def __init__(self, file_path: str, encoding: str = 'utf-8', blobs: Optional[BlobStore] = None) -> None:
+        '''打开（或新建）日志文件，所在目录不存在时自动创建'''
+        self.file_path = file_path
+        self.blobs = blobs
+        if path.dirname(file_path):
+            makedirs(path.dirname(file_path), exist_ok=True)
+        self._file = open(file_path, 'a', encoding=encoding)
+        self._lock = Lock()
+
+    def append(self, group_name: str, nars_type: NARSType, test_file: TestFile, result: TestResult) -> None:
+        '''追加一条测试结果
+        - 🚩整行一次写入并立即刷新，交给操作系统
+        - 📌可在多个线程中同时调用
+        '''
+        line = dumps({
+            'group': group_name,
+            'nars': nars_type.name,
+            'test': test_file.name,
+            'result': result.to_json(self.blobs),
+        }, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        '''关闭日志文件'''
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> 'ResultLog':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_result_log(file_path: str, encoding: str = 'utf-8', *, into: Optional[LoggedGroupResult] = None) -> LoggedGroupResult:
+    '''从日志文件中重建分组测试结果
+    - 🚩按行读取，后出现者覆盖先出现者
+    - 🚩跳过无法解析的行，并打印提示
+    - 🚩惰性加载：程序输出在首次访问时才读出；重新保存时沿用压缩块引用
+
+    Args:
+        into: 合并到的已有结果，默认新建
+    '''
+    results: LoggedGroupResult = {} if into is None else into
+    with open(file_path, 'r', encoding=encoding) as f:
+        for (line_num, line) in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = loads(line)
+                key = (entry['nars'], entry['test'])
+                result = LazyTestResult(entry['result'])
+                group_name = entry['group']
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                print(f'跳过日志 {file_path} 第{line_num}行：{e}')
+                continue
+            results.setdefault(group_name, {})[key] = result
+    return results
@@ -0,0 +1,349 @@
+'''基于SQLite的测试结果库
+- 🎯跨多次运行的索引查询：如「最近30次运行中，3.1.2在NAL-5.x上的所有失败」
+    - 📌无需逐个加载、完整解析多个大JSON文件
+- 🚩表结构：运行`runs`、测试组`groups`、推理器`nars_types`、测试`tests`、结果`results`
+    - 📌结果表中单独存储「是否成功」「运行耗时」，完整的测试结果以JSON存储
+    - 📌程序输出：指定压缩块存储时，只存引用`{"$blob": 【SHA-256】}`，不把完整输出嵌入库中
+    - 📌读出的结果均为惰性加载（`LazyTestResult`）：程序输出在首次访问时才读出并解压
+    - 📌索引：测试名、推理器名、运行时间、是否成功
+- 📌可选后端：在`constants.RESULT_STORE_DATABASE`中指定数据库路径后，`store_group_test`同时写入此库
+
+用法：
+- 导入已有JSON：`python result_store.py 【数据库】 import test_results/*.test.json`
+- 查询：`python result_store.py 【数据库】 query --test NAL-5 --nars "OpenNARS 3.1.2" --failed --last 30`
+'''
+
+import sqlite3
+from datetime import datetime
+from json import dumps, loads
+from os import makedirs, path
+from typing import Dict, List, Optional, Tuple, Union
+
+from blob_store import BlobStore
+from toolchain import LazyTestResult, NARSType, TestFile, TestResult
+
+StoredGroupResult = Dict[str, Dict[Tuple[str, str], TestResult]]
+'''从库中读出的分组测试结果
+- 🚩测试组名 ⇒ (推理器名, 测试名) ⇒ 测试结果
+- 📌即`run_tests.GroupTestResultToShow`
+'''
+
+StoredResult = Tuple[str, str, str, str, TestResult]
+'''查询得到的单条结果：(运行名, 测试组名, 推理器名, 测试名, 测试结果)'''
+
+ResultSummary = Tuple[str, float, str, str, bool, List[int], float]
+'''单条结果的概要：(运行名, 运行时间, 推理器名, 测试名, 是否成功, 成功步数, 运行耗时)'''
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS nars_types (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    nars_id INTEGER NOT NULL REFERENCES nars_types(id),
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    success INTEGER NOT NULL,
+    time_diff REAL NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (run_id, nars_id, test_id)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON runs(time);
+CREATE INDEX IF NOT EXISTS idx_results_test ON results(test_id, nars_id, success);
+CREATE INDEX IF NOT EXISTS idx_results_nars ON results(nars_id, success);
+CREATE INDEX IF NOT EXISTS idx_results_success ON results(success);
+'''
+'''数据库表结构
+- 📌名称上的`UNIQUE`约束同时充当「按名称查询」的索引
+'''
+
+
+def run_time_of_name(run_name: str) -> Optional[float]:
+    '''从运行名（结果文件名）中解析运行时间
+    - 📄"group_result-20240526191722.test" ⇒ 2024-05-26 19:17:22
+    - 🚩解析失败⇒`None`
+    '''
+    for part in run_name.replace('.', '-').split('-'):
+        if len(part) == 14 and part.isdigit():
+            try:
+                return datetime.strptime(part, '%Y%m%d%H%M%S').timestamp()
+            except ValueError:
+                return None
+    return None
+
+
+def _name(item: Union[str, NARSType, TestFile]) -> str:
+    '''获取推理器/测试的名称（已是名称⇒直接返回）'''
+    return item if isinstance(item, str) else item.name
+
+
+class ResultStore:
+    '''SQLite测试结果库'''
+
+    db_path: str
+    '''数据库文件路径'''
+
+    blobs: Optional[BlobStore]
+    '''存入结果时，程序输出所用的压缩块存储
+    - 🚩`None`⇒程序输出原样嵌入库中
+    - 📌读出时，引用总是可以解析（未指定⇒`BlobStore.default()`）
+    '''
+
+    def __init__(self, db_path: str, blobs: Optional[BlobStore] = None) -> None:
+        '''打开（或新建）数据库，所在目录不存在时自动创建'''
+        self.db_path = db_path
+        self.blobs = blobs
+        if path.dirname(db_path):
+            makedirs(path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        '''关闭数据库'''
+        self._conn.close()
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _id_of(self, table: str, name: str) -> int:
+        '''获取名称对应的ID，不存在则插入'''
+        self._conn.execute(
+            f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', (name,))
+        row = self._conn.execute(
+            f'SELECT id FROM {table} WHERE name = ?', (name,)).fetchone()
+        return row[0]
+
+    def store_group_results(self, run_name: str, results: dict, run_time: Optional[float] = None) -> int:
+        '''存储一次运行的分组测试结果
+        - 🚩同名运行已存在⇒覆盖其结果
+        - 📌接受「分组测试结果」与其「展示格式」
+        - 🚩运行时间：未指定⇒从运行名中解析⇒当前时间
+        - 🚩程序输出：存为[`blobs`]中的压缩块引用（若有）
+
+        Returns:
+            int: 存储的结果条数
+        '''
+        if run_time is None:
+            run_time = run_time_of_name(run_name) or datetime.now().timestamp()
+        n_results = 0
+        with self._conn:
+            self._conn.execute(
+                'INSERT INTO runs (name, time) VALUES (?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET time = excluded.time',
+                (run_name, run_time))
+            run_id = self._id_of('runs', run_name)
+            self._conn.execute('DELETE FROM results WHERE run_id = ?', (run_id,))
+            for (group_name, cross_result) in results.items():
+                group_id = self._id_of('groups', group_name)
+                for ((nars, test), result) in cross_result.items():
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO results '
+                        '(run_id, group_id, nars_id, test_id, success, time_diff, data) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (run_id, group_id,
+                         self._id_of('nars_types', _name(nars)),
+                         self._id_of('tests', _name(test)),
+                         int(bool(result.success)),
+                         float(result.time_diff),
+                         dumps(result.to_json(self.blobs), ensure_ascii=False)))
+                    n_results += 1
+        return n_results
+
+    def import_json_file(self, file_path: str) -> int:
+        '''导入已保存的分组测试结果JSON文件
+        - 🚩运行名取文件名（去掉`.json`）
+        - 🚩运行时间：从文件名中解析⇒文件修改时间
+        - 🚩惰性加载：文件中的压缩块引用（与[`blobs`]同一存储时）直接沿用，无需解压
+        '''
+        with open(file_path, 'r', encoding='utf-8') as f:
+            json = loads(f.read())
+        results: StoredGroupResult = {
+            group_name: {
+                (nars_name, test_name): LazyTestResult(test_result)
+                for (test_name, nars_results) in group_result.items()
+                for (nars_name, test_result) in nars_results.items()
+            }
+            for (group_name, group_result) in json.items()
+        }
+        run_name = path.basename(file_path)
+        if run_name.endswith('.json'):
+            run_name = run_name[:-len('.json')]
+        return self.store_group_results(
+            run_name, results,
+            run_time_of_name(run_name) or path.getmtime(file_path))
+
+    def runs(self, last: Optional[int] = None) -> List[Tuple[str, float]]:
+        '''列出所有运行（按时间从早到晚）
+        - ✨`last`：只取最近的若干次
+        '''
+        rows = self._conn.execute(
+            'SELECT name, time FROM runs ORDER BY time DESC'
+            + (' LIMIT ?' if last is not None else ''),
+            (last,) if last is not None else ()).fetchall()
+        return list(reversed(rows))
+
+    def load_run(self, run_name: Optional[str] = None) -> StoredGroupResult:
+        '''读取一次运行的分组测试结果
+        - 🚩未指定运行名⇒最近一次运行
+        '''
+        if run_name is None:
+            runs = self.runs(last=1)
+            if not runs:
+                return {}
+            run_name = runs[0][0]
+        rows = self._conn.execute(
+            'SELECT groups.name, nars_types.name, tests.name, results.data '
+            'FROM results '
+            'JOIN runs ON runs.id = results.run_id '
+            'JOIN groups ON groups.id = results.group_id '
+            'JOIN nars_types ON nars_types.id = results.nars_id '
+            'JOIN tests ON tests.id = results.test_id '
+            'WHERE runs.name = ? ORDER BY results.id',
+            (run_name,)).fetchall()
+        results: StoredGroupResult = {}
+        for (group_name, nars_name, test_name, data) in rows:
+            results.setdefault(group_name, {})[(nars_name, test_name)] = \
+                LazyTestResult(loads(data), self.blobs)
+        return results
+
+    def query(
+        self,
+        *,
+        test: Optional[str] = None,
+        nars: Optional[str] = None,
+        success: Optional[bool] = None,
+        last_runs: Optional[int] = None,
+        with_output: bool = True,
+    ) -> List[StoredResult]:
+        '''跨运行查询测试结果
+        - 🚩`test`/`nars`：名称前缀（区分大小写，可走索引）
+        - 🚩`success`：只取成功/失败的结果
+        - 🚩`last_runs`：只在最近的若干次运行中查询
+        - ✨`with_output`：为假时不读取完整结果，只还原「是否成功」与「运行耗时」
+        - 📌结果按运行时间、结果插入顺序排列
+        '''
+        conditions: List[str] = []
+        params: list = []
+        if test is not None:
+            conditions.append('tests.name GLOB ?')
+            params.append(_glob_prefix(test))
+        if nars is not None:
+            conditions.append('nars_types.name GLOB ?')
+            params.append(_glob_prefix(nars))
+        if success is not None:
+            conditions.append('results.success = ?')
+            params.append(int(success))
+        if last_runs is not None:
+            conditions.append(
+                'runs.id IN (SELECT id FROM runs ORDER BY time DESC LIMIT ?)')
+            params.append(last_runs)
+        rows = self._conn.execute(
+            'SELECT runs.name, groups.name, nars_types.name, tests.name, '
+            + ('results.data ' if with_output else 'results.success, results.time_diff ')
+            + 'FROM results '
+            'JOIN runs ON runs.id = results.run_id '
+            'JOIN groups ON groups.id = results.group_id '
+            'JOIN nars_types ON nars_types.id = results.nars_id '
+            'JOIN tests ON tests.id = results.test_id '
+            + ('WHERE ' + ' AND '.join(conditions) + ' ' if conditions else '')
+            + 'ORDER BY runs.time, results.id',
+            params).fetchall()
+        found: List[StoredResult] = []
+        for row in rows:
+            if with_output:
+                result = LazyTestResult(loads(row[4]), self.blobs)
+            else:
+                result = TestResult.__default__()
+                result.success = bool(row[4])
+                result.time_diff = row[5]
+            found.append((row[0], row[1], row[2], row[3], result))
+        return found
+
+    def summaries(self, *, last_runs: Optional[int] = None) -> List[ResultSummary]:
+        '''读取所有结果的概要（按运行时间排列）
+        - 🎯跨运行的历史分析（`result_history.py`）：无需还原完整的测试结果
+        - 🚩「成功步数」用SQLite的`json_extract`直接从结果JSON中取出
+        - ✨`last_runs`：只取最近的若干次运行
+        '''
+        rows = self._conn.execute(
+            'SELECT runs.name, runs.time, nars_types.name, tests.name, '
+            "results.success, json_extract(results.data, '$.success_cycles'), results.time_diff "
+            'FROM results '
+            'JOIN runs ON runs.id = results.run_id '
+            'JOIN nars_types ON nars_types.id = results.nars_id '
+            'JOIN tests ON tests.id = results.test_id '
+            + ('WHERE runs.id IN (SELECT id FROM runs ORDER BY time DESC LIMIT ?) '
+               if last_runs is not None else '')
+            + 'ORDER BY runs.time, results.id',
+            (last_runs,) if last_runs is not None else ()).fetchall()
+        return [
+            (run_name, run_time, nars_name, test_name,
+             bool(success), loads(cycles) if cycles else [], time_diff)
+            for (run_name, run_time, nars_name, test_name, success, cycles, time_diff) in rows
+        ]
+
+
+def _glob_prefix(prefix: str) -> str:
+    '''将名称前缀转换为GLOB模式（转义其中的通配符）'''
+    escaped = ''.join(
+        f'[{c}]' if c in '*?[' else c
+        for c in prefix)
+    return escaped + '*'
+
+
+def main(argv: List[str]) -> None:
+    '''命令行入口：导入JSON / 查询'''
+    import argparse
+    parser = argparse.ArgumentParser(description='SQLite测试结果库')
+    parser.add_argument('db', help='数据库文件路径')
+    commands = parser.add_subparsers(dest='command', required=True)
+    importing = commands.add_parser('import', help='导入已保存的分组测试结果JSON')
+    importing.add_argument('files', nargs='+')
+    querying = commands.add_parser('query', help='跨运行查询测试结果')
+    querying.add_argument('--test', default=None, help='测试名前缀')
+    querying.add_argument('--nars', default=None, help='推理器名前缀')
+    querying.add_argument('--failed', action='store_true', help='只查询失败的结果')
+    querying.add_argument('--succeeded', action='store_true', help='只查询成功的结果')
+    querying.add_argument('--last', type=int, default=None, help='只在最近的若干次运行中查询')
+    args = parser.parse_args(argv)
+
+    # ⚠️需要动态导入 以避免循环导入
+    import constants
+    blobs = BlobStore.default() if constants.OUTPUT_BLOB_STORAGE else None
+    with ResultStore(args.db, blobs) as store:
+        if args.command == 'import':
+            for file_path in args.files:
+                n = store.import_json_file(file_path)
+                print(f'已导入 {file_path}：{n} 条结果')
+        else:
+            success = False if args.failed else True if args.succeeded else None
+            found = store.query(
+                test=args.test, nars=args.nars, success=success,
+                last_runs=args.last, with_output=False)
+            for (run_name, group_name, nars_name, test_name, result) in found:
+                print(f'{run_name}\t{group_name}\t{nars_name}\t{test_name}\t'
+                      f'{"✅" if result.success else "❌"}\t{result.time_diff:.3f}')
+            print(f'共 {len(found)} 条结果')
+
+
+if __name__ == '__main__':
+    from sys import argv
+    main(argv[1:])
@@ -1,6 +1,14 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from io import StringIO
+from os import path, remove
+from threading import Lock
 from typing import Callable, Dict, Tuple
 
 from toolchain import *
+from blob_store import BlobStore
+from result_csv import CsvResultWriter
+from result_log import ResultLog, load_result_log
+from scheduling import DurationEstimates, longest_first_ranks
 import constants
 from util import *
 
@@ -36,58 +44,252 @@ ALL_NARS_TYPES = all_nars_types()
 ALL_TEST_FILES = all_test_files()
 '''所有可用的测试文件'''
 
-CrossTestResult = Dict[Tuple[NARSType, TestFile], TestResult]
-'''交叉测试的返回类型
-- 🎯复用
-'''
-
-
 def perform_cross_tests(
     nars_types: List[NARSType],
     test_files: List[TestFile],
     *,
     verbose_on_success: bool = True,
     verbose_on_fail: bool = True,
+    workers: Optional[int] = None,
+    workers_per_nars: Optional[int] = None,
+    on_result: Optional[Callable[[NARSType, TestFile, TestResult], None]] = None,
+    previous: Optional['CrossTestResultToShow'] = None,
+    repeats: Optional[int] = None,
+    expected_duration: Optional[Callable[[NARSType, TestFile], float]] = None,
 ) -> CrossTestResult:
     '''开展交叉测试
     - 🚩对所有「NARS类型」与所有「测试文件」进行交叉测试
     - 🚩测试顺序：在每个「测试文件」上对每个「NARS类型」测试
         - 🎯方便看到**同一测试在不同NARS上的表现**
     - 🚩返回在所有NARS上所有测试的结果
+    - ✨可并行运行：`workers`大于1时，使用线程池同时运行多个测试
+        - 📌返回结果的顺序与串行时一致，不受完成先后影响
+    - 🚩进程无效时不在工作线程中等待退避，而是将任务延后重新入队（参见[`run_cross_jobs`]）
 
     Args:
         nars_types: NARS类型列表
         test_files: 测试文件列表
         verbose_on_fail: 测试失败时是否打印详细日志
+        workers: 同时运行的测试数目，默认为`constants.CROSS_TEST_WORKERS`
+        workers_per_nars: 同一NARS类型最多同时运行的测试数目，默认为`constants.CROSS_TEST_WORKERS_PER_NARS`
+        on_result: 每个测试完成时的额外回调（如写入结果日志），在打印之后调用
+        previous: 已有的测试结果（续跑用）：其中已有的「推理器×测试」不再运行，直接沿用
+            - 📌沿用的结果同样经过`on_result`，但不打印
+        repeats: 每个「推理器×测试」运行的次数（重复测量），默认为`constants.REPEAT_COUNT`
+            - 📌大于1时，结果中保存各次运行的样本（参见[`TestResult.from_repeats`]）
+        expected_duration: 每个测试的预计耗时：给定⇒按「最长任务优先」派发（参见`scheduling.py`）
+            - 📌只影响派发顺序，返回结果的顺序不变
     '''
 
-    def test_one(nars_type: NARSType, test_file: TestFile) -> TestResult:
-        '''测试一个NARS类型与一个测试文件'''
-        # 测试（静音）
-        result = nars_type.test_nal(test_file, silent=True)
-        # 成功：提示
-        if result.success:
-            print(
-                f'✅ {nars_type.name} @ {test_file.name} in {result.success_cycles} steps')
-            if verbose_on_success:
-                show_result(result, verbose=True, n_paging=0)  # 不要分页，持续测试
-        # 失败且开启了「失败时打印详细日志」 ⇒ 打印详细日志
-        else:
-            print(f'❌ {nars_type.name} @ {test_file.name}')
-            if verbose_on_fail:
-                show_result(result, verbose=True, n_paging=0)  # 不要分页，持续测试
+    # 未指定⇒使用常量中的默认值
+    if workers is None:
+        workers = constants.CROSS_TEST_WORKERS
+    if workers_per_nars is None:
+        workers_per_nars = constants.CROSS_TEST_WORKERS_PER_NARS
+    if repeats is None:
+        repeats = constants.REPEAT_COUNT
+
+    print_lock = Lock()
+    '''打印锁
+    - 🎯并行测试时，避免不同测试的输出相互穿插
+    '''
+
+    def on_test_done(nars_type: NARSType, test_file: TestFile, result: TestResult) -> None:
+        '''一个NARS类型与一个测试文件测试完毕'''
+        with print_lock:
+            show_cross_result(nars_type, test_file, result,
+                              verbose_on_success=verbose_on_success,
+                              verbose_on_fail=verbose_on_fail)
         # print(f'JSON: {result.to_json()}')
-        # 返回
-        return result
+        if on_result is not None:
+            on_result(nars_type, test_file, result)
 
-    # 生成结果并返回
-    return {
-        (nars_type, test_file): test_one(nars_type, test_file)
+    # 所有测试任务 | 此顺序同时也是结果的顺序
+    jobs: List[CrossTestJob] = [
+        (nars_type, test_file)
         for test_file in test_files  # 优先遍历测试文件
         for nars_type in nars_types  # 然后才是NARS类型
+    ]
+
+    # 已有结果 ⇒ 跳过 | 按名称匹配
+    resumed: CrossTestResult = {}
+    if previous:
+        for (nars_type, test_file) in jobs:
+            key = (nars_type.name, test_file.name)
+            if key in previous:
+                resumed[(nars_type, test_file)] = previous[key]
+        if resumed:
+            print(f'跳过 {len(resumed)} 个已有结果的测试')
+        if on_result is not None:
+            for ((nars_type, test_file), result) in resumed.items():
+                on_result(nars_type, test_file, result)
+
+    # 运行后按原顺序重排结果
+    results = run_cross_jobs(
+        [job for job in jobs if job not in resumed],
+        workers=workers,
+        workers_per_nars=workers_per_nars,
+        on_result=on_test_done,
+        repeats=repeats,
+        expected_duration=expected_duration)
+    results.update(resumed)
+    return {
+        job: results[job]
+        for job in jobs
     }
 
 
+class CrossTestTask:
+    '''调度中的单个测试任务
+    - 📌「测试任务」及其「尝试」状态（超时阶梯、退避重试）
+    '''
+
+    job: CrossTestJob
+    '''对应的测试任务'''
+
+    order: int
+    '''派发名次：越小越先派发
+    - 📌默认为任务在原列表中的序号；按预计耗时调度时为「最长任务优先」的名次
+    '''
+
+    repeat: int
+    '''重复测量中的运行序号（从0开始）'''
+
+    attempts: TestAttempts
+    '''尝试状态'''
+
+    def __init__(self, job: CrossTestJob, order: int, repeat: int = 0) -> None:
+        self.job = job
+        self.order = order
+        self.repeat = repeat
+        nars_type, test_file = job
+        self.attempts = nars_type.test_attempts(test_file)
+
+    def run_once(self) -> TestResult:
+        '''以当前的超时时长运行一次'''
+        nars_type, test_file = self.job
+        return nars_type.run_attempt(test_file, self.attempts.timeout)
+
+
+def run_cross_jobs(
+    jobs: List[CrossTestJob],
+    *,
+    workers: int,
+    workers_per_nars: Optional[int] = None,
+    on_result: Optional[Callable[[NARSType, TestFile, TestResult], None]] = None,
+    repeats: int = 1,
+    expected_duration: Optional[Callable[[NARSType, TestFile], float]] = None,
+) -> CrossTestResult:
+    '''使用有界线程池运行测试任务
+    - 🚩按列表顺序派发任务
+        - 给定`expected_duration`⇒按预计耗时从长到短派发（最长任务优先）
+        - 总运行数不超过`workers`
+        - 同一NARS类型的运行数不超过`workers_per_nars`（若有）
+    - 🚩暂不满足限制的任务留在队列中，不占用工作线程
+    - 🚩任务的每次「尝试」单独派发
+        - 失败且有更长超时时长 ⇒ 立即重新入队
+        - 进程无效 ⇒ 带「最早开始时刻」重新入队，退避期间其它任务照常运行
+    - 🚩启用结果缓存时：命中的任务不再运行，直接完成；运行成功的结果写入缓存
+    - 🚩`repeats`大于1时：每个任务运行`repeats`次，各次单独派发（可并行），全部完成后合并为一个结果
+        - 📌重复测量不读写结果缓存：缓存中只有单次运行的结果
+    - 📌`workers`为1时即逐个运行
+    - ⚠️返回结果的顺序为「完成顺序」，需要时由调用方重排
+    '''
+    # 限制至少为1，避免无任务可派发导致死循环
+    workers = max(1, workers)
+    if workers_per_nars is not None:
+        workers_per_nars = max(1, workers_per_nars)
+
+    repeats = max(1, repeats)
+
+    results: CrossTestResult = {}
+    pending: List[CrossTestTask] = []
+    '''尚未派发的任务（按序号排列）'''
+    repeated: Dict[CrossTestJob, List[Optional[TestResult]]] = {}
+    '''重复测量中，各任务已完成的运行结果（按运行序号）'''
+    ranks = (
+        list(range(len(jobs))) if expected_duration is None
+        else longest_first_ranks([expected_duration(*job) for job in jobs]))
+    '''各任务的派发名次'''
+    for i, job in enumerate(jobs):
+        nars_type, test_file = job
+        if repeats > 1:
+            repeated[job] = [None] * repeats
+            pending.extend(CrossTestTask(job, ranks[i], k) for k in range(repeats))
+            continue
+        cached = nars_type.cached_result(test_file)
+        if cached is None:
+            pending.append(CrossTestTask(job, ranks[i]))
+            continue
+        results[job] = cached
+        if on_result is not None:
+            on_result(nars_type, test_file, cached)
+    pending.sort(key=lambda task: task.order)
+    running: Dict[Future, CrossTestTask] = {}
+    '''正在运行的任务'''
+    n_running: Dict[NARSType, int] = {}
+    '''每个NARS类型正在运行的任务数'''
+
+    def can_start(task: CrossTestTask, now: float) -> bool:
+        nars_type, _ = task.job
+        return task.attempts.not_before <= now and (
+            workers_per_nars is None
+            or n_running.get(nars_type, 0) < workers_per_nars)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            # 派发：从前往后找出所有可以开始的任务
+            now = time()
+            i = 0
+            while i < len(pending) and len(running) < workers:
+                task = pending[i]
+                if can_start(task, now):
+                    pending.pop(i)
+                    running[executor.submit(task.run_once)] = task
+                    nars_type = task.job[0]
+                    n_running[nars_type] = n_running.get(nars_type, 0) + 1
+                else:
+                    i += 1
+            # 等待：至少一个任务完成，或最近的退避到期
+            wake_times = [
+                task.attempts.not_before
+                for task in pending
+                if task.attempts.not_before > now]
+            timeout = min(wake_times) - now if wake_times else None
+            if not running:
+                sleep(timeout or 0)
+                continue
+            done, _ = wait(running, timeout=timeout,
+                           return_when=FIRST_COMPLETED)
+            # 回收：决定重新入队或完成
+            for future in done:
+                task = running.pop(future)
+                nars_type, test_file = task.job
+                n_running[nars_type] -= 1
+                result = future.result()
+                if task.attempts.advance(result):
+                    # 按序号插回队列，保持派发优先级
+                    i = 0
+                    while i < len(pending) and pending[i].order < task.order:
+                        i += 1
+                    pending.insert(i, task)
+                    continue
+                if repeats > 1:
+                    # 重复测量：全部运行完成后才合并
+                    samples = repeated[task.job]
+                    samples[task.repeat] = result
+                    if any(sample is None for sample in samples):
+                        continue
+                    result = TestResult.from_repeats(samples)
+                else:
+                    nars_type.cache_result(test_file, result)
+                results[task.job] = result
+                if on_result is not None:
+                    on_result(nars_type, test_file, result)
+
+    return results
+
+
 CrossTestResultToShow = Dict[Tuple[str, str], TestResult]
 '''交叉测试结果的展示格式
 - 🚩只需要「推理器名」和「测试名」
@@ -229,10 +431,78 @@ def group_test(
     *,
     verbose_on_success: bool = True,
     verbose_on_fail: bool = True,
+    workers: Optional[int] = None,
+    workers_per_nars: Optional[int] = None,
+    result_log: Optional[ResultLog] = None,
+    csv_writer: Optional[CsvResultWriter] = None,
+    previous: Optional[CrossTestResultToShow] = None,
+    repeats: Optional[int] = None,
+    longest_first: Optional[bool] = None,
 ) -> GroupTestResult:
     '''分组测试
     - 🎯分「NAL层级」等标准，展示时可按照组别展示
+    - 📌并行参数：见[`perform_cross_tests`]
+    - ✨`result_log`：每个测试一完成，就将结果（连同测试组名）追加到日志中
+    - ✨`csv_writer`：每个测试一完成，就将结果写入CSV的一行
+    - ✨`previous`：续跑时已有的测试结果，见[`perform_cross_tests`]
+    - ✨`repeats`：每个测试运行的次数（重复测量），见[`perform_cross_tests`]
+    - ✨`longest_first`：按历史耗时「最长任务优先」调度，默认为`constants.CROSS_TEST_LONGEST_FIRST`
+        - 📌所有组的测试在同一线程池中调度（而非逐组运行），返回结果仍按组、按原顺序排列
     '''
+    if longest_first is None:
+        longest_first = constants.CROSS_TEST_LONGEST_FIRST
+
+    sinks = [
+        sink
+        for sink in (result_log, csv_writer)
+        if sink is not None
+    ]
+
+    def log_to(name: str) -> Optional[Callable[[NARSType, TestFile, TestResult], None]]:
+        '''生成「写入结果日志/CSV」回调'''
+        if not sinks:
+            return None
+
+        def on_result(nars_type: NARSType, test_file: TestFile, result: TestResult) -> None:
+            for sink in sinks:
+                sink.append(name, nars_type, test_file, result)
+        return on_result
+
+    groups = groupby_test(test_files, group_name)
+
+    # 按预计耗时调度：所有组一同派发，再按组拆分结果
+    if longest_first:
+        estimates = DurationEstimates.from_result_root(constants.TEST_RESULT_FILE_ROOT)
+        group_callbacks = {
+            file: log_to(name)
+            for (name, files) in groups
+            for file in files}
+
+        def on_result(nars_type: NARSType, test_file: TestFile, result: TestResult) -> None:
+            callback = group_callbacks[test_file]
+            if callback is not None:
+                callback(nars_type, test_file, result)
+
+        results = perform_cross_tests(
+            nars_types=nars_types,
+            test_files=[file for (_, files) in groups for file in files],
+            verbose_on_success=verbose_on_success,
+            verbose_on_fail=verbose_on_fail,
+            workers=workers,
+            workers_per_nars=workers_per_nars,
+            on_result=on_result if sinks else None,
+            previous=previous,
+            repeats=repeats,
+            expected_duration=estimates.expected,
+        )
+        return {
+            name: {
+                (nars_type, test_file): results[(nars_type, test_file)]
+                for test_file in files
+                for nars_type in nars_types
+            }
+            for (name, files) in groups
+        }
 
     # 分组开展测试
     return {
@@ -241,16 +511,73 @@ def group_test(
             test_files=files,
             verbose_on_success=verbose_on_success,
             verbose_on_fail=verbose_on_fail,
+            workers=workers,
+            workers_per_nars=workers_per_nars,
+            on_result=log_to(name),
+            previous=previous,
+            repeats=repeats,
         )
-        for (name, files) in groupby_test(test_files, group_name)
+        for (name, files) in groups
+    }
+
+
+def order_group_result(
+    results: GroupTestResultToShow,
+    nars_types: List[NARSType] = ALL_NARS_TYPES,
+    test_files: List[TestFile] = ALL_TEST_FILES,
+) -> GroupTestResultToShow:
+    '''将（从日志中重建的）分组测试结果按测试顺序重排
+    - 🎯日志按「完成顺序」记录，重排后与直接测试得到的结果顺序一致
+    - 🚩测试组按名称排序；组内按「测试文件→NARS类型」的顺序排列，未知者排在最后
+    '''
+    test_order = {test_file.name: i for i, test_file in enumerate(test_files)}
+    nars_order = {nars_type.name: i for i, nars_type in enumerate(nars_types)}
+
+    def key(item: Tuple[Tuple[str, str], TestResult]) -> Tuple[int, int]:
+        (nars_name, test_name), _ = item
+        return (test_order.get(test_name, len(test_order)),
+                nars_order.get(nars_name, len(nars_order)))
+
+    return {
+        group_name: dict(sorted(results[group_name].items(), key=key))
+        for group_name in sorted(results)
     }
 
 
-def jsonify_group_test(result: GroupTestResult) -> dict:
+def load_previous_results(file_path: str) -> CrossTestResultToShow:
+    '''加载用于「续跑」的已有测试结果
+    - 🚩支持先前保存的分组测试结果（`.json`）与结果日志（`.jsonl`，如被中断的运行）
+    - 🚩展平各测试组，并剔除「进程无效」的结果（这些测试需要重新运行）
+        - 📌按保存时的判定剔除，不读出程序输出（压缩块在需要时才读出）
+    '''
+    if file_path.endswith('.jsonl'):
+        grouped = load_result_log(file_path, constants.RESULT_SAVING_ENCODING)
+    else:
+        # ⚠️需要动态导入 以避免循环导入
+        from result_loader import load_group_results
+        grouped = load_group_results(file_path)
+    return {
+        key: result
+        for cross_result in grouped.values()
+        for (key, result) in cross_result.items()
+        if not result.process_invalid()
+    }
+
+
+def output_blob_store() -> Optional[BlobStore]:
+    '''保存结果时所用的压缩块存储
+    - 🚩由`constants.OUTPUT_BLOB_STORAGE`决定是否启用
+    '''
+    return BlobStore.default() if constants.OUTPUT_BLOB_STORAGE else None
+
+
+def jsonify_group_test(result: Union[GroupTestResult, GroupTestResultToShow], blobs: Optional[BlobStore] = None) -> dict:
     '''存储分组测试结果
     - 🎯持久化完整地存储「分组测试」的结果
     - 🎯方便后续分析
     - 🚩目前转换为一个字典，此举无需依赖`json`标准库
+    - 📌亦接受「展示格式」（如从结果日志中重建的结果）
+    - ✨`blobs`：将程序输出存为压缩块，JSON中只保留引用
     '''
 
     # 构造数据 #
@@ -259,81 +586,31 @@ def jsonify_group_test(result: GroupTestResult) -> dict:
     # 注入数据 #
     for (group_name, cross_result) in result.items():
         group_data: Dict[str, Dict[str, dict]] = {}
-        # Dict[Tuple[NARSType, TestFile], TestResult]
+        # Dict[Tuple[str, str], TestResult]
         # 分两层：测试文件→推理器类型
-        for ((nars_type, test_file), test_result) in cross_result.items():
-            if test_file.name not in group_data:
-                group_data[test_file.name] = {}
-            file_test_data: Dict[str, dict] = group_data[test_file.name]
-            if nars_type.name not in file_test_data:
-                file_test_data[nars_type.name] = {}
-            file_test_data[nars_type.name] = test_result.to_json()
+        for ((nars_name, test_name), test_result) in result_to_show(cross_result).items():
+            if test_name not in group_data:
+                group_data[test_name] = {}
+            file_test_data: Dict[str, dict] = group_data[test_name]
+            if nars_name not in file_test_data:
+                file_test_data[nars_name] = {}
+            file_test_data[nars_name] = test_result.to_json(blobs)
         data[group_name] = group_data
 
     # 返回数据 #
     return data
 
 
-def test_results_to_csv(group_results: GroupTestResult) -> Union[str, bytes]:
+def test_results_to_csv(group_results: Union[GroupTestResult, GroupTestResultToShow]) -> Union[str, bytes]:
     '''将分组测试结果转换为CSV文件（内容字节串）
     - 🚩现在将字符串转换为UTF-8编码的字节串并前缀UTF-8-SIG
         - ✅【2024-05-26 19:48:43】目前已成功解决「Windows系统下Excel打开CSV乱码」问题
+    - 🚩【2024-06-20】改由流式写入器`CsvResultWriter`生成，名称中的逗号等会被正确转义
+        - 📌直接保存到文件时，应使用`CsvResultWriter.open`，无需在内存中生成完整内容
     '''
-
-    csv = ''
-    '''表格字符串'''
-    line_num = 0
-    '''自增行号（序号）'''
-
-    def add_row(group_name: str, nars: str, test: str, success: str, steps: str, time_diff: str, line_num_header: Optional[str] = None):
-        '''打印一行'''
-        nonlocal csv, line_num
-        # 序号/表头
-        n_line: str
-        if line_num_header is None:  # 是测试用例⇒序号自增
-            line_num += 1
-            n_line = str(line_num)
-        else:
-            n_line = line_num_header
-        # 直接加进一行
-        csv += ','.join([
-            n_line,
-            group_name,
-            nars,
-            test,
-            success,
-            steps,
-            time_diff,
-        ]) + '\n'
-
-    # 表头 | ⚠️【2024-05-26 17:30:02】此处全英文：避免中文编码问题
-    add_row(
-        "测试组",
-        "推理器类型",
-        "推理测试名称",
-        "是否成功",
-        "步数",
-        "运行耗时(秒)",
-        line_num_header='序号',
-    )
-
-    # 表格
-    for group_name, cross_result in group_results.items():
-        for (nars, test), result in cross_result.items():
-            # 成功与否
-            success = '是' if result.success else '否'
-            # 成功步数/失败（不显示）
-            steps = (
-                '，'.join(map(str, result.success_cycles))
-                if result.success_cycles
-                else '')
-            time_diff = str(result.time_diff)
-            add_row(group_name,
-                    nars.name,
-                    test.name,
-                    success,
-                    steps,
-                    time_diff)
+    buffer = StringIO()
+    CsvResultWriter(buffer).write_group_results(group_results)
+    csv = buffer.getvalue()
 
     # 返回 | 根据启用的编码决定
     if constants.CSV_BOM is None:
@@ -343,12 +620,14 @@ def test_results_to_csv(group_results: GroupTestResult) -> Union[str, bytes]:
         return constants.CSV_BOM + encoded
 
 
-def store_group_test(group_results: GroupTestResult, file_root: str, file_name: str):
+def store_group_test(group_results: Union[GroupTestResult, GroupTestResultToShow], file_root: str, file_name: str, *, csv: bool = True):
     '''存储分组测试结果
     - 🎯持久化完整地存储「分组测试」的结果
     - 🎯方便后续分析
+    - 🚩CSV逐行流式写入文件
+    - ✨`csv`：为假时不保存CSV（如CSV已在测试过程中边测边写）
     '''
-    def try_save(generator: Callable[[GroupTestResult], Union[str, bytes]], file_name: str):
+    def try_save(generator: Callable[[Union[GroupTestResult, GroupTestResultToShow]], Union[str, bytes]], file_name: str):
         '''尝试从函数生成并保存数据
         Args:
             - generator: 接收测试组结果，返回字符串或字节串 的生成函数
@@ -378,11 +657,30 @@ def store_group_test(group_results: GroupTestResult, file_root: str, file_name:
     # 保存JSON
     from json import dumps
     try_save(
-        lambda results: dumps(jsonify_group_test(results), indent=4),
+        lambda results: dumps(
+            jsonify_group_test(results, output_blob_store()), indent=4),
         f'{file_name}.json')
 
-    # 保存CSV
-    try_save(test_results_to_csv, f'{file_name}.csv')
+    # 保存CSV | 流式写入
+    if csv:
+        file_path = file_root + f'{file_name}.csv'
+        try:
+            print(f'正在保存测试结果到 {file_path} ……')
+            with CsvResultWriter.open(file_path, flush_each_row=False) as writer:
+                writer.write_group_results(group_results)
+            print(f'测试结果已成功保存到 {file_path}')
+        except BaseException as e:
+            print(f'存储测试结果到 {file_name}.csv失败：{e}')
+
+    # 写入SQLite结果库（若启用）
+    if constants.RESULT_STORE_DATABASE is not None:
+        from result_store import ResultStore
+        try:
+            with ResultStore(constants.RESULT_STORE_DATABASE, output_blob_store()) as store:
+                n = store.store_group_results(file_name, group_results)
+            print(f'已将 {n} 条测试结果写入 {constants.RESULT_STORE_DATABASE}')
+        except BaseException as e:
+            print(f'写入测试结果库 {constants.RESULT_STORE_DATABASE} 失败：{e}')
 
 
 # 主程序
@@ -393,7 +691,7 @@ def main(argv: List[str] = []):
     def parse_arg_and_int(
             arg_name: str,
             default_on_not_exists=None,
-            default_on_no_arg: int = 0,
+            default_on_no_arg: Optional[int] = 0,
     ) -> Optional[int]:
         '''解析带数值的参数
         - 🎯解析形如"--arg-name 123"(=> 123)的语法
@@ -420,13 +718,96 @@ def main(argv: List[str] = []):
         '--diff-alert', None, 0)  # 默认仅在「部分成功」时
     diff_level = parse_arg_and_int(
         '--diff-level', 2, 2)  # 默认为2（精确到「步长」）
+    workers = parse_arg_and_int(
+        '--workers', None, constants.CROSS_TEST_WORKERS)  # 默认使用常量配置
+    workers_per_nars = parse_arg_and_int(
+        '--workers-per-nars', None, None)  # 默认使用常量配置
+    output_limit = parse_arg_and_int(
+        '--output-limit', None, None)  # 默认使用常量配置
+    repeats = parse_arg_and_int(
+        '--repeat', None, None)  # 默认使用常量配置
+    flaky_check_runs = parse_arg_and_int(
+        '--flaky-check', None, 10)  # 默认运行10次
+
+    # 限制每个输出流在内存中保存的字节数：`--output-limit 【字节数】`
+    if output_limit is not None:
+        constants.OUTPUT_CAPTURE_LIMIT = output_limit
+    # 清理过旧的输出临时文件
+    if constants.OUTPUT_SPILL_DIR is not None:
+        from output_capture import prune_spill_files
+        prune_spill_files(constants.OUTPUT_SPILL_DIR, constants.OUTPUT_SPILL_MAX_AGE)
+
+    # 按历史耗时「最长任务优先」调度：`--longest-first`
+    if '--longest-first' in argv:
+        constants.CROSS_TEST_LONGEST_FIRST = True
+
+    # 测试结果缓存：`--cache`启用，`--no-cache`跳过读取（仍刷新缓存）
+    if '--cache' in argv:
+        constants.RESULT_CACHE_ENABLED = True
+    if '--no-cache' in argv:
+        constants.RESULT_CACHE_BYPASS = True
+
+    # 隔离不稳定测试：`--quarantine retry|report`
+    if '--quarantine' in argv and argv.index('--quarantine') + 1 < len(argv):
+        quarantine_mode = argv[argv.index('--quarantine') + 1]
+        from flakiness import QUARANTINE_MODES
+        if quarantine_mode not in QUARANTINE_MODES:
+            print(f'未知的隔离方式 {quarantine_mode!r}，可选：{"、".join(QUARANTINE_MODES)}')
+            return
+        constants.QUARANTINE_MODE = quarantine_mode
+
+    # 检测不稳定测试：`--flaky-check 【运行次数】`
+    # * 🚩每个测试重复运行，结束后更新不稳定度文件；检测期间不隔离，以免重新运行掩盖失败
+    # * 🚩每次运行只尝试首个超时时长：超时阶梯上的重试同样会掩盖失败
+    if flaky_check_runs is not None:
+        repeats = max(2, flaky_check_runs)
+        constants.QUARANTINE_MODE = None
+        constants.SINGLE_ATTEMPT = True
+
+    # 从已有结果续跑：`--resume 【结果文件路径】`
+    previous = None
+    if '--resume' in argv and argv.index('--resume') + 1 < len(argv):
+        resume_path = argv[argv.index('--resume') + 1]
+        try:
+            previous = load_previous_results(resume_path)
+        except (OSError, ValueError) as e:
+            print(f'读取已有测试结果 {resume_path} 失败：{e}')
+            return
+        print(f'已从 {resume_path} 加载 {len(previous)} 个已有测试结果')
+
+    # 根据历史运行耗时自适应「超时杀Java」时长
+    if '--adaptive-timeouts' in argv:
+        from timeout_policy import AdaptiveTimeoutPolicy
+        policy = AdaptiveTimeoutPolicy.from_result_root(
+            constants.TEST_RESULT_FILE_ROOT)
+        for nars_type in ALL_NARS_TYPES:
+            nars_type.timeout_policy = policy
+
+    # 结果日志与进度CSV：每个测试完成即写入 #
+    # * 📌进度CSV按完成顺序写入（并行时每次不同）；运行结束后从日志按测试顺序另行生成最终的CSV
+    file_name = constants.TEST_RESULT_FILE_NAME()
+    '''文件名（不含扩展名）'''
+    log_path = constants.TEST_RESULT_FILE_ROOT + f'{file_name}.jsonl'
+    csv_path = constants.TEST_RESULT_FILE_ROOT + f'{file_name}.progress.csv'
 
     # 计时开始 #
-    try:
-        result, total_time = main_test()
-    except KeyboardInterrupt:
-        print('\n用户中断测试，主程序退出')
-        return
+    with ResultLog(log_path, constants.RESULT_SAVING_ENCODING, output_blob_store()) as result_log, \
+            CsvResultWriter.open(csv_path) as csv_writer:
+        try:
+            result, total_time = main_test(
+                workers=workers,
+                workers_per_nars=workers_per_nars,
+                result_log=result_log,
+                csv_writer=csv_writer,
+                previous=previous,
+                repeats=repeats)
+        except KeyboardInterrupt:
+            print(f'\n用户中断测试，主程序退出；已完成的测试结果保存在 {log_path} 与 {csv_path}')
+            return
+
+    # 更新不稳定度文件 #
+    if flaky_check_runs is not None:
+        main_update_flakiness(result)
 
     # 展示结果 #
     # * 🚩【2024-05-31 17:33:57】仅展示两级（大量测试不方便对比时间）
@@ -436,8 +817,13 @@ def main(argv: List[str] = []):
         diff_level=diff_level,
         diff_alert_max_level=diff_alert_max_level)
 
-    # 存储结果 #
-    main_store(result)
+    # 存储结果：从日志按测试顺序生成JSON与CSV，之后删去进度CSV #
+    main_store_log(log_path, file_name)
+    if path.exists(constants.TEST_RESULT_FILE_ROOT + f'{file_name}.csv'):
+        try:
+            remove(csv_path)
+        except OSError as e:
+            print(f'删除进度CSV {csv_path} 失败：{e}')
 
 
 def main_test(
@@ -445,16 +831,39 @@ def main_test(
     test_files: List[TestFile] = ALL_TEST_FILES,
     verbose_on_success: bool = True,
     verbose_on_fail: bool = True,
+    workers: Optional[int] = None,
+    workers_per_nars: Optional[int] = None,
+    result_log: Optional[ResultLog] = None,
+    csv_writer: Optional[CsvResultWriter] = None,
+    previous: Optional[CrossTestResultToShow] = None,
+    repeats: Optional[int] = None,
+    longest_first: Optional[bool] = None,
 ):
-    '''实际运行测试'''
+    '''实际运行测试
+    - ✨`previous`：续跑时已有的测试结果，已有的「推理器×测试」不再运行
+    - ✨`repeats`：每个测试运行的次数（重复测量），默认为`constants.REPEAT_COUNT`
+    - ✨`longest_first`：按历史耗时「最长任务优先」调度，默认为`constants.CROSS_TEST_LONGEST_FIRST`
+    '''
     now = time()
 
     # 计算结果 #
     # * 🚩【2024-05-09 20:28:22】现在直接测试所有的「NARS类型×测试文件」组合
-    result = group_test(
-        nars_types, test_files,
-        verbose_on_success=verbose_on_success,
-        verbose_on_fail=verbose_on_fail,)
+    try:
+        result = group_test(
+            nars_types, test_files,
+            verbose_on_success=verbose_on_success,
+            verbose_on_fail=verbose_on_fail,
+            workers=workers,
+            workers_per_nars=workers_per_nars,
+            result_log=result_log,
+            csv_writer=csv_writer,
+            previous=previous,
+            repeats=repeats,
+            longest_first=longest_first,)
+    # 关闭「会话模式」下常驻的推理器进程
+    finally:
+        for nars_type in nars_types:
+            nars_type.close_sessions()
 
     # 计算实际总耗时 #
     total_time = time() - now
@@ -463,6 +872,25 @@ def main_test(
     return result, total_time
 
 
+def main_update_flakiness(result: GroupTestResult):
+    '''以重复测量的结果更新不稳定度文件，并列出不稳定的测试'''
+    from flakiness import FlakinessScores
+    try:
+        scores = FlakinessScores.load(constants.FLAKINESS_FILE)
+    except (OSError, ValueError) as e:
+        print(f'读取不稳定度文件 {constants.FLAKINESS_FILE} 失败，将重新生成：{e}')
+        scores = FlakinessScores(constants.FLAKINESS_FILE)
+    flaky = scores.update(
+        (nars_name, test_name, test_result)
+        for cross_result in result.values()
+        for ((nars_name, test_name), test_result) in result_to_show(cross_result).items())
+    scores.save()
+    print(f'不稳定度已保存到 {constants.FLAKINESS_FILE}，其中 {len(flaky)} 个测试不稳定：')
+    for (nars_name, test_name) in flaky:
+        entry = scores.get(nars_name, test_name)
+        print(f'- {nars_name} @ {test_name}: {entry.passes}/{entry.runs} passed')
+
+
 def main_store(result: GroupTestResult):
     '''以默认配置保存某测试'''
     file_root = constants.TEST_RESULT_FILE_ROOT
@@ -471,6 +899,17 @@ def main_store(result: GroupTestResult):
     store_group_test(result, file_root=file_root, file_name=file_name)
 
 
+def main_store_log(log_path: str, file_name: str, *, csv: bool = True):
+    '''从结果日志生成`.json`/`.csv`，以默认配置保存
+    - 🚩按测试顺序重排日志中的结果
+    - ✨`csv`：为假时不生成CSV（见[`store_group_test`]）
+    '''
+    result = order_group_result(
+        load_result_log(log_path, constants.RESULT_SAVING_ENCODING))
+    store_group_test(
+        result, file_root=constants.TEST_RESULT_FILE_ROOT, file_name=file_name, csv=csv)
+
+
 def show_test_result(
     result: GroupTestResult, total_time: Optional[float] = None,
     show_diff: bool = True,
@@ -0,0 +1,130 @@
+'''重复测量的样本统计
+- 🎯单次运行耗时只是一个样本：两个推理器的耗时「不相等」多半只是噪声
+- 🚩同一「推理器×测试」运行多次，对各次的耗时、步数计算
+    - 中位数、第95百分位数
+    - 中位数的自助法（bootstrap）置信区间：有放回地重抽样，取各次重抽样中位数的百分位数
+- 🚩两组样本「有显著差异」⇔置信区间不重叠
+    - 📌一维区间两两重叠⇔有公共交集：只需比较「下界的最大值」与「上界的最小值」
+- 📌重抽样使用固定的随机种子：同一组样本的统计结果总是相同
+- 📌NumPy为可选依赖：安装时向量化重抽样，否则退回纯Python实现
+'''
+
+import random
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from util import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+BOOTSTRAP_SEED = 0
+'''自助法重抽样所用的随机种子'''
+
+
+def median(values: Sequence[float]) -> float:
+    '''中位数'''
+    return percentile(values, 0.5)
+
+
+def bootstrap_ci(
+        values: Sequence[float],
+        *,
+        confidence: float = 0.95,
+        n_resamples: int = 1000,
+        statistic: Callable[[Sequence[float]], float] = median) -> Tuple[float, float]:
+    '''统计量（默认为中位数）的自助法置信区间
+    - 🚩有放回地重抽样`n_resamples`次，取各次统计量的双侧百分位数
+    - 📌只有一个样本、或样本全部相同⇒区间退化为一点
+    - ⚠️空序列会报错
+    - ⚠️NumPy的向量化实现只用于中位数
+    '''
+    if not values:
+        raise ValueError('不能对空序列计算置信区间')
+    alpha = (1 - confidence) / 2
+    if len(values) == 1 or min(values) == max(values):
+        return values[0], values[0]
+    if np is not None and statistic is median:
+        rng = np.random.default_rng(BOOTSTRAP_SEED)
+        resamples = rng.choice(np.asarray(values, dtype=float),
+                               size=(n_resamples, len(values)))
+        estimates = np.median(resamples, axis=1)
+        return float(np.quantile(estimates, alpha)), float(np.quantile(estimates, 1 - alpha))
+    rng = random.Random(BOOTSTRAP_SEED)
+    estimates = [
+        statistic(rng.choices(values, k=len(values)))
+        for _ in range(n_resamples)]
+    return percentile(estimates, alpha), percentile(estimates, 1 - alpha)
+
+
+class SampleStats:
+    '''一组样本的统计'''
+
+    __slots__ = ('n', 'median', 'p95', 'ci_low', 'ci_high')
+
+    n: int
+    '''样本数'''
+
+    median: float
+    '''中位数'''
+
+    p95: float
+    '''第95百分位数'''
+
+    ci_low: float
+    '''中位数置信区间的下界'''
+
+    ci_high: float
+    '''中位数置信区间的上界'''
+
+    def __init__(self, n: int, median: float, p95: float, ci_low: float, ci_high: float) -> None:
+        self.n = n
+        self.median = median
+        self.p95 = p95
+        self.ci_low = ci_low
+        self.ci_high = ci_high
+
+    @staticmethod
+    def of(values: Sequence[float], *,
+           confidence: Optional[float] = None,
+           n_resamples: Optional[int] = None) -> Optional['SampleStats']:
+        '''计算一组样本的统计：空序列⇒`None`
+        - 🚩置信水平、重抽样次数未指定⇒使用`constants`中的配置
+        '''
+        if not values:
+            return None
+        # ⚠️需要动态导入 以避免循环导入
+        import constants
+        if confidence is None:
+            confidence = constants.BOOTSTRAP_CONFIDENCE
+        if n_resamples is None:
+            n_resamples = constants.BOOTSTRAP_RESAMPLES
+        values = list(values)
+        ci_low, ci_high = bootstrap_ci(
+            values, confidence=confidence, n_resamples=n_resamples)
+        return SampleStats(
+            len(values), median(values), percentile(values, 0.95), ci_low, ci_high)
+
+    def overlaps(self, other: 'SampleStats') -> bool:
+        '''置信区间是否重叠（即无显著差异）'''
+        return self.ci_low <= other.ci_high and other.ci_low <= self.ci_high
+
+    def __str__(self) -> str:
+        return (f'{self.median:.4g} (p95 {self.p95:.4g}, '
+                f'CI [{self.ci_low:.4g}, {self.ci_high:.4g}], n={self.n})')
+
+    def to_json(self) -> Dict[str, float]:
+        return {
+            'n': self.n,
+            'median': self.median,
+            'p95': self.p95,
+            'ci_low': self.ci_low,
+            'ci_high': self.ci_high,
+        }
+
+
+def all_overlap(stats: Iterable[SampleStats]) -> bool:
+    '''所有置信区间是否有公共交集（即两两之间均无显著差异）'''
+    stats = list(stats)
+    return not stats or max(s.ci_low for s in stats) <= min(s.ci_high for s in stats)
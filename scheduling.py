@@ -0,0 +1,68 @@
+'''按预计耗时调度测试任务（最长任务优先）
+- 🎯并行测试时，按NAL顺序派发会把耗时长的测试（如稳定性测试、NAL-6的变量测试）留到最后，拉长总耗时
+- 🚩从历史测试结果中估计每个「推理器×测试」的耗时，按「最长任务优先」（LPT）的顺序派发
+    - 📌估计值：历次成功运行耗时的中位数
+        - ⚠️不含取自结果缓存（`cached`）的结果：并未实际运行，其耗时只是某次旧运行的重复
+        - 📌本次运行中命中缓存的任务不会被派发，无需估计
+    - 📌没有历史⇒同一测试在其它推理器上的估计值的中位数⇒所有估计值的中位数⇒0
+- 📌只影响派发顺序：结果仍按原有顺序（测试优先，再推理器）汇总与保存
+'''
+
+from typing import Dict, List, Optional, Tuple
+
+from timeout_policy import RunTimeHistory, latest_result_files, load_run_time_history
+from toolchain import NARSType, TestFile
+from util import *
+
+
+class DurationEstimates:
+    '''每个「推理器×测试」的预计耗时'''
+
+    estimates: Dict[Tuple[str, str], float]
+    '''(推理器名, 测试名) ⇒ 历次成功运行耗时的中位数（秒）'''
+
+    test_estimates: Dict[str, float]
+    '''测试名 ⇒ 该测试在各推理器上估计值的中位数（秒）'''
+
+    default: float
+    '''所有估计值的中位数（秒）；没有历史⇒0'''
+
+    def __init__(self, history: RunTimeHistory) -> None:
+        self.estimates = {
+            pair: percentile(samples, 0.5)
+            for (pair, samples) in history.items()
+            if samples}
+        by_test: Dict[str, List[float]] = {}
+        for ((_, test_name), estimate) in self.estimates.items():
+            by_test.setdefault(test_name, []).append(estimate)
+        self.test_estimates = {
+            test_name: percentile(estimates, 0.5)
+            for (test_name, estimates) in by_test.items()}
+        self.default = (
+            percentile(self.estimates.values(), 0.5)
+            if self.estimates else 0.0)
+
+    @staticmethod
+    def from_result_root(file_root: str, max_runs: Optional[int] = 30) -> 'DurationEstimates':
+        '''从结果目录中最近的若干次运行构造
+        - 🚩与自适应超时共用[`load_run_time_history`]：跳过失败与取自缓存的结果
+        '''
+        return DurationEstimates(load_run_time_history(latest_result_files(file_root, max_runs)))
+
+    def expected(self, nars_type: NARSType, test_file: TestFile) -> float:
+        '''某「推理器×测试」的预计耗时（秒）'''
+        estimate = self.estimates.get((nars_type.name, test_file.name))
+        if estimate is not None:
+            return estimate
+        return self.test_estimates.get(test_file.name, self.default)
+
+
+def longest_first_ranks(durations: List[float]) -> List[int]:
+    '''「最长任务优先」的派发名次
+    - 🚩返回每个任务的名次（0最先）：预计耗时越长越靠前；耗时相同⇒保持原顺序
+    '''
+    ranked = sorted(range(len(durations)), key=lambda i: -durations[i])
+    ranks = [0] * len(durations)
+    for (rank, i) in enumerate(ranked):
+        ranks[i] = rank
+    return ranks
@@ -0,0 +1,86 @@
+'''异步运行接口：结果缓存
+- 🎯`test_nal_async`与`NARSType.test_nal`一样读写结果缓存
+'''
+
+import asyncio
+
+import async_runner
+import toolchain
+
+
+def make_result(success: bool) -> toolchain.TestResult:
+    return toolchain.TestResult(
+        success=success,
+        success_cycles=[1] if success else [],
+        launch_cmd_args='',
+        output_std='',
+        output_err='',
+        time_diff=0.1)
+
+
+class SingleAttempt:
+    '''只尝试一次、不限时'''
+    timeout = None
+    not_before = 0.0
+
+    def advance(self, result: toolchain.TestResult) -> bool:
+        return False
+
+
+class FakeNARSType:
+    '''只记录缓存读写的NARS类型'''
+    launch_config_path = 'launch.hjson'
+    output_encodings = None
+
+    def __init__(self, cached):
+        self.cached = cached
+        self.stored = []
+
+    def cached_result(self, test_file):
+        return self.cached
+
+    def cache_result(self, test_file, result):
+        self.stored.append(result)
+
+    def test_attempts(self, test_file):
+        return SingleAttempt()
+
+
+class FakeTestFile:
+    nal_index = '1.0'
+
+
+def fake_runner(calls):
+    async def run_test_nal_async(*args, **kwargs):
+        calls.append(args)
+        return make_result(True)
+    return run_test_nal_async
+
+
+def test_cache_hit_skips_run(monkeypatch):
+    calls = []
+    monkeypatch.setattr(async_runner, 'run_test_nal_async', fake_runner(calls))
+    cached = make_result(True)
+    nars_type = FakeNARSType(cached)
+    result = asyncio.run(async_runner.test_nal_async(nars_type, FakeTestFile()))
+    assert result is cached
+    assert calls == []
+    assert nars_type.stored == []
+
+
+def test_cache_miss_runs_and_stores(monkeypatch):
+    calls = []
+    monkeypatch.setattr(async_runner, 'run_test_nal_async', fake_runner(calls))
+    nars_type = FakeNARSType(None)
+    result = asyncio.run(async_runner.test_nal_async(nars_type, FakeTestFile()))
+    assert len(calls) == 1
+    assert nars_type.stored == [result]
+
+
+def test_without_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(async_runner, 'run_test_nal_async', fake_runner(calls))
+    nars_type = FakeNARSType(make_result(True))
+    asyncio.run(async_runner.test_nal_async(nars_type, FakeTestFile(), use_cache=False))
+    assert len(calls) == 1
+    assert nars_type.stored == []
@@ -0,0 +1,62 @@
+'''差异分析：空结果集
+- 🎯整组为空、整组均为隔离中的测试时，差异分析不应报错（否则结果来不及保存）
+- 📌安装与未安装NumPy两种情形各测一遍
+'''
+
+import pytest
+
+import diff_analyze
+from diff_analyze import DiffMatrix, nars_diff, show_group_diffs
+import toolchain
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def numpy_mode(request, monkeypatch):
+    '''分别以NumPy与纯Python实现运行'''
+    if request.param == 'numpy':
+        if diff_analyze.np is None:
+            pytest.skip('未安装NumPy')
+    else:
+        monkeypatch.setattr(diff_analyze, 'np', None)
+    return request.param
+
+
+def make_result(success: bool, *, quarantined: bool = False) -> toolchain.TestResult:
+    result = toolchain.TestResult(
+        success=success,
+        success_cycles=[1] if success else [],
+        launch_cmd_args='',
+        output_std='',
+        output_err='',
+        time_diff=0.1)
+    result.quarantined = quarantined
+    return result
+
+
+def test_nars_diff_empty(numpy_mode):
+    assert nars_diff({}, 3) == ('', -1)
+
+
+def test_diff_matrix_empty():
+    if diff_analyze.np is None:
+        pytest.skip('未安装NumPy')
+    assert DiffMatrix({}).render(3) == ('', -1)
+
+
+def test_show_group_diffs_empty_group(numpy_mode, capsys):
+    show_group_diffs({'空组': {}}, show_level=3, alert_max_level=3)
+    out = capsys.readouterr().out
+    assert '# 组名 空组 在等级 3 下 无差异' in out
+    assert '分组测试差异分析完毕！' in out
+
+
+def test_show_group_diffs_all_quarantined(numpy_mode, capsys):
+    group = {
+        ('A', 'NAL-1'): make_result(True, quarantined=True),
+        ('B', 'NAL-1'): make_result(False, quarantined=True),
+    }
+    show_group_diffs({'隔离组': group}, show_level=3, alert_max_level=3)
+    out = capsys.readouterr().out
+    assert '# 组名 隔离组 在等级 3 下 无差异' in out
+    assert '隔离中的不稳定测试（2个' in out
+    assert '分组测试差异分析完毕！' in out
@@ -0,0 +1,46 @@
+'''「进程无效」的保存与加载
+- 🎯续跑时按保存时的判定剔除无效结果，不读出程序输出
+'''
+
+from blob_store import BlobStore
+import toolchain
+
+
+def make_result(output_std: str) -> toolchain.TestResult:
+    return toolchain.TestResult(
+        success=False,
+        success_cycles=[],
+        launch_cmd_args='',
+        output_std=output_std,
+        output_err='',
+        time_diff=0.1)
+
+
+def unreadable_store(tmp_path, monkeypatch) -> BlobStore:
+    '''写入后禁止读取的压缩块存储'''
+    blobs = BlobStore(str(tmp_path))
+
+    def resolve(ref):
+        raise AssertionError('不应读出程序输出')
+    monkeypatch.setattr(blobs, 'resolve', resolve)
+    return blobs
+
+
+def test_flag_saved():
+    assert make_result('子进程已关闭').to_json()['process_invalid'] is True
+    assert make_result('ok').to_json()['process_invalid'] is False
+
+
+def test_lazy_result_uses_saved_flag(tmp_path, monkeypatch):
+    blobs = unreadable_store(tmp_path, monkeypatch)
+    for (output, invalid) in (('子进程已关闭\n' * 100, True), ('ok\n' * 100, False)):
+        json = make_result(output).to_json(blobs)
+        assert toolchain.is_blob_ref(json['output_std'])
+        assert toolchain.LazyTestResult(json, blobs).process_invalid() is invalid
+
+
+def test_old_schema_falls_back_to_outputs():
+    json = make_result('子进程已关闭').to_json()
+    del json['process_invalid']
+    json[toolchain.TestResult.SCHEMA_KEY] = 5
+    assert toolchain.LazyTestResult(json).process_invalid() is True
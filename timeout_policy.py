@@ -0,0 +1,138 @@
+'''自适应「超时杀Java」时长策略
+- 🎯根据历史测试结果中的运行耗时，为每个「NARS类型×测试文件」决定起始超时时长
+    - 📌快的测试不必等满统一的起始时长；慢的测试不必多次失败才等到足够长的时长
+- 🚩起始时长 = 历史成功耗时的高百分位数（默认第95百分位）+ 余量
+- 🚩每次重试按固定倍率几何递增
+- 📌历史数据不足时，回退到配置中的时长
+'''
+
+from glob import glob
+from json import loads
+from os import path
+from typing import Dict, List, Optional, Tuple
+
+from toolchain import KillJavaTimeouts, NARSType, TestFile, TimeoutPolicy
+from util import *
+
+RunTimeHistory = Dict[Tuple[str, str], List[float]]
+'''历史运行耗时
+- 🚩(推理器名, 测试名) ⇒ 历次成功运行的耗时（秒）
+'''
+
+
+def load_run_time_history(file_paths: List[str]) -> RunTimeHistory:
+    '''从保存的分组测试结果（JSON）中收集历史运行耗时
+    - 🚩只收集「成功」的运行：失败的运行多为超时被杀，其耗时不反映实际所需时间
+    - 🚩跳过取自结果缓存（`cached`）的结果：并未实际运行，其耗时只是某次旧运行的重复
+    - 📌无法读取的文件会被跳过
+    '''
+    history: RunTimeHistory = {}
+    for file_path in file_paths:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                json = loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f'读取历史测试结果 {file_path} 失败：{e}')
+            continue
+        for group_result in json.values():
+            for test_name, nars_results in group_result.items():
+                for nars_name, test_result in nars_results.items():
+                    if (test_result.get('success')
+                            and not test_result.get('cached')
+                            and 'time_diff' in test_result):
+                        history.setdefault((nars_name, test_name), []).append(
+                            float(test_result['time_diff']))
+    return history
+
+
+def latest_result_files(file_root: str, max_runs: Optional[int] = None) -> List[str]:
+    '''获取结果目录中最近的若干个分组测试结果文件
+    - 🚩文件名中含时间戳，按文件名排序即按时间排序
+    '''
+    file_paths = sorted(glob(path.join(file_root, 'group_result-*.test.json')))
+    return file_paths if max_runs is None else file_paths[-max_runs:]
+
+
+class AdaptiveTimeoutPolicy(TimeoutPolicy):
+    '''根据历史运行耗时自适应的「超时杀Java」时长策略'''
+
+    history: RunTimeHistory
+    '''历史运行耗时'''
+
+    quantile: float
+    '''起始时长所取的百分位数（0~1）'''
+
+    margin: float
+    '''起始时长在百分位数之上的余量（秒）'''
+
+    growth: float
+    '''每次重试时，超时时长的增长倍率'''
+
+    n_steps: int
+    '''超时时长序列的长度（即最多尝试次数）'''
+
+    min_samples: int
+    '''启用自适应所需的最少历史样本数'''
+
+    min_timeout: float
+    '''超时时长的下限（秒）'''
+
+    max_timeout: Optional[float]
+    '''超时时长的上限（秒），`None`表示不设上限'''
+
+    def __init__(
+        self,
+        history: RunTimeHistory,
+        *,
+        quantile: float = 0.95,
+        margin: float = 0.2,
+        growth: float = 1.5,
+        n_steps: int = 4,
+        min_samples: int = 3,
+        min_timeout: float = 0.2,
+        max_timeout: Optional[float] = None,
+    ) -> None:
+        self.history = history
+        self.quantile = quantile
+        self.margin = margin
+        self.growth = growth
+        self.n_steps = n_steps
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+    @staticmethod
+    def from_result_root(file_root: str, max_runs: Optional[int] = 30, **kwargs) -> 'AdaptiveTimeoutPolicy':
+        '''从结果目录中最近的若干次运行构造策略'''
+        file_paths = latest_result_files(file_root, max_runs)
+        return AdaptiveTimeoutPolicy(load_run_time_history(file_paths), **kwargs)
+
+    def start_timeout(self, nars_name: str, test_name: str) -> Optional[float]:
+        '''计算起始超时时长
+        - 🚩历史样本不足⇒`None`
+        '''
+        samples = self.history.get((nars_name, test_name), [])
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_timeout,
+                   percentile(samples, self.quantile) + self.margin)
+
+    def timeouts(self, nars_type: NARSType, test_file: TestFile, configured: KillJavaTimeouts) -> KillJavaTimeouts:
+        '''计算实际使用的超时时长序列
+        - 🚩配置为「不杀Java」⇒仍不杀
+        - 🚩有足够历史⇒从起始时长开始几何递增
+        - 🚩否则⇒使用配置中的时长
+        '''
+        if configured is None:
+            return configured
+        start = self.start_timeout(nars_type.name, test_file.name)
+        if start is None:
+            return configured
+        ladder = [start * self.growth ** i for i in range(self.n_steps)]
+        # 有上限⇒截断到上限，且不重复尝试上限
+        if self.max_timeout is not None:
+            ladder = [
+                timeout for timeout in ladder
+                if timeout < self.max_timeout
+            ] + [self.max_timeout]
+        return ladder
@@ -2,15 +2,43 @@
 - 🚩调用BabelNAR CLI，启动、运行与自动测试NARS
     - 📄使用Python`subprocess`：https://docs.python.org/3/library/subprocess.html
 '''
+import atexit
+import os
 from os import path
+import signal
 import subprocess
 from subprocess import CompletedProcess, Popen
 import re
+from threading import Event, Lock, Thread
 from time import time, sleep
-from typing import Iterable, List, Optional, Union
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
 
+from blob_store import BlobStore, is_blob_ref
+from output_capture import OutputCapture, remove_spill_files, spill_paths_in
 from util import *
 
+if TYPE_CHECKING:
+    # * 📌仅用于类型标注：`sample_stats`会导入NumPy，运行时在用到统计时才动态导入
+    from sample_stats import SampleStats
+
+EXPECT_CYCLE_PATTERN = re.compile(rb'expect-cycle\(([0-9]+)\)')
+'''「预期成功」的标记，并捕获推理步数
+- 🚩直接匹配原始字节：无需先解码输出
+'''
+
+
+def new_output_capture() -> OutputCapture:
+    '''按`constants`中的配置，新建一个输出流的捕获
+    - 📌超出上限后，仍保留所有「预期成功」的行：步数提取不受影响
+    '''
+    # ⚠️需要动态导入 以避免循环导入
+    from constants import OUTPUT_CAPTURE_LIMIT, OUTPUT_CAPTURE_HEAD, OUTPUT_CAPTURE_TAIL, OUTPUT_SPILL_DIR
+    return OutputCapture(OUTPUT_CAPTURE_LIMIT,
+                         head_size=OUTPUT_CAPTURE_HEAD,
+                         tail_size=OUTPUT_CAPTURE_TAIL,
+                         keep=EXPECT_CYCLE_PATTERN,
+                         spill_dir=OUTPUT_SPILL_DIR)
+
 
 class ProcessResult:
     '''进程结果
@@ -18,8 +46,11 @@ class ProcessResult:
     - 🎯兼容并预处理`CompletedProcess`与`Popen`的内容
       - 退出码
       - 标准输入/标准输出/标准错误
+    - 🚩使用`__slots__`：无实例字典，节省内存
     '''
 
+    __slots__ = ('args', 'returncode', 'stdout', 'stderr')
+
     args: str
     '''子进程启动命令（一个字符串）'''
 
@@ -50,13 +81,14 @@ class ProcessResult:
         # 退出码
         self.returncode = process.returncode
 
-        # 标准输出/标准错误
+        # 标准输出/标准错误 | 🚩分块读取，超出上限的部分写入临时文件
         assert process.stdout is not None
         assert process.stderr is not None
-        self.stdout = process.stdout.read()
-        process.stdout.close()
-        self.stderr = process.stderr.read()
-        process.stderr.close()
+        stdout, stderr = new_output_capture(), new_output_capture()
+        stdout.read_from(process.stdout)
+        self.stdout = stdout.finish()
+        stderr.read_from(process.stderr)
+        self.stderr = stderr.finish()
 
     def from_completed_process(self, process: CompletedProcess):
         '''从`CompletedProcess`初始化对象
@@ -82,8 +114,122 @@ class ProcessResult:
             return self.from_completed_process(process)
 
 
+class OutputEncodings:
+    '''程序输出的候选编码表
+    - 🎯记住每种NARS实际使用的后备编码，之后的结果优先尝试该编码
+    - 🚩首选编码（默认为UTF-8）总是最先、严格地尝试：有效的UTF-8输出总是按UTF-8解码
+        - ⚠️不能将后备编码（如GBK）移到首选编码之前：许多UTF-8文本也能「成功」按GBK解码，得到乱码
+    - 🚩首选编码解码失败后，才依次尝试后备编码；某后备编码解码成功⇒移至后备编码的最前
+    - 🚩标准输出、标准错误分别记录：二者编码可能不同（如`stderr`为系统的GBK）
+    - 📌可在多个线程中同时使用
+    '''
+
+    __slots__ = ('_fallbacks', '_default', '_lock')
+
+    def __init__(self, candidates: Iterable[str] = ('utf-8', 'gbk')) -> None:
+        self._default = list(candidates)
+        self._fallbacks: Dict[str, List[str]] = {}
+        self._lock = Lock()
+
+    def candidates(self, key: str) -> List[str]:
+        '''某个输出（`output_std`/`output_err`）当前的候选编码（按尝试顺序）
+        - 📌首选编码总在最前
+        '''
+        with self._lock:
+            return self._default[:1] + list(self._fallbacks.get(key, self._default[1:]))
+
+    def decode(self, key: str, raw: bytes) -> str:
+        '''按候选顺序解码某个输出
+        - ⚠️均未能解码⇒抛出[`TestResult.TryDecodeException`]
+        '''
+        candidates = self.candidates(key)
+        errors = []
+        for (i, encoding) in enumerate(candidates):
+            try:
+                text = raw.decode(encoding)
+            except (UnicodeDecodeError, LookupError) as e:
+                errors.append(e)
+                continue
+            # 非首位的后备编码解码成功⇒记住，下次在后备编码中优先尝试
+            if i > 1:
+                with self._lock:
+                    self._fallbacks[key] = [encoding] + [
+                        c for c in candidates[1:] if c != encoding]
+            return text
+        raise TestResult.TryDecodeException(errors)
+
+    def contains(self, key: str, raw: bytes, marker: str) -> bool:
+        '''未解码的输出中是否含有某文本：按各候选编码编码后查找'''
+        for encoding in self.candidates(key):
+            try:
+                if marker.encode(encoding) in raw:
+                    return True
+            except (UnicodeEncodeError, LookupError):
+                pass
+        return False
+
+
+RepeatSample = Tuple[bool, List[int], float]
+'''重复测量中单次运行的样本：(是否成功, 成功步数, 运行耗时)'''
+
+
 class TestResult:
-    '''NAL测试结果'''
+    '''NAL测试结果
+    - 🚩使用`__slots__`：无实例字典，大量加载时节省内存
+    - 🚩序列化格式由显式字段表[`TestResult.FIELDS`]决定，并带有版本号[`TestResult.SCHEMA_VERSION`]
+    - 🚩程序输出可保存原始字节：首次读取时才解码，之后缓存
+    '''
+
+    SCHEMA_VERSION = 6
+    '''序列化格式版本
+    - 📜1：旧版，由实例字典生成，无版本字段
+    - 📜2：显式字段表，带版本字段`schema`
+    - 📜3：新增`cached`字段
+    - 📜4：新增`samples`字段
+    - 📜5：新增`quarantined`、`flaky_retry_count`字段
+    - 📜6：新增`process_invalid`字段（保存时判定，加载后无需读出程序输出）
+    - 📌旧版文件的字段是新版字段的子集，可直接读取
+    '''
+
+    SCHEMA_KEY = 'schema'
+    '''JSON中存放格式版本的键'''
+
+    FIELDS = (
+        'success',
+        'success_cycles',
+        'launch_cmd_args',
+        'output_std',
+        'output_err',
+        'time_diff',
+        'retry_count',
+        'backoff_total',
+        'cached',
+        'samples',
+        'quarantined',
+        'flaky_retry_count',
+        'process_invalid',
+    )
+    '''序列化的字段表（按顺序）
+    - 📌`process_invalid`由程序输出推出，只在保存时写入、加载时由[`LazyTestResult`]读取，不作构造函数参数
+    '''
+
+    __slots__ = (
+        'success',
+        'success_cycles',
+        'launch_cmd_args',
+        '_output_std',
+        '_output_err',
+        'time_diff',
+        'retry_count',
+        'backoff_total',
+        'cached',
+        'samples',
+        'quarantined',
+        'flaky_retry_count',
+        '_encodings',
+        '_stats',
+    )
+    '''实例字段：程序输出存于带下划线的字段，经由同名属性读写'''
 
     success: bool
     '''测试是否成功
@@ -126,6 +272,34 @@ class TestResult:
         - ❌对于一些【只能通过「超时杀进程」方式结束运行】的NARS实现 **无效**
     '''
 
+    retry_count: int
+    '''因「进程无效」而重新运行的次数
+    - 🎯记录测试环境的不稳定程度
+    '''
+
+    backoff_total: float
+    '''因「进程无效」而退避等待的总时长（秒）
+    - 📌不计入[`TestResult.time_diff`]
+    '''
+
+    cached: bool
+    '''是否取自结果缓存（而非实际运行）
+    - 🚩参见`result_cache.py`
+    '''
+
+    samples: Optional[List[RepeatSample]]
+    '''重复测量时各次运行的样本（按运行序号），只运行一次⇒`None`
+    - 🚩参见[`TestResult.from_repeats`]与`sample_stats.py`
+    '''
+
+    quarantined: bool
+    '''运行时是否处于隔离中（不稳定测试）
+    - 🚩参见`flakiness.py`
+    '''
+
+    flaky_retry_count: int
+    '''因「隔离中的不稳定测试失败」而重新运行的次数'''
+
     class TryDecodeException(Exception):
         '''尝试解码的错误
         - 📌包含所有解码错误
@@ -162,19 +336,35 @@ class TestResult:
         success: bool,
         success_cycles: List[int],
         launch_cmd_args: str,
-        output_std: Optional[str],
-        output_err: Optional[str],
+        output_std: Union[str, bytes, None],
+        output_err: Union[str, bytes, None],
         time_diff: float,
+        retry_count: int = 0,
+        backoff_total: float = 0.0,
+        cached: bool = False,
+        samples: Optional[List[RepeatSample]] = None,
+        quarantined: bool = False,
+        flaky_retry_count: int = 0,
+        encodings: Optional[OutputEncodings] = None,
     ):
         '''从纯参数中构造
         - 🎯【2024-05-26 23:29:14】用于从JSON中重建结果
+        - 📌程序输出可为原始字节：首次读取时按`encodings`解码
         '''
+        self._encodings = encodings
         self.success = success
         self.success_cycles = success_cycles
         self.launch_cmd_args = launch_cmd_args
         self.output_std = output_std
         self.output_err = output_err
         self.time_diff = time_diff
+        self.retry_count = retry_count
+        self.backoff_total = backoff_total
+        self.cached = cached
+        self.samples = samples
+        self.quarantined = quarantined
+        self.flaky_retry_count = flaky_retry_count
+        self._stats = None
 
     @staticmethod
     def __default__() -> 'TestResult':
@@ -192,54 +382,120 @@ class TestResult:
         )
 
     @staticmethod
-    def from_process_result(process: ProcessResult, time_diff: float, *, encodings: List[str] = ['utf-8', 'gbk']) -> 'TestResult':
+    def from_process_result(process: ProcessResult, time_diff: float, *, encodings: Union[List[str], OutputEncodings] = ['utf-8', 'gbk'], success: Optional[bool] = None) -> 'TestResult':
         '''构造函数，直接从进程得来
         - 🚩从子进程获取测试结果
+        - 🚩输出保留原始字节，首次读取时才解码
+            - 📌大部分结果的输出从不被读取（如成功且不展示详情）
 
         Args:
             process(ProcessResult): 待转换的进程结果
-            encodings(str, optional): 输出编码，默认值 = 'utf-8'
+            encodings(List[str] | OutputEncodings, optional): 候选的输出编码，默认先UTF-8后GBK
+                - 📌传入`OutputEncodings`（如`NARSType.output_encodings`）⇒记住实际使用的编码
+            success(bool, optional): 已知的「是否成功」（如来自输出监视器），默认按退出码判断
         '''
 
         # 退出码 ⇒ 是否成功
-        success = process.returncode == 0
+        if success is None:
+            success = process.returncode == 0
 
         # 转换命令行参数
         launch_cmd_args = process.args
 
-        # 转换输出，标准输出&标准错误
+        # 候选编码
         # * 📌【2024-04-26 11:32:49】有可能遇到编码问题：`stderr`还是GBK编码
         # * 📄转换「标准错误」时出现：`\r\nprogram exited with EOF\xb4\xed\xce\xf3: \xc3\xbb\xd3\xd0\xd5\xd2\xb5\xbd\xbd\xf8\xb3\xcc "4008"\xa1\xa3\r\n`
-        try:
-            output_std = TestResult.try_decode(process.stdout, encodings)
-        except BaseException as e:
-            print(f'转换「标准输出」时出现错误：{e}\n标准错误：{repr(process.stdout)}')
-            output_std = None
-        try:
-            output_err = TestResult.try_decode(process.stderr, encodings)
-        except BaseException as e:
-            print(f'转换「标准错误」时出现错误：{e}\n标准错误：{repr(process.stderr)}')
-            output_err = None
+        if not isinstance(encodings, OutputEncodings):
+            encodings = OutputEncodings(encodings)
 
-        # 从标准输出中提取「成功步数」
+        # 从标准输出（原始字节）中提取「成功步数」
         success_cycles = [
-            int(num_str)
-            for num_str in re.findall(r'expect-cycle\(([0-9]+)\)', output_std)
-        ] if output_std else []
-
-        # 耗时
-        time_diff = time_diff
+            int(num_bytes)
+            for num_bytes in EXPECT_CYCLE_PATTERN.findall(process.stdout)
+        ] if process.stdout else []
 
         # 构造 & 返回
         return TestResult(
             success=success,
             success_cycles=success_cycles,
             launch_cmd_args=launch_cmd_args,
-            output_std=output_std,
-            output_err=output_err,
+            output_std=process.stdout,
+            output_err=process.stderr,
             time_diff=time_diff,
+            encodings=encodings,
+        )
+
+    @staticmethod
+    def from_repeats(results: List['TestResult']) -> 'TestResult':
+        '''合并同一测试的多次运行（重复测量）
+        - 🚩保存各次运行的样本（是否成功、成功步数、运行耗时）
+        - 🚩全部成功才算成功；运行耗时取各次的中位数
+        - 🚩其余字段（启动命令、程序输出、成功步数）取自一次「代表」运行
+            - 有失败⇒第一次失败的运行：便于查看失败原因
+            - 全部成功⇒耗时最接近中位数的运行
+        - 📌重试次数、退避时长为各次之和；任一次处于隔离中⇒处于隔离中
+        '''
+        times = [r.time_diff for r in results]
+        time_median = percentile(times, 0.5)
+        failed = [r for r in results if not r.success]
+        representative = failed[0] if failed else min(
+            results, key=lambda r: abs(r.time_diff - time_median))
+        # 只保留代表运行的输出⇒其余运行的输出临时文件不再被引用
+        for r in results:
+            if r is not representative:
+                r.discard_spill_files()
+        return TestResult(
+            success=not failed,
+            success_cycles=representative.success_cycles,
+            launch_cmd_args=representative.launch_cmd_args,
+            output_std=representative._output_std,
+            output_err=representative._output_err,
+            time_diff=time_median,
+            retry_count=sum(r.retry_count for r in results),
+            backoff_total=sum(r.backoff_total for r in results),
+            samples=[
+                (bool(r.success), list(r.success_cycles), r.time_diff)
+                for r in results],
+            quarantined=any(r.quarantined for r in results),
+            flaky_retry_count=sum(r.flaky_retry_count for r in results),
+            encodings=representative._encodings,
         )
 
+    def discard_spill_files(self) -> None:
+        '''删除程序输出（摘要）所指向的临时文件
+        - 🎯被取代的结果（如超时阶梯中失败的尝试）不会被保存，其临时文件亦无需保留
+        - 🚩在原始字节中查找省略提示：不触发解码（保持惰性解码）
+        - 📌压缩块引用⇒跳过：只有刚运行得到的结果才需要清理临时文件
+        '''
+        for key in TestResult.OUTPUT_FIELDS:
+            value = getattr(self, '_' + key)
+            if isinstance(value, (bytes, str)):
+                remove_spill_files(spill_paths_in(value))
+
+    def time_stats(self) -> Optional['SampleStats']:
+        '''各次运行耗时的统计：无样本⇒`None`'''
+        return self._sample_stats('time')
+
+    def cycles_stats(self) -> Optional['SampleStats']:
+        '''各次成功运行所用步数（取最大的成功步数）的统计：无样本或无成功步数⇒`None`'''
+        return self._sample_stats('cycles')
+
+    def _sample_stats(self, metric: str) -> Optional['SampleStats']:
+        '''计算并缓存样本统计'''
+        if self.samples is None:
+            return None
+        if self._stats is None:
+            # ⚠️需要动态导入 以免导入本模块时即导入NumPy
+            from sample_stats import SampleStats
+            self._stats = {
+                'time': SampleStats.of([time_diff for (_, _, time_diff) in self.samples]),
+                'cycles': SampleStats.of([
+                    float(max(cycles))
+                    for (success, cycles, _) in self.samples
+                    if success and cycles]),
+            }
+        return self._stats[metric]
+
     @ staticmethod
     def from_process(process: Popen, *args, **kwargs) -> 'TestResult':
         '''从子进程获取测试结果
@@ -258,12 +514,30 @@ class TestResult:
         cycles_term = (
             '- 成功的步数：分别为' + "、".join(map(str, self.success_cycles))
             if len(self.success_cycles) > 1 else '')
+        retry_term = (
+            f'- 重新运行：{self.retry_count}次，共退避{self.backoff_total:.2f}s'
+            if self.retry_count > 0 else '')
+        cached_head = '（取自缓存）' if self.cached else ''
+        quarantined_head = '（隔离中）' if self.quarantined else ''
+        flaky_retry_term = (
+            f'- 不稳定测试重新运行：{self.flaky_retry_count}次'
+            if self.flaky_retry_count > 0 else '')
+        repeat_term = (
+            f'- 重复测量：{len(self.samples)}次，成功{sum(success for (success, _, _) in self.samples)}次'
+            + ''.join(
+                f'\n  - {name}：{stats}'
+                for (name, stats) in (('运行耗时(秒)', self.time_stats()), ('步数', self.cycles_stats()))
+                if stats is not None)
+            if self.samples is not None else '')
         return f'''\
-测试结果：{cycles_head}{'✅成功' if self.success else '❌失败'}
+测试结果：{cycles_head}{'✅成功' if self.success else '❌失败'}{cached_head}{quarantined_head}
 - 运行耗时：{self.time_diff:.2f}s
 - 输出：{repr(TestResult.__str__long_str(self.output_std) if self.output_std else '无')}
 - 错误输出：{repr(TestResult.__str__long_str(self.output_err) if self.output_err else '无')}
 {cycles_term}
+{retry_term}
+{flaky_retry_term}
+{repeat_term}
         '''.strip()
 
     @ staticmethod
@@ -274,42 +548,137 @@ class TestResult:
         else:
             return s
 
-    def to_json(self) -> dict:
-        '''将测试数据转换为JSON字符串
+    OUTPUT_FIELDS = ('output_std', 'output_err')
+    '''存放程序输出的字段：可存为压缩块'''
+
+    OUTPUT_NAMES = {'output_std': '标准输出', 'output_err': '标准错误'}
+    '''程序输出字段 ⇒ 提示信息中的名称'''
+
+    def _output(self, key: str) -> Optional[str]:
+        '''读取程序输出：原始字节⇒解码并缓存
+        - ⚠️解码失败⇒提示并视作无输出
+        '''
+        value = getattr(self, '_' + key)
+        if isinstance(value, bytes):
+            try:
+                value = self._output_encodings().decode(key, value)
+            except BaseException as e:
+                print(f'转换「{TestResult.OUTPUT_NAMES[key]}」时出现错误：{e}\n原始输出：{repr(value)}')
+                value = None
+            setattr(self, '_' + key, value)
+        return value
+
+    def _output_encodings(self) -> OutputEncodings:
+        '''解码所用的候选编码表：未指定⇒先UTF-8后GBK'''
+        if self._encodings is None:
+            self._encodings = OutputEncodings()
+        return self._encodings
+
+    def _output_contains(self, key: str, marker: str) -> bool:
+        '''程序输出中是否含有某文本
+        - 🚩尚未解码⇒直接在原始字节中查找，不触发解码
+        '''
+        value = getattr(self, '_' + key)
+        if isinstance(value, bytes):
+            return self._output_encodings().contains(key, value, marker)
+        text = self._output(key)
+        return text is not None and marker in text
+
+    @property
+    def output_std(self) -> Optional[str]:
+        return self._output('output_std')
+
+    @output_std.setter
+    def output_std(self, value: Union[str, bytes, None]) -> None:
+        self._output_std = value
+
+    @property
+    def output_err(self) -> Optional[str]:
+        return self._output('output_err')
+
+    @output_err.setter
+    def output_err(self, value: Union[str, bytes, None]) -> None:
+        self._output_err = value
+
+    def to_json(self, blobs: Optional[BlobStore] = None) -> dict:
+        '''将测试数据转换为JSON对象
         - 🎯后续可将其存储
-        - 🚩【2024-05-14 15:13:44】目前只将其转换为字典
-          - 📌后续要转换为字符串时再转换为字符串
-        - 🔗参考：https://stackoverflow.com/questions/11637293/iterate-over-object-attributes-in-python
-        '''
-        o = {
-            # 键值对
-            key: value
-            # 只在「变量列表」中
-            for (key, value) in self.__dict__.items()
-            # 获取「全小写」「非内部」「不可调用」的属性
-            if (
-                key.lower() == key and  # 全小写（筛掉内部类）
-                not key.startswith('_') and  # 键的开头不是下划线（筛掉内部属性）
-                not callable(value)  # 不可调用（筛掉方法）
-            )
+        - 🚩按显式字段表生成，并附上格式版本
+        - ✨`blobs`：将（较长的）程序输出存入压缩块存储，JSON中只保留引用
+        '''
+        return {
+            TestResult.SCHEMA_KEY: TestResult.SCHEMA_VERSION,
+            'success': self.success,
+            'success_cycles': self.success_cycles,
+            'launch_cmd_args': self.launch_cmd_args,
+            'output_std': self._output_json('output_std', blobs),
+            'output_err': self._output_json('output_err', blobs),
+            'time_diff': self.time_diff,
+            'retry_count': self.retry_count,
+            'backoff_total': self.backoff_total,
+            'cached': self.cached,
+            'samples': None if self.samples is None else [
+                {'success': success, 'success_cycles': cycles, 'time_diff': time_diff}
+                for (success, cycles, time_diff) in self.samples],
+            'quarantined': self.quarantined,
+            'flaky_retry_count': self.flaky_retry_count,
+            'process_invalid': self.process_invalid(),
         }
-        return o
+
+    def _output_json(self, key: str, blobs: Optional[BlobStore]) -> object:
+        '''程序输出字段的JSON值：原文，或压缩块引用'''
+        text = getattr(self, key)
+        return blobs.pack(text) if blobs is not None else text
 
     @staticmethod
-    def from_json(json: dict) -> 'TestResult':
-        '''将JSON字符串转换为测试数据
-        - ⚠️不稳定：容易解析出异常情况
-          - 📄多余/缺少键值对
-          - 📄字段值类型错误
-        - 🚩【2024-05-11 16:52:32】目前直接使用「批量遍历键值对⇒设置值」的方法
-        '''
-        # 构造默认空对象
-        self = TestResult.__default__()
-        # 填充字段
-        for (key, value) in json.items():
-            self.__setattr__(key, value)
-        # 返回
-        return self
+    def _init_kwargs_from_json(json: dict) -> dict:
+        '''校验JSON对象，并转换为构造函数参数
+        - 🚩格式版本：缺省为1（旧版）；高于当前版本⇒报错
+        - 🚩出现字段表以外的键⇒报错
+        - 🚩缺少的字段取默认值（旧版文件可能没有较新的字段）
+        - 📌程序输出字段原样保留（可能为压缩块引用）
+        '''
+        version = json.get(TestResult.SCHEMA_KEY, 1)
+        if not isinstance(version, int) or version > TestResult.SCHEMA_VERSION:
+            raise ValueError(f'不支持的测试结果格式版本：{version!r}')
+        unknown = [
+            key for key in json
+            if key not in TestResult.FIELDS and key != TestResult.SCHEMA_KEY]
+        if unknown:
+            raise ValueError(f'测试结果中有未知字段：{unknown}')
+        return {
+            'success': bool(json.get('success', False)),
+            'success_cycles': list(json.get('success_cycles') or []),
+            'launch_cmd_args': json.get('launch_cmd_args', ''),
+            'output_std': json.get('output_std'),
+            'output_err': json.get('output_err'),
+            'time_diff': float(json.get('time_diff', 0)),
+            'retry_count': int(json.get('retry_count', 0)),
+            'backoff_total': float(json.get('backoff_total', 0.0)),
+            'cached': bool(json.get('cached', False)),
+            'samples': None if json.get('samples') is None else [
+                (bool(sample.get('success', False)),
+                 list(sample.get('success_cycles') or []),
+                 float(sample.get('time_diff', 0)))
+                for sample in json['samples']],
+            'quarantined': bool(json.get('quarantined', False)),
+            'flaky_retry_count': int(json.get('flaky_retry_count', 0)),
+        }
+
+    @staticmethod
+    def from_json(json: dict, blobs: Optional[BlobStore] = None) -> 'TestResult':
+        '''将JSON对象转换为测试数据
+        - 🚩按显式字段表读取，兼容旧版（无版本字段）的文件
+        - ⚠️格式版本过高、含未知字段⇒`ValueError`
+        - 🚩值为压缩块引用⇒从`blobs`（默认为`BlobStore.default()`）中读出
+        '''
+        kwargs = TestResult._init_kwargs_from_json(json)
+        for key in TestResult.OUTPUT_FIELDS:
+            if is_blob_ref(kwargs[key]):
+                if blobs is None:
+                    blobs = BlobStore.default()
+                kwargs[key] = blobs.resolve(kwargs[key])
+        return TestResult(**kwargs)
 
     def process_invalid(self) -> bool:
         '''是否进程无效
@@ -318,14 +687,67 @@ class TestResult:
             - 🚩【2024-05-30 10:02:32】目前处理办法：遇到此类情况，直接重做
         '''
         return (
-            self.output_std is not None
-            and '子进程已关闭' in self.output_std  # 🚩判断标准输出是否意外终止（⚠️仅中文）
+            self._output_contains('output_std', '子进程已关闭')  # 🚩判断标准输出是否意外终止（⚠️仅中文）
         ) or (
-            self.output_err is not None
-            and 'SendError' in self.output_err  # 🚩判断BabelNAR CLI是否存在「消息发送失败」情况
+            self._output_contains('output_err', 'SendError')  # 🚩判断BabelNAR CLI是否存在「消息发送失败」情况
         )
 
 
+class LazyTestResult(TestResult):
+    '''惰性加载的测试结果
+    - 🎯加载保存的结果时，只立即读取概要（是否成功、成功步数、运行耗时等）
+        - 📌程序输出（可能为压缩块引用）在首次访问时才读出并解压，之后缓存
+    - 🚩重新保存时：输出仍为同一存储中的压缩块引用⇒直接沿用引用，无需读出
+    - 🚩「进程无效」：直接使用保存时的判定，无需读出程序输出
+    '''
+
+    __slots__ = ('_blobs', '_process_invalid')
+
+    _blobs: Optional[BlobStore]
+    '''解析压缩块引用所用的存储，`None`表示`BlobStore.default()`'''
+
+    _process_invalid: Optional[bool]
+    '''保存时判定的「进程无效」，`None`表示未保存（旧版文件）'''
+
+    def __init__(self, json: dict, blobs: Optional[BlobStore] = None) -> None:
+        '''从JSON对象中构造：概要字段直接填充，程序输出暂存原始值（文本、`None`或压缩块引用）
+        - ⚠️校验规则同[`TestResult.from_json`]
+        '''
+        self._blobs = blobs
+        invalid = json.get('process_invalid')
+        self._process_invalid = None if invalid is None else bool(invalid)
+        super().__init__(**TestResult._init_kwargs_from_json(json))
+
+    def process_invalid(self) -> bool:
+        '''是否进程无效
+        - 🚩有保存时的判定⇒直接使用
+        - ⚠️旧版文件（格式版本6之前）⇒只能读出程序输出再判断
+        '''
+        if self._process_invalid is not None:
+            return self._process_invalid
+        return super().process_invalid()
+
+    def _output(self, key: str) -> Optional[str]:
+        '''读取程序输出：引用⇒解析并缓存'''
+        value = getattr(self, '_' + key)
+        if is_blob_ref(value):
+            if self._blobs is None:
+                self._blobs = BlobStore.default()
+            setattr(self, '_' + key, self._blobs.resolve(value))
+        return super()._output(key)
+
+    def _output_json(self, key: str, blobs: Optional[BlobStore]) -> object:
+        '''程序输出字段的JSON值
+        - 🚩未读出的引用，且目标存储与来源相同⇒直接沿用引用
+        '''
+        value = getattr(self, '_' + key)
+        if (is_blob_ref(value) and blobs is not None
+                and path.abspath(blobs.root) == path.abspath(
+                    (self._blobs or BlobStore.default()).root)):
+            return value
+        return super()._output_json(key, blobs)
+
+
 KillJavaTimeouts = Optional[Iterable[float]]
 '''杀Java超时时间（迭代器）
 - 🔧值含义
@@ -427,6 +849,120 @@ class TestFile:
             return self.local_kill_java_timeouts
 
 
+class TestAttempts:
+    '''单个测试的「尝试」状态
+    - 🎯将「超时时长阶梯」与「进程无效⇒指数退避重试」的逻辑从「等待」中分离
+        - 📌阻塞调用方可直接`sleep`，调度器则可在退避期间运行其它测试
+    - 🚩每次运行后调用[`TestAttempts.advance`]决定下一步
+        - 进程无效 ⇒ 同一超时时长重试，最早在`not_before`时刻开始，退避时长每次翻倍
+        - 失败且还有更长的超时时长 ⇒ 立即以下一超时时长重试
+        - 隔离中的不稳定测试仍失败，且还有重新运行次数 ⇒ 以最长的超时时长重新运行
+        - 否则 ⇒ 结束，并将重试统计记录到结果中
+    '''
+
+    timeouts: Optional[List[float]]
+    '''超时时长阶梯，`None`表示「不杀Java」'''
+
+    i_timeout: int
+    '''当前使用的超时时长序号'''
+
+    next_backoff: float
+    '''下一次「进程无效」时的退避时长（秒）'''
+
+    retry_count: int
+    '''已因「进程无效」重新运行的次数'''
+
+    backoff_total: float
+    '''已退避的总时长（秒）'''
+
+    not_before: float
+    '''下一次运行的最早开始时刻（`time()`时间戳）'''
+
+    quarantined: bool
+    '''是否为隔离中的不稳定测试'''
+
+    flaky_retries: int
+    '''不稳定测试失败后剩余的重新运行次数'''
+
+    flaky_retry_count: int
+    '''已因「不稳定测试失败」重新运行的次数'''
+
+    def __init__(self, timeouts: KillJavaTimeouts, initial_backoff: float = 1, *,
+                 quarantined: bool = False, flaky_retries: int = 0) -> None:
+        self.timeouts = None if timeouts is None else list(timeouts)
+        self.i_timeout = 0
+        self.next_backoff = initial_backoff
+        self.retry_count = 0
+        self.backoff_total = 0.0
+        self.not_before = 0.0
+        self.quarantined = quarantined
+        self.flaky_retries = flaky_retries
+        self.flaky_retry_count = 0
+
+    @property
+    def timeout(self) -> Optional[float]:
+        '''当前使用的超时时长'''
+        return None if self.timeouts is None else self.timeouts[self.i_timeout]
+
+    def advance(self, result: TestResult) -> bool:
+        '''根据本次运行的结果决定下一步
+        - 🚩返回是否需要再次运行
+        - 🚩需要再次运行⇒本次结果被取代，删除其输出临时文件
+        '''
+        retry = self._advance(result)
+        if retry:
+            result.discard_spill_files()
+        return retry
+
+    def _advance(self, result: TestResult) -> bool:
+        '''决定下一步（不处理被取代的结果）'''
+        # 只接受「进程有效」的结果
+        if self.timeouts is not None and result.process_invalid():
+            print(f'测试进程意外终止！指数退避{self.next_backoff}s，重新组织测试中……')
+            self.retry_count += 1
+            self.backoff_total += self.next_backoff
+            self.not_before = time() + self.next_backoff
+            self.next_backoff *= 2
+            return True
+        # 失败且还有更长的超时时长 ⇒ 继续尝试
+        if (not result.success
+                and self.timeouts is not None
+                and self.i_timeout + 1 < len(self.timeouts)):
+            self.i_timeout += 1
+            self.next_backoff = 1
+            self.not_before = 0.0
+            return True
+        # 隔离中的不稳定测试仍失败 ⇒ 以最长的超时时长重新运行
+        if not result.success and self.flaky_retries > 0:
+            print(f'不稳定测试失败，重新运行（剩余{self.flaky_retries - 1}次）……')
+            self.flaky_retries -= 1
+            self.flaky_retry_count += 1
+            self.next_backoff = 1
+            self.not_before = 0.0
+            return True
+        # 结束 ⇒ 记录重试统计
+        result.retry_count = self.retry_count
+        result.backoff_total = self.backoff_total
+        result.quarantined = self.quarantined
+        result.flaky_retry_count = self.flaky_retry_count
+        return False
+
+
+class TimeoutPolicy:
+    '''「超时杀Java」时长策略
+    - 🎯根据「NARS类型×测试文件」决定实际使用的超时时长序列
+    - 🚩默认策略：直接使用配置中的时长（全局/局部）
+    - 📌子类可覆盖[`TimeoutPolicy.timeouts`]以实现其它策略
+        - 📄`timeout_policy.AdaptiveTimeoutPolicy`：根据历史运行时间自适应
+    '''
+
+    def timeouts(self, nars_type: 'NARSType', test_file: TestFile, configured: KillJavaTimeouts) -> KillJavaTimeouts:
+        '''计算实际使用的超时时长序列
+        - 📌`configured`为配置中的时长（已结合全局与局部配置）
+        '''
+        return configured
+
+
 class NARSType:
     '''可用于启动「交互式脚本」「NAL测试」的NARS类型
     - 🎯用于调用侧快捷使用
@@ -452,12 +988,79 @@ class NARSType:
       - 📄参见[`TestFile.local_kill_java_timeouts`]
     '''
 
+    session_mode: bool
+    '''是否启用「会话模式」
+    - 🎯复用常驻的推理器进程，省去每个测试的JVM启动与预热时间
+    - 🚩启用后，「超时杀Java」的测试会在空闲会话中运行，测试之间重置推理器
+        - 📌重置失败⇒关闭该会话，回退到「新进程」运行此测试
+    - 📌未设置「超时杀Java」的测试不使用会话
+    '''
+
+    timeout_policy: TimeoutPolicy
+    '''「超时杀Java」时长策略
+    - 🎯在配置的时长基础上，进一步决定实际使用的超时时长
+    - 📜默认直接使用配置中的时长
+    '''
+
+    output_encodings: OutputEncodings
+    '''该NARS输出的候选编码表
+    - 🎯记住实际使用的后备编码：之后的测试结果在UTF-8解码失败时优先尝试
+    '''
+
     def __init__(self, name: str, *,
                  launch_config_path: str,
-                 global_kill_java_timeouts:     KillJavaTimeouts = None) -> None:
+                 global_kill_java_timeouts:     KillJavaTimeouts = None,
+                 session_mode: bool = False,
+                 timeout_policy: Optional[TimeoutPolicy] = None) -> None:
         self.name = name
         self.launch_config_path = launch_config_path
         self.global_kill_java_timeouts = global_kill_java_timeouts
+        self.session_mode = session_mode
+        self.timeout_policy = timeout_policy if timeout_policy is not None else TimeoutPolicy()
+        self.output_encodings = OutputEncodings()
+        self._idle_sessions: List[ReasonerSession] = []
+        self._sessions_lock = Lock()
+
+    def close_sessions(self) -> None:
+        '''关闭所有空闲会话
+        - 🎯在一批测试结束后释放常驻的推理器进程
+        '''
+        with self._sessions_lock:
+            sessions, self._idle_sessions = self._idle_sessions, []
+        for session in sessions:
+            session.close()
+
+    def _run_in_session(self, test_file: TestFile, timeout: float) -> TestResult:
+        '''在会话中运行一次测试
+        - 🚩取出空闲会话（没有则新开），重置后输入测试
+        - 🚩重置失败⇒关闭会话，回退到新进程运行
+        - 🚩运行后会话仍存活⇒放回空闲列表
+        '''
+        with self._sessions_lock:
+            session = self._idle_sessions.pop() if self._idle_sessions else None
+        if session is None:
+            session = open_session(self.launch_config_path)
+
+        result = (
+            session.run_test_nal(test_file.nal_index, timeout,
+                                 encodings=self.output_encodings)
+            if session.reset() else None)
+
+        # 回退到新进程
+        if result is None:
+            session.close()
+            return run_test_nal(self.launch_config_path,
+                                test_file.nal_index,
+                                kill_java_timeouts=timeout,
+                                encodings=self.output_encodings)
+
+        # 归还会话
+        if session.alive():
+            with self._sessions_lock:
+                self._idle_sessions.append(session)
+        else:
+            session.close()
+        return result
 
     def shell(self):
         '''使用`类型.shell()`调用shell脚本
@@ -465,56 +1068,108 @@ class NARSType:
         `'''
         return run_shell(self.launch_config_path)
 
+    def test_timeouts(self, test_file: TestFile) -> KillJavaTimeouts:
+        '''计算某测试实际使用的「超时杀Java」时长
+        - 🚩结合全局与局部配置，再交由策略决定
+        '''
+        return self.timeout_policy.timeouts(
+            self, test_file,
+            test_file.actual_kill_java_timeouts(self.global_kill_java_timeouts))
+
+    def test_attempts(self, test_file: TestFile) -> TestAttempts:
+        '''为某测试构造「尝试」状态
+        - 🚩超时时长：见[`NARSType.test_timeouts`]
+            - 📌`constants.SINGLE_ATTEMPT`⇒只用首个时长
+        - 🚩启用隔离（`constants.QUARANTINE_MODE`）且该测试不稳定⇒标记为隔离中
+            - 📌隔离方式为`'retry'`⇒失败后自动重新运行
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        import constants
+        from flakiness import active_flakiness_scores
+        scores = active_flakiness_scores()
+        quarantined = scores is not None and scores.is_flaky(self.name, test_file.name)
+        timeouts = self.test_timeouts(test_file)
+        if constants.SINGLE_ATTEMPT and timeouts is not None:
+            timeouts = list(timeouts)[:1]
+        return TestAttempts(
+            timeouts,
+            quarantined=quarantined,
+            flaky_retries=(
+                constants.QUARANTINE_RETRIES
+                if quarantined and constants.QUARANTINE_MODE == 'retry'
+                else 0))
+
+    def cached_result(self, test_file: TestFile) -> Optional[TestResult]:
+        '''从结果缓存中取出测试结果
+        - 🚩未启用结果缓存、跳过读取或未命中⇒`None`
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        from result_cache import active_result_cache
+        cache = active_result_cache()
+        if cache is None or cache.bypass:
+            return None
+        return cache.get(cache.key_of(self, test_file))
+
+    def cache_result(self, test_file: TestFile, result: TestResult) -> None:
+        '''将测试结果写入结果缓存（若已启用）
+        - 📌只有实际运行且成功的结果会被写入
+        - 📌隔离中的不稳定测试不写入：偶然的成功不应被沿用
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        from result_cache import active_result_cache
+        cache = active_result_cache()
+        if cache is not None and result.success and not result.cached and not result.quarantined:
+            cache.put(cache.key_of(self, test_file), self, test_file, result)
+
+    def run_attempt(self, test_file: TestFile, timeout: Optional[float]) -> TestResult:
+        '''以指定的超时时长运行一次测试
+        - 🚩`None`⇒不杀Java，一次性运行
+        - 🚩启用「会话模式」⇒在会话中运行
+        '''
+        if timeout is None:
+            return run_test_nal(self.launch_config_path,
+                                test_file.nal_index,
+                                encodings=self.output_encodings)
+        if self.session_mode:
+            return self._run_in_session(test_file, timeout)
+        return run_test_nal(self.launch_config_path,
+                            test_file.nal_index,
+                            kill_java_timeouts=timeout,
+                            encodings=self.output_encodings)
+
     def test_nal(self, test_file: TestFile, *,
                  silent: bool = False,
                  show_verbose: bool = False,
                  show_interactive: bool = False,
+                 use_cache: bool = True,
                  ) -> TestResult:
         '''使用`类型.test_nal()`调用nal测试
         - 🎯方便使用者调用
+        - ✨启用结果缓存（`constants.RESULT_CACHE_ENABLED`）时，输入未变的测试直接返回缓存的结果
 
         Args:
             test_name (str): 测试文件名
             silent (bool, optional): 是否静默运行（默认否）
             show_verbose (bool, optional): 是否显示详细测试信息（默认否）
             show_interactive (bool, optional): 是否交互显示测试信息（默认否）
+            use_cache (bool, optional): 是否使用结果缓存（默认是，仍需在配置中启用）
         `'''
 
-        # 准备 #
-
-        # 计算得到「超时杀Java」配置
-        kill_java_timeouts = test_file.actual_kill_java_timeouts(
-            self.global_kill_java_timeouts)
-
-        # 准备「测试结果」变量
-        result: Optional[TestResult] = None
+        # 结果缓存 #
+        result = self.cached_result(test_file) if use_cache else None
 
         # 测试 #
-
-        # 若为空⇒直接开始一次性测试
-        if kill_java_timeouts is None:
-            result = run_test_nal(self.launch_config_path,
-                                  test_file.nal_index)
-        # 不为空⇒遍历其中所有「超时杀Java」时长，只要一个成功，即退出——否则失败
-        else:
-            # 遍历其中所有「超时杀Java」时长
-            for timeout in kill_java_timeouts:
-                avoid_timeout = 1
-                while True:
-                    result = run_test_nal(self.launch_config_path,
-                                          test_file.nal_index,
-                                          kill_java_timeouts=timeout)
-                    # 只返回「进程有效」的结果
-                    if result.process_invalid():
-                        print(f'测试进程意外终止！指数退避{avoid_timeout}s，重新组织测试中……')
-                        sleep(avoid_timeout)
-                        avoid_timeout *= 2
-                    else:
-                        break
-                # 只要一个成功，即退出——否则失败
-                if result.success:
+        # * 🚩遍历其中所有「超时杀Java」时长，只要一个成功，即退出——否则失败
+        # * 🚩进程无效⇒指数退避后重试
+        if result is None:
+            attempts = self.test_attempts(test_file)
+            while True:
+                result = self.run_attempt(test_file, attempts.timeout)
+                if not attempts.advance(result):
                     break
-        assert result is not None  # 检验非空（一般不会发生）
+                sleep(max(0, attempts.not_before - time()))
+            if use_cache:
+                self.cache_result(test_file, result)
 
         # 展示结果 #
 
@@ -528,15 +1183,16 @@ class NARSType:
         return result
 
 
-def __build_cli_launch_cmd(*config_paths: str) -> List[str]:
+def build_cli_launch_cmd(*config_paths: str) -> List[str]:
     '''构建BabelNAR CLI启动命令
     - ✨可以同时引入多个配置文件
         - 📌按**从先往后**的顺序覆盖其中的配置项
     - ⚠️需要自行输入「启动」配置
+    - 📌`BABELNAR_CLI`可为单个路径，也可为命令前缀列表（如「Python解释器+模拟器脚本」）
     '''
     # exe前缀 | ⚠️需要动态导入 以避免循环导入
     from constants import BABELNAR_CLI
-    cmd = [BABELNAR_CLI]
+    cmd = [BABELNAR_CLI] if isinstance(BABELNAR_CLI, str) else list(BABELNAR_CLI)
     # 加入路径
     for config_path in config_paths:
         cmd.extend(['-c', config_path])
@@ -544,13 +1200,441 @@ def __build_cli_launch_cmd(*config_paths: str) -> List[str]:
     return cmd
 
 
-def __run_cli_with_configs(*config_paths: str, interactive: bool = False, kill_java_timeouts: float = -1) -> Union[CompletedProcess, Popen]:
+def new_process_group_kwargs() -> dict:
+    '''启动子进程时所需的「新进程组」参数
+    - 🎯让BabelNAR CLI及其启动的Java进程自成一组，以便只杀死「本次测试」的进程树
+    - 🚩Windows：`CREATE_NEW_PROCESS_GROUP`
+    - 🚩POSIX：`start_new_session`，子进程成为新会话（及新进程组）的首进程
+    '''
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        return {'start_new_session': True}
+
+
+def descendant_pids(pid: int) -> List[int]:
+    '''获取指定进程的所有后代进程ID
+    - 🚩遍历`/proc/*/stat`，按「父进程ID」建树后广度优先搜索
+    - ⚠️仅支持具有`/proc`的系统（如Linux）；其它系统返回空列表
+    '''
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue  # 进程已退出
+        # * 📝格式：`pid (comm) state ppid ...`，`comm`中可能有空格与括号
+        fields = stat[stat.rfind(b')') + 2:].split()
+        if len(fields) < 2:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    # 广度优先搜索
+    result = []
+    queue = [pid]
+    while queue:
+        for child in children.get(queue.pop(0), []):
+            result.append(child)
+            queue.append(child)
+    return result
+
+
+def kill_process_tree(process: Popen) -> None:
+    '''杀死子进程及其所有后代进程（如BabelNAR CLI启动的Java进程）
+    - 🎯只杀「本次测试」的进程，不影响系统中的其它Java进程，从而允许并行测试
+    - 🚩Windows：`taskkill -f -t -pid`，按父子关系杀死整棵进程树
+    - 🚩POSIX：杀死整个进程组，再补杀已离开进程组的后代进程
+    - 📌需要子进程以[`new_process_group_kwargs`]启动
+    - 📌亦可传入`asyncio`子进程（同样具有`pid`与`returncode`属性）
+    - ⚠️子进程已被回收（`returncode`已设置）⇒其进程ID可能已被复用
+        - 🚩POSIX：只按进程组杀死残留进程（进程组ID在组内仍有进程时不会被复用），不再追溯后代、不再单独杀死子进程
+        - 📌应尽量在回收子进程之前调用：此时还能补杀已离开进程组的后代
+    - ⚠️同步执行：返回时进程树已被终止，随后读取管道不会被残留进程阻塞
+    '''
+    reaped = process.returncode is not None
+    if os.name == 'nt':
+        # * 📌`Popen`持有进程句柄：回收后进程ID也不会被复用
+        subprocess.run(['taskkill', '-f', '-t', '-pid', str(process.pid)],
+                       capture_output=True)
+    else:
+        # 先收集后代（杀死父进程后，后代会被过继，无法再追溯）
+        pids = [] if reaped else descendant_pids(process.pid)
+        # * 📌以`start_new_session`启动⇒进程组ID即子进程ID
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # 进程组已不存在
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass  # 进程已退出
+    # 兜底：确保子进程本身被杀死
+    # * ⚠️仅限`Popen`：`asyncio`的子进程由事件循环回收，不可在此处`kill`（会抢先回收子进程）
+    if isinstance(process, Popen) and not reaped:
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+
+def nal_file_of_config(nal_hjson_path: str) -> Optional[str]:
+    '''从NAL测试配置文件中找出其引用的`.nal`文件路径
+    - 🚩按行搜索`file: 【路径】`，并相对「配置文件自身」解析路径
+    - ⚠️找不到时返回`None`
+    '''
+    try:
+        with open(nal_hjson_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return None
+    match = re.search(r'^\s*file\s*:\s*(.+?)\s*$', content, re.MULTILINE)
+    if match is None:
+        return None
+    file_path = match.group(1).strip('"\'')
+    # 相对路径 ⇒ 基于配置文件自身所在目录
+    return path.normpath(path.join(path.dirname(nal_hjson_path), file_path))
+
+
+def count_nal_expectations(nal_file_path: Optional[str]) -> int:
+    '''统计`.nal`文件中的「预期」数目
+    - 🚩统计以`''expect`开头的行
+    - 📌读取失败⇒0（即「无法提前判定成功」）
+    '''
+    if nal_file_path is None:
+        return 0
+    try:
+        with open(nal_file_path, 'r', encoding='utf-8') as f:
+            return sum(
+                1 for line in f
+                if line.startswith("''expect"))
+    except OSError:
+        return 0
+
+
+class OutputWatcher:
+    '''输出监视器
+    - 🎯在子进程运行期间逐行检查输出，尽早得出测试结论，而无需等到进程结束或超时
+    - 🚩成功：`expect-cycle(【步数】)`的出现次数达到`.nal`文件中「预期」的数目
+    - 🚩失败：出现任一「失败标记」
+        - 📄BabelNAR CLI panic、子进程意外关闭、消息发送失败
+    - 📌直接匹配字节串，无需逐行解码
+    '''
+
+    SUCCESS_PATTERN = EXPECT_CYCLE_PATTERN
+    '''「预期成功」的标记（与[`TestResult.from_process_result`]中的一致）'''
+
+    n_expected: int
+    '''需要达成的「预期」数目
+    - 📌为0时不会提前判定成功
+    '''
+
+    failure_markers: List[bytes]
+    '''「失败标记」：任一出现即判定失败'''
+
+    n_succeeded: int
+    '''已达成的「预期」数目'''
+
+    verdict: Optional[bool]
+    '''判定结果
+    - `None`：尚未判定
+    - `True`/`False`：成功/失败
+    '''
+
+    finished: Event
+    '''「已判定」事件：得出判定结果时被设置'''
+
+    def __init__(self, n_expected: int, failure_markers: Iterable[str]) -> None:
+        self.n_expected = n_expected
+        self.failure_markers = [
+            marker.encode('utf-8') for marker in failure_markers]
+        self.n_succeeded = 0
+        self.verdict = None
+        self.finished = Event()
+        self._lock = Lock()
+
+    @staticmethod
+    def for_nal_config(nal_hjson_path: str) -> 'OutputWatcher':
+        '''根据NAL测试配置文件构造监视器
+        - 🚩失败标记取自`constants.OUTPUT_FAILURE_MARKERS`
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        from constants import OUTPUT_FAILURE_MARKERS
+        return OutputWatcher(
+            count_nal_expectations(nal_file_of_config(nal_hjson_path)),
+            OUTPUT_FAILURE_MARKERS)
+
+    def feed(self, line: bytes) -> None:
+        '''输入一行输出（标准输出或标准错误）'''
+        with self._lock:
+            if self.verdict is not None:
+                return  # 已判定⇒不再改变
+            if any(marker in line for marker in self.failure_markers):
+                self.verdict = False
+            elif self.SUCCESS_PATTERN.search(line):
+                self.n_succeeded += 1
+                if 0 < self.n_expected <= self.n_succeeded:
+                    self.verdict = True
+            if self.verdict is not None:
+                self.finished.set()
+
+
+def wait_exit_without_reaping(process: Popen) -> None:
+    '''等待子进程退出，但不回收（保留僵尸进程）
+    - 🎯在杀死进程树之前，子进程ID（及进程组ID）不会被其它进程复用
+    - 🚩POSIX：`waitid(..., WEXITED | WNOWAIT)`
+    - 📌Windows（无`waitid`）⇒直接`wait`：`Popen`持有进程句柄，回收后进程ID也不会被复用
+    '''
+    if not hasattr(os, 'waitid'):
+        process.wait()
+        return
+    while True:
+        try:
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            return
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            return  # 已被回收
+
+
+def _run_watched(cmd: List[str], timeout: Optional[float], watcher: OutputWatcher) -> CompletedProcess:
+    '''启动子进程，在运行期间监视输出，并在「判定/退出/超时」中最先发生者到来时结束
+    - 🚩两个线程逐行读取标准输出与标准错误，送入监视器与输出捕获
+    - 📌`timeout`为`None`⇒不限时
+    - 🚩一个线程等待子进程退出（但不回收，见[`wait_exit_without_reaping`]）
+    - 🚩结束后总是杀死进程树：残留的Java进程不会阻塞管道读取
+        - 📌杀死进程树之后才回收子进程：其进程ID在此之前不会被复用
+    '''
+    process = subprocess.Popen(cmd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE,
+                               **new_process_group_kwargs())
+    assert process.stdout is not None
+    assert process.stderr is not None
+
+    def pump(stream, capture: OutputCapture) -> None:
+        for line in iter(stream.readline, b''):
+            capture.write(line)
+            watcher.feed(line)
+        stream.close()
+
+    def wait_exit() -> None:
+        wait_exit_without_reaping(process)
+        watcher.finished.set()
+
+    stdout, stderr = new_output_capture(), new_output_capture()
+    readers = [
+        Thread(target=pump, args=(process.stdout, stdout), daemon=True),
+        Thread(target=pump, args=(process.stderr, stderr), daemon=True),
+    ]
+    for thread in readers:
+        thread.start()
+    Thread(target=wait_exit, daemon=True).start()
+
+    # 等待：判定、退出或超时
+    watcher.finished.wait(timeout)
+
+    # 结束：杀死进程树，再读完剩余输出
+    kill_process_tree(process)
+    for thread in readers:
+        thread.join()
+    process.wait()
+
+    return CompletedProcess(
+        process.args, process.returncode,
+        stdout.finish(), stderr.finish())
+
+
+class ReasonerSession:
+    '''推理器会话
+    - 🎯保持一个BabelNAR CLI（及其推理器进程）常驻，依次输入多个`.nal`测试
+        - 📌省去每个测试的JVM启动与JIT预热时间
+    - 🚩以「会话配置」启动（允许用户输入），通过标准输入逐行输入`.nal`文件内容
+        - 📌`''terminate(if-no-user)`在允许用户输入时不会终止进程
+    - 🚩测试之间输入「重置」指令，清空推理器状态
+        - 📌等到输出中出现「重置完成」标记（`constants.SESSION_RESET_ACK`）才算重置成功
+    - 🚩每个测试的输出单独截取，结果各为一个`TestResult`
+    '''
+
+    def __init__(self, cmd: List[str]) -> None:
+        self.process = subprocess.Popen(cmd,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE,
+                                        **new_process_group_kwargs())
+        # 当前的输出捕获：每个测试开始时换新，之前的输出（如重置时的输出）丢弃
+        self._captures = {'stdout': new_output_capture(),
+                          'stderr': new_output_capture()}
+        self._watcher: Optional[OutputWatcher] = None
+        self._ack: Optional[Tuple[bytes, Event]] = None
+        self._exited = Event()
+        assert self.process.stdout is not None
+        assert self.process.stderr is not None
+        for stream, key in ((self.process.stdout, 'stdout'),
+                            (self.process.stderr, 'stderr')):
+            Thread(target=self._pump, args=(stream, key),
+                   daemon=True).start()
+        Thread(target=self._wait_exit, daemon=True).start()
+        # 确保主程序退出时不遗留常驻进程
+        atexit.register(self.close)
+
+    def _pump(self, stream, key: str) -> None:
+        '''持续读取输出，写入当前的输出捕获，并送入当前测试的监视器'''
+        for line in iter(stream.readline, b''):
+            self._captures[key].write(line)
+            watcher = self._watcher
+            if watcher is not None:
+                watcher.feed(line)
+            ack = self._ack
+            if ack is not None and ack[0] in line:
+                ack[1].set()
+        stream.close()
+
+    def _wait_exit(self) -> None:
+        '''等待进程退出，并唤醒当前测试'''
+        self.process.wait()
+        self._exited.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.finished.set()
+        ack = self._ack
+        if ack is not None:
+            ack[1].set()
+
+    def _renew_captures(self) -> Dict[str, OutputCapture]:
+        '''换上新的输出捕获，并返回旧的'''
+        old = self._captures
+        self._captures = {'stdout': new_output_capture(),
+                          'stderr': new_output_capture()}
+        return old
+
+    def alive(self) -> bool:
+        '''会话进程是否仍在运行'''
+        return not self._exited.is_set()
+
+    def _input(self, lines: Iterable[str]) -> bool:
+        '''向会话输入若干行
+        - 🚩返回是否输入成功
+        '''
+        assert self.process.stdin is not None
+        try:
+            for line in lines:
+                self.process.stdin.write(line.encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+            return True
+        except OSError:
+            return False
+
+    def reset(self, timeout: Optional[float] = None) -> bool:
+        '''重置推理器，为下一个测试做准备
+        - 🚩输入`constants.SESSION_RESET_INPUTS`，等待输出中出现`constants.SESSION_RESET_ACK`
+        - 📌返回是否重置成功：标记出现，且会话进程仍在运行
+            - ⚠️未配置标记、超时（默认`constants.SESSION_RESET_TIMEOUT`）、进程退出⇒失败
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        from constants import SESSION_RESET_INPUTS, SESSION_RESET_ACK, SESSION_RESET_TIMEOUT
+        if SESSION_RESET_ACK is None or not self.alive():
+            return False
+        acknowledged = Event()
+        self._ack = (SESSION_RESET_ACK.encode('utf-8'), acknowledged)
+        try:
+            if not self._input(SESSION_RESET_INPUTS):
+                return False
+            acknowledged.wait(SESSION_RESET_TIMEOUT if timeout is None else timeout)
+        finally:
+            self._ack = None
+        return acknowledged.is_set() and self.alive()
+
+    def run_test_nal(self, nal_index: str, timeout: float, *, encodings: Optional[OutputEncodings] = None) -> Optional[TestResult]:
+        '''在会话中运行一个NAL测试
+        - 🚩逐行输入`.nal`文件内容，监视输出直到「判定/退出/超时」
+        - 📌超时不会关闭会话：下一个测试前会重置
+        - 🚩没有「预期」的测试：与新进程运行时（按退出码判定）一致
+            - 📌输入完毕后随即重置：重置完成⇒全部内容均已处理；期间未出现失败标记、会话仍在运行⇒成功
+        - ⚠️找不到`.nal`文件或输入失败⇒返回`None`
+        '''
+        # ⚠️需要动态导入 以避免循环导入
+        from constants import CONFIG_NAL, OUTPUT_FAILURE_MARKERS
+        nal_hjson_path = CONFIG_NAL + f'{nal_index}.hjson'
+        nal_file_path = nal_file_of_config(nal_hjson_path)
+        if nal_file_path is None or not path.isfile(nal_file_path):
+            return None
+        with open(nal_file_path, 'r', encoding='utf-8') as f:
+            lines = [
+                line.rstrip('\r\n') for line in f
+                # 跳过空行与普通注释
+                if line.strip() and not (line.startswith("'") and not line.startswith("''"))
+            ]
+
+        # 截取本次测试的输出 | 丢弃此前（测试之间、重置时）的输出
+        for capture in self._renew_captures().values():
+            capture.discard()
+        watcher = OutputWatcher(
+            count_nal_expectations(nal_file_path), OUTPUT_FAILURE_MARKERS)
+        self._watcher = watcher
+
+        now = time()
+        if not self._input(lines):
+            self._watcher = None
+            return None
+        if watcher.n_expected > 0:
+            watcher.finished.wait(timeout)
+            success = watcher.verdict is True
+        else:
+            success = (self.reset(timeout)
+                       and watcher.verdict is None)
+        dt = time() - now
+        self._watcher = None
+        captures = self._renew_captures()
+
+        completed = CompletedProcess(
+            f'{" ".join(map(str, self.process.args))} < {nal_file_path}',
+            self.process.poll(),
+            captures['stdout'].finish(),
+            captures['stderr'].finish())
+        return TestResult.from_process_result(
+            ProcessResult(completed), dt,
+            encodings=encodings or OutputEncodings(),
+            success=success)
+
+    def close(self) -> None:
+        '''关闭会话：杀死整个进程树'''
+        atexit.unregister(self.close)
+        kill_process_tree(self.process)
+        if self.process.stdin is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        self.process.wait()
+
+
+def open_session(launch_config_path: str) -> ReasonerSession:
+    '''以「启动配置+会话配置」开启一个推理器会话'''
+    # ⚠️需要动态导入 以避免循环导入
+    from constants import CONFIG_SESSION
+    return ReasonerSession(
+        build_cli_launch_cmd(launch_config_path, CONFIG_SESSION))
+
+
+def __run_cli_with_configs(*config_paths: str, interactive: bool = False, kill_java_timeouts: float = -1, return_on_exit: bool = True, watcher: Optional[OutputWatcher] = None) -> Union[CompletedProcess, Popen]:
     '''通过配置文件启动BabelNAR CLI
     - 🚩构建启动命令，启动BabelNAR CLI子进程，通过配置调用NARS，最终输出结果
     - ⚠️会阻塞整个程序运行
+    - ✨`return_on_exit`：「超时杀Java」时，子进程一退出就返回，而非总是等满超时时间
+        - 📌超时时间此时作为「最后期限」：到期仍未退出⇒杀进程
+    - ✨`watcher`：「超时杀Java」时，边运行边监视输出，一旦得出判定即结束进程
+        - 📌判定结果保存在监视器中，由调用方读取
     '''
     # 构建启动命令
-    cmd = __build_cli_launch_cmd(*config_paths)
+    cmd = build_cli_launch_cmd(*config_paths)
 
     # 启动 & 获取结果
     # * 📝使用`capture_output`参数捕获子进程的输出，并保存到`stdout`和`stderr`属性中
@@ -558,28 +1642,58 @@ def __run_cli_with_configs(*config_paths: str, interactive: bool = False, kill_j
     # * 🚩【2024-05-09 15:08:59】自动杀死Java
     # subprocess.Popen(KILL_JAVA_CMD)
     if not interactive:
+        # * 🚩限制了输出捕获⇒边运行边逐行读取（超出上限的部分写入临时文件），而非一次性读入内存
+        # * 📌不提前判定的空监视器：仅在退出或超时时结束
+        from constants import OUTPUT_CAPTURE_LIMIT
+        if (watcher is None and OUTPUT_CAPTURE_LIMIT is not None
+                and (kill_java_timeouts < 0 or return_on_exit)):
+            watcher = OutputWatcher(0, [])
         # * 🚩「超时杀死Java进程」逻辑
         # * ⚠️若需强制杀死Java进程以避免程序阻塞，则需要`kill_java_timeouts`>=0
         # * 🎯【2024-05-09 15:52:41】目前仍然无法从BabelNAR CLI避免「Java残留进程阻塞工具链」的问题
         if kill_java_timeouts >= 0:
+            # * 🚩边运行边监视输出：判定/退出/超时 先到先结束
+            if watcher is not None:
+                return _run_watched(cmd, kill_java_timeouts, watcher)
             # 并行启动，然后间隔一段时间杀死Java进程
+            # * 🚩【2024-06-15】使子进程自成一组，超时只杀死本次测试的进程树
             process = subprocess.Popen(cmd,
                                        stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE)
+                                       stderr=subprocess.PIPE,
+                                       **new_process_group_kwargs())
+            # * 🚩等待子进程退出，最多等到超时；等待期间持续读取输出，避免管道写满导致子进程阻塞
+            if return_on_exit:
+                try:
+                    stdout, stderr = process.communicate(
+                        timeout=kill_java_timeouts)
+                except subprocess.TimeoutExpired:
+                    # 超时 ⇒ 杀进程，再读完剩余输出
+                    # * 📝超时后再次`communicate`不会丢失已读取的输出
+                    kill_process_tree(process)
+                    stdout, stderr = process.communicate()
+                else:
+                    # 正常退出 ⇒ 仍清理可能残留的Java进程
+                    # * 📌子进程已被回收：只按进程组杀死残留进程
+                    kill_process_tree(process)
+                # 返回结束了的子进程（CompletedProcess形式）
+                return CompletedProcess(
+                    process.args, process.returncode, stdout, stderr)
             # * ⚠️【2024-05-09 16:43:34】`process.poll()`也会造成主进程阻塞，不用
             # * 🚩【2024-05-09 16:44:19】现在无论如何都要kill掉Java进程
             sleep(kill_java_timeouts)
-            process.kill()
-            subprocess.Popen(['taskkill', '-f', '-im', 'java.exe'])
+            kill_process_tree(process)
 
             # 返回结束了的子进程（Popen形式）
             return process
         # * 🚩正常逻辑：直接调用`subprocess.run`，返回一个`CompletedProcess`对象
         # * ⚠️【2024-05-09 17:02:28】若对Python版本（直接用`python.exe`启动）使用`Popen`，在「失败情形」下会导致主进程阻塞
         #   * 📝能成功运行并得到「测试失败」结果，但子进程结束时卡在stdout上（去掉`stdout=`反而可以正常结束）
+        elif watcher is not None:
+            return _run_watched(cmd, None, watcher)
         else:
+            # * 🚩仅Windows经由shell启动：POSIX下`shell=True`只会执行命令列表的首项
             completed_process = subprocess.run(
-                cmd, shell=True, capture_output=True)
+                cmd, shell=os.name == 'nt', capture_output=True)
             # 若无需特别处理「超时杀Java」逻辑，直接等待即可
             return completed_process
     else:
@@ -601,7 +1715,11 @@ def run_shell(launch_config_path: str):
 def run_test_nal(
         launch_hjson_path: str,
         nal_index: str,
-        kill_java_timeouts: float = -1) -> TestResult:
+        kill_java_timeouts: float = -1,
+        *,
+        return_on_exit: bool = True,
+        watch_output: bool = True,
+        encodings: Optional[OutputEncodings] = None) -> TestResult:
     '''运行指定的NAL测试文件，并返回结果
     - 🎯灵活方便地调用各类测试
 
@@ -609,6 +1727,9 @@ def run_test_nal(
         launch_hjson_path(str): 启动的配置文件路径（用于启动CIN）
         nal_index(str): NAL测试索引，如`single_step/1.0`
         kill_java_timeouts(float): 是否启用「超时杀Java进程」机制，及超时时间；默认为-1，表示不等待
+        return_on_exit(bool): 子进程退出后是否立即返回（否则总是等满超时时间）；默认为是
+        watch_output(bool): 是否边运行边监视输出，在预期全部达成或出现失败标记时立即结束；默认为是（仅在「超时杀Java」时生效）
+        encodings(OutputEncodings, optional): 输出的候选编码表（如`NARSType.output_encodings`）；默认先UTF-8后GBK
     Returns:
         TestResult: 测试结果
     '''
@@ -620,13 +1741,21 @@ def run_test_nal(
     if not path.exists(NAL_HJSON_PATH):
         raise FileNotFoundError(f'找不到NAL测试配置文件：{NAL_HJSON_PATH}')
 
+    # 输出监视器（仅「超时杀Java」时）
+    watcher = (
+        OutputWatcher.for_nal_config(NAL_HJSON_PATH)
+        if watch_output and kill_java_timeouts >= 0
+        else None)
+
     # 计时器准备
     now = time()
 
     # 启动BabelNAR CLI，获取进程运行结果
     run_result = __run_cli_with_configs(
         launch_hjson_path, CONFIG_NAL_PRELUDE, NAL_HJSON_PATH,
-        kill_java_timeouts=kill_java_timeouts
+        kill_java_timeouts=kill_java_timeouts,
+        return_on_exit=return_on_exit,
+        watcher=watcher,
     )
 
     # 计算时间差（秒）
@@ -635,18 +1764,24 @@ def run_test_nal(
     # 将运行结果转换为「进程结果」
     process_result = ProcessResult(run_result)
 
-    # 返回测试结果
-    return TestResult.from_process_result(process_result, dt)
+    # 返回测试结果 | 监视器已有判定⇒以判定为准
+    return TestResult.from_process_result(
+        process_result, dt,
+        encodings=encodings or OutputEncodings(),
+        success=watcher.verdict if watcher is not None else None)
 
 
 def configure_io_encoding():
     '''配置输入输出编码
     - 🚩强制规定输入输出使用UTF-8
     - 🎯避免GBK编码进程IO导致的「中文乱码」问题
+    - 📌已被替换、不支持重设编码的流（如测试时被捕获的输入输出）⇒跳过
     '''
     from sys import stdin, stdout
-    stdin.reconfigure(encoding='utf-8')  # type: ignore
-    stdout.reconfigure(encoding='utf-8')  # type: ignore
+    for stream in (stdin, stdout):
+        reconfigure = getattr(stream, 'reconfigure', None)
+        if reconfigure is not None:
+            reconfigure(encoding='utf-8')
 
 
 def show_result(result: TestResult, verbose: bool = False, user_interactive: bool = False, n_paging: int = 0):
@@ -676,6 +1811,58 @@ def show_result(result: TestResult, verbose: bool = False, user_interactive: boo
             print('\n"""')
 
 
+CrossTestResult = Dict[Tuple[NARSType, TestFile], TestResult]
+'''交叉测试的返回类型
+- 🎯复用
+'''
+
+
+CrossTestJob = Tuple[NARSType, TestFile]
+'''交叉测试中的单个测试任务
+- 📌即「NARS类型×测试文件」的组合
+'''
+
+
+def show_cross_result(
+    nars_type: NARSType,
+    test_file: TestFile,
+    result: TestResult,
+    *,
+    verbose_on_success: bool = True,
+    verbose_on_fail: bool = True,
+) -> None:
+    '''展示交叉测试中单个测试的结果
+    - 🚩重复测量的结果：另行展示耗时、步数的统计
+    '''
+    # 成功：提示
+    if result.success:
+        print(
+            f'✅ {nars_type.name} @ {test_file.name} in {result.success_cycles} steps'
+            + (' (cached)' if result.cached else '')
+            + (' (quarantined)' if result.quarantined else ''))
+        show_repeat_stats(result)
+        if verbose_on_success:
+            show_result(result, verbose=True, n_paging=0)  # 不要分页，持续测试
+    # 失败且开启了「失败时打印详细日志」 ⇒ 打印详细日志
+    else:
+        print(f'❌ {nars_type.name} @ {test_file.name}'
+              + (' (quarantined)' if result.quarantined else ''))
+        show_repeat_stats(result)
+        if verbose_on_fail:
+            show_result(result, verbose=True, n_paging=0)  # 不要分页，持续测试
+
+
+def show_repeat_stats(result: TestResult) -> None:
+    '''展示重复测量的统计：中位数、p95与中位数的置信区间
+    - 📌只运行一次的结果不展示
+    '''
+    if result.samples is None:
+        return
+    n_success = sum(success for (success, _, _) in result.samples)
+    print(f'    {n_success}/{len(result.samples)} passed; time {result.time_stats()}'
+          + (f'; cycles {result.cycles_stats()}' if result.cycles_stats() is not None else ''))
+
+
 def _show_output(output: str, n_paging: int = 100):
     '''展示输出
     - 📝【2024-06-07 20:17:43】Python的print对长字符串会限制输出长度
@@ -54,6 +54,21 @@ def f_range(start: float, stop: float, step: float = 0.1) -> List[float]:
     return collect(__f_range(start, stop, step))
 
 
+def percentile(values: Iterable[float], q: float) -> float:
+    '''计算百分位数（线性插值）
+    - 🚩`q`取值范围为0~1：0.5⇒中位数，0.95⇒第95百分位数
+    - ⚠️空序列会报错
+    '''
+    sorted_values = sorted(values)
+    if not sorted_values:
+        raise ValueError('不能对空序列计算百分位数')
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
 def time_stamp():
     '''产生视觉上连续的数值字符串作为时间戳
     - 🚩格式：年月日时分秒（按【调用时】时间算）